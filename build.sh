@@ -3,6 +3,11 @@ set -o errexit
 
 pip install -r requirements.txt
 
+# Fail the build if a model change was committed without its migration
+python manage.py makemigrations --check --dry-run
+
 # Apply any outstanding database migrations
-python manage.py makemigrations
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Generate the API schema once instead of on every docs request
+python manage.py build_openapi_schema
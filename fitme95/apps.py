@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class Fitme95Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fitme95'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        from .instrumentation import connections
+        connections.install()
+        # Background tasks are registered by importing each app's tasks module
+        autodiscover_modules('tasks')
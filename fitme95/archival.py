@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models.measurement import Measurement, MeasurementArchive, Waist
+from .models.user import CustomUser
+
+
+def archive_horizon(now=None):
+    """
+    Every archived measurement is dated before this moment, so reads bounded after it can
+    skip the archive.
+    """
+    return (now or timezone.now()) - timedelta(days=settings.MEASUREMENT_ARCHIVE_AFTER_DAYS)
+
+
+def archive_measurements(batch_size=1000, progress=None):
+    """
+    Move measurements dated before ``archive_horizon()`` into ``MeasurementArchive``.
+
+    Each batch is copied and deleted (with its waist) in one transaction, so a crash never
+    loses or duplicates rows. Returns the number of measurements moved.
+    """
+    cutoff = archive_horizon()
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Measurement.objects.filter(date__lt=cutoff)
+                .select_related('waist')
+                .select_for_update(of=('self',))
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            MeasurementArchive.objects.bulk_create([
+                MeasurementArchive(
+                    id=measurement.id,
+                    user_id=measurement.user_id,
+                    body_weight=measurement.body_weight,
+                    body_fat=measurement.body_fat,
+                    chest=measurement.chest,
+                    waist=measurement.waist.waist,
+                    waist_above_below=measurement.waist.above_below,
+                    date=measurement.date,
+                )
+                for measurement in batch
+            ])
+            Measurement.objects.filter(id__in=[measurement.id for measurement in batch]).delete()
+            Waist.objects.filter(id__in=[measurement.waist_id for measurement in batch]).delete()
+            CustomUser.objects.filter(
+                google_id__in={measurement.user_id for measurement in batch}, has_archived_measurements=False
+            ).update(has_archived_measurements=True)
+
+        moved += len(batch)
+        if progress:
+            progress(moved)
+    return moved
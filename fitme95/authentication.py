@@ -0,0 +1,17 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .db.routers import pin_to_primary, wrote_recently
+
+
+class StickyJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that pins the request to the primary database when the token's user
+    wrote recently. The check runs before the user lookup, so even that read is consistent.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and wrote_recently(user_id):
+            pin_to_primary()
+        return super().get_user(validated_token)
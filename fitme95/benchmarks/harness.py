@@ -0,0 +1,479 @@
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import requests
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, WSGIServer
+from django.conf import settings
+from django.db import connections
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..instrumentation.metrics import registry
+from ..models.measurement import Measurement
+from ..models.user import CustomUser
+from ..seeding import seed_fitness_data
+
+BENCH_EMAIL_DOMAIN = 'bench.fitme95.local'
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def get_environ(self):
+        environ = super().get_environ()
+        accepted = getattr(self.server, 'accepted', None)
+        if accepted is not None and hasattr(accepted, 'at'):
+            # What a proxy in front of gunicorn would send: when the request arrived, before it queued
+            environ['HTTP_X_REQUEST_START'] = f't={accepted.at:.6f}'
+        return environ
+
+    def setup(self):
+        super().setup()
+        # wsgiref writes headers and body separately; without this, Nagle's algorithm plus the
+        # client's delayed ACK adds ~40 ms to every response that has a body
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """
+    Serve requests from a fixed set of threads, like a gunicorn ``gthread`` worker, so a
+    thread's database connection outlives the request when ``CONN_MAX_AGE`` allows it.
+    ``ThreadedWSGIServer`` starts a fresh thread, and therefore a fresh connection, per request.
+    """
+
+    def __init__(self, *args, threads=4, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self.accepted = threading.local()
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process, request, client_address, time.time())
+
+    def _process(self, request, client_address, accepted_at):
+        self.accepted.at = accepted_at
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        # The threads' database connections are closed as the threads exit
+        self._executor.shutdown(wait=True)
+
+
+@contextmanager
+def live_server(host='127.0.0.1', port=0, threads=None):
+    """
+    Serve the project's WSGI application from a background thread and yield its base URL.
+
+    With ``threads`` requests are handled by that many long-lived threads instead of one
+    thread per request.
+    """
+    if threads:
+        server = PooledWSGIServer((host, port), QuietRequestHandler, allow_reuse_address=False, threads=threads)
+    else:
+        server = ThreadedWSGIServer((host, port), QuietRequestHandler, allow_reuse_address=False)
+    server.set_app(WSGIHandler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def gunicorn_server(worker_class, workers, threads=1, startup_timeout=30):
+    """
+    Run gunicorn with the project's gunicorn.conf.py and ``worker_class`` (a key of
+    ``fitme95_api.server.WORKER_CLASSES``) against the current ``default`` database and yield its base URL.
+    """
+    port = _free_port()
+    database = connections['default'].settings_dict
+    env = dict(
+        os.environ,
+        SERVER_WORKER_CLASS=worker_class,
+        WEB_CONCURRENCY=str(workers),
+        WEB_THREADS=str(threads),
+        PORT=str(port),
+        DJANGO_DEBUG='False',
+        DATABASE_URL=f"sqlite:///{database['NAME']}" if database['ENGINE'].endswith('sqlite3') else os.environ['DATABASE_URL'],
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--access-logfile', os.devnull, '--log-level', 'warning'],
+        cwd=settings.BASE_DIR, env=env,
+    )
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"gunicorn with {worker_class} workers did not start")
+                time.sleep(0.1)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def fake_verify_firebase_token(token, request=None, **kwargs):
+    """
+    Stand-in for ``google.oauth2.id_token.verify_firebase_token``: the benchmark sends the
+    user's google_id as the ID token.
+    """
+    return {
+        'sub': token,
+        'email': f'{token}@{BENCH_EMAIL_DOMAIN}',
+        'name': 'Bench User',
+        'given_name': 'Bench',
+        'family_name': 'User',
+    }
+
+
+@contextmanager
+def disposable_database():
+    """
+    Create the test database for ``default``, point the connection at it and drop it on exit.
+    """
+    connection = connections['default']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    tmp_dir = None
+    if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+        # A file database lets the server threads write concurrently; the in-memory default would lock
+        tmp_dir = tempfile.TemporaryDirectory()
+        test_settings['NAME'] = os.path.join(tmp_dir.name, 'benchmark.sqlite3')
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+def seed(users, measurements_per_user, seed_value=0):
+    return seed_fitness_data(
+        users, measurements_per_user, prefix='bench', seed=seed_value, email_domain=BENCH_EMAIL_DOMAIN
+    )
+
+
+def _measurement_body(rng):
+    return {
+        'body_weight': round(rng.uniform(55, 110), 1),
+        'body_fat': round(rng.uniform(8, 35), 1),
+        'chest': round(rng.uniform(80, 120), 1),
+        'waist': {'waist': round(rng.uniform(70, 100), 1), 'above_below': rng.randint(0, 1)},
+        'date': timezone.now().isoformat(),
+    }
+
+
+def _profile_body(rng):
+    return {
+        'weight': round(rng.uniform(55, 110), 1),
+        'height': round(rng.uniform(150, 200), 1),
+        'dob': '90-01-01',
+        'gender': rng.choice(['m', 'f']),
+        'measurable_items': ['weight', 'chest', 'waist'],
+    }
+
+
+class Client:
+    """
+    Per-user credentials plus the ids of measurements the user may edit or delete.
+    """
+
+    def __init__(self, google_id):
+        user = CustomUser.objects.get(google_id=google_id)
+        refresh = RefreshToken.for_user(user)
+        self.google_id = google_id
+        self.refresh = str(refresh)
+        self.headers = {'Authorization': f'Bearer {refresh.access_token}'}
+        self.measurement_ids = list(
+            Measurement.objects.filter(user=user).order_by('id').values_list('id', flat=True)
+        )
+        self.deletable_ids = []
+
+
+# route -> (view name used in metrics, callable building (method, path, kwargs) for a client)
+SCENARIOS = {
+    'login': ('login', lambda c, rng: ('POST', '/login', {'json': {'id': c.google_id}})),
+    'refresh-token': ('refresh_token', lambda c, rng: ('POST', '/refresh-token', {'json': {'refresh': c.refresh}})),
+    'user-info': ('user_info', lambda c, rng: ('GET', '/user-info', {'headers': c.headers})),
+    'onboarding': ('setup_profile', lambda c, rng: (
+        'POST', '/onboarding', {'headers': c.headers, 'json': _profile_body(rng)})),
+    'measurements': ('get_measurements', lambda c, rng: ('GET', '/measurements', {'headers': c.headers})),
+    'measurements/create': ('create_measurement', lambda c, rng: (
+        'POST', '/measurements/create', {'headers': c.headers, 'json': _measurement_body(rng)})),
+    'measurements/update': ('update_measurement', lambda c, rng: (
+        'PUT', f'/measurements/update/{rng.choice(c.measurement_ids)}',
+        {'headers': c.headers, 'json': {'body_weight': round(rng.uniform(55, 110), 1)}})),
+    'measurements/delete': ('delete_measurement', lambda c, rng: (
+        'DELETE', f'/measurements/delete/{c.deletable_ids.pop()}', {'headers': c.headers})),
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(int(math.ceil(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+
+def _counter_total(name):
+    return sum(value for sample_name, _, value in registry.snapshot()['counters'] if sample_name == name)
+
+
+def _route_query_totals(view_name):
+    total = count = 0
+    for name, labels, _, histogram_sum, histogram_count in registry.snapshot()['histograms']:
+        if name == 'fitme95_db_queries_per_request' and ('route', view_name) in labels:
+            total += histogram_sum
+            count += histogram_count
+    return total, count
+
+
+def run_scenario(base_url, route, clients, requests_count, concurrency, seed_value=0):
+    """
+    Fire ``requests_count`` requests at ``route`` from ``concurrency`` threads.
+
+    Returns the summary and the list of ``(client, response)`` pairs.
+    """
+    view_name, build = SCENARIOS[route]
+    rng = random.Random(seed_value)
+    plan = []
+    for i in range(requests_count):
+        client = clients[i % len(clients)]
+        if route == 'measurements/delete' and not client.deletable_ids:
+            continue
+        plan.append((client, build(client, rng)))
+
+    sessions = threading.local()
+
+    def send(item):
+        client, (method, path, kwargs) = item
+        session = getattr(sessions, 'session', None)
+        if session is None:
+            session = sessions.session = requests.Session()
+        start = time.perf_counter()
+        response = session.request(method, base_url + path, timeout=60, **kwargs)
+        return time.perf_counter() - start, client, response
+
+    queries_before, handled_before = _route_query_totals(view_name)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, plan))
+    wall = time.perf_counter() - started
+    queries_after, handled_after = _route_query_totals(view_name)
+
+    latencies = sorted(latency for latency, _, _ in results)
+    handled = handled_after - handled_before
+    summary = {
+        'requests': len(results),
+        'errors': sum(1 for _, _, response in results if response.status_code >= 400),
+        'throughput_rps': round(len(results) / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'queries_per_request': round((queries_after - queries_before) / handled, 2) if handled else None,
+    }
+    return summary, [(client, response) for _, client, response in results]
+
+
+def run_benchmark(users, measurements_per_user, requests_per_route, concurrency, routes=None):
+    """
+    Seed data, start a local server and drive every route in turn. Must run against a
+    disposable database.
+    """
+    routes = routes or list(SCENARIOS)
+    if 'measurements/delete' in routes and 'measurements/create' not in routes:
+        raise ValueError("measurements/delete removes what measurements/create added; run both")
+
+    clients = [Client(google_id) for google_id in seed(users, measurements_per_user)]
+    report = {}
+    # Measures the routes, not load shedding or throttling
+    with patch('google.oauth2.id_token.verify_firebase_token', fake_verify_firebase_token), \
+            override_settings(ADMISSION_LIMITS={}, AUTH_THROTTLE_RATES={}), live_server() as base_url:
+        for route in routes:
+            summary, responses = run_scenario(base_url, route, clients, requests_per_route, concurrency)
+            if route == 'measurements/create':
+                for client, response in responses:
+                    if response.status_code == 201:
+                        client.deletable_ids.append(response.json()['data']['measurement']['id'])
+            report[route] = summary
+    return report
+
+
+def run_server_comparison(clients, worker_classes, workers, threads, requests_per_route, concurrency, routes):
+    """
+    Drive ``routes`` against a gunicorn server per worker class, each with ``workers`` processes
+    (and ``threads`` threads for gthread). Returns ``{(worker_class, route): summary}``.
+    """
+    report = {}
+    for worker_class in worker_classes:
+        with gunicorn_server(worker_class, workers, threads if worker_class == 'gthread' else 1) as base_url:
+            for route in routes:
+                summary, responses = run_scenario(base_url, route, clients, requests_per_route, concurrency)
+                if route == 'measurements/create':
+                    for client, response in responses:
+                        if response.status_code == 201:
+                            client.deletable_ids.append(response.json()['data']['measurement']['id'])
+                report[(worker_class, route)] = summary
+    return report
+
+
+def run_overload(clients, threads, requests_count, concurrency, max_queue_seconds, route='measurements'):
+    """
+    Overload a server of ``threads`` threads with ``concurrency`` clients on ``route``, once
+    without admission control and once shedding requests that queued for over ``max_queue_seconds``.
+    Reports latency over all responses, served or shed, and how many were shed.
+    """
+    report = {}
+    modes = {'unbounded': float('inf'), 'admission': max_queue_seconds}
+    for mode, max_queue in modes.items():
+        with override_settings(ADMISSION_MAX_QUEUE_SECONDS=max_queue, ADMISSION_LIMITS={}), \
+                live_server(threads=threads) as base_url:
+            summary, responses = run_scenario(base_url, route, clients, requests_count, concurrency)
+        summary['shed'] = sum(1 for _, response in responses if response.status_code == 503)
+        summary['errors'] -= summary['shed']
+        report[mode] = summary
+    return report
+
+
+def run_connection_churn(clients, requests_count, concurrency, threads, conn_max_age):
+    """
+    Send ``requests_count`` authenticated ``user-info`` requests to a server with ``threads``
+    long-lived threads while ``default`` uses ``conn_max_age``, and report how many database
+    connections that took.
+    """
+    database = connections.settings['default']
+    old_conn_max_age = database['CONN_MAX_AGE']
+    # Thread connections are created from this dict, so the server threads pick the value up
+    database['CONN_MAX_AGE'] = conn_max_age
+    try:
+        opened_before = _counter_total('fitme95_db_connections_total')
+        with live_server(threads=threads) as base_url:
+            summary, _ = run_scenario(base_url, 'user-info', clients, requests_count, concurrency)
+        opened = _counter_total('fitme95_db_connections_total') - opened_before
+    finally:
+        database['CONN_MAX_AGE'] = old_conn_max_age
+
+    summary['connections_opened'] = int(opened)
+    summary['connections_per_request'] = round(opened / summary['requests'], 3) if summary['requests'] else None
+    return summary
+
+
+def full_middleware():
+    """
+    ``MIDDLEWARE`` with the browser stack inlined, i.e. run for every request as before it was
+    scoped to the admin.
+    """
+    middleware = list(settings.MIDDLEWARE)
+    index = middleware.index('fitme95.middleware.scoped.BrowserMiddleware')
+    middleware[index:index + 1] = settings.BROWSER_MIDDLEWARE
+    return middleware
+
+
+def run_middleware_comparison(client, stacks, requests_count, paths=('/measurements', '/health')):
+    """
+    Call the WSGI handler in-process, without a server or socket, ``requests_count`` times per
+    path under each middleware list in ``stacks`` (name -> list) and report per-request latency.
+    Requests alternate between the stacks so drift in the machine's speed hits all of them alike.
+    """
+    factory = RequestFactory()
+    handlers = {}
+    for name, middleware in stacks.items():
+        with override_settings(MIDDLEWARE=middleware):
+            handlers[name] = WSGIHandler()
+
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    report = {}
+    for path in paths:
+        environ = factory.get(path, HTTP_AUTHORIZATION=client.headers['Authorization']).environ
+        timings = {name: [] for name in stacks}
+        for i in range(requests_count + requests_count // 10):
+            for name, handler in handlers.items():
+                start = time.perf_counter()
+                response = handler(dict(environ), start_response)
+                b''.join(response)
+                response.close()
+                # The first tenth warms caches and connections up and is not counted
+                if i >= requests_count // 10:
+                    timings[name].append(time.perf_counter() - start)
+        for name, latencies in timings.items():
+            latencies.sort()
+            report[(name, path)] = {
+                'requests': len(latencies),
+                'mean_us': round(sum(latencies) / len(latencies) * 1e6, 1),
+                'p50_us': round(percentile(latencies, 50) * 1e6, 1),
+                'p95_us': round(percentile(latencies, 95) * 1e6, 1),
+            }
+    return report
+
+
+def compare_to_baseline(report, baseline, tolerance, slack_ms=2.0):
+    """
+    Return human readable regressions of ``report`` against ``baseline``.
+
+    Latency regresses when p95 exceeds the baseline by more than ``tolerance`` (a fraction)
+    plus ``slack_ms``; queries per request and errors regress on any increase.
+    """
+    regressions = []
+    for route, base in baseline.get('routes', {}).items():
+        current = report.get(route)
+        if current is None:
+            continue
+        allowed_p95 = base['p95_ms'] * (1 + tolerance) + slack_ms
+        if current['p95_ms'] > allowed_p95:
+            regressions.append(
+                f"{route}: p95 {current['p95_ms']} ms exceeds baseline {base['p95_ms']} ms "
+                f"(allowed {allowed_p95:.2f} ms)"
+            )
+        if (current['queries_per_request'] or 0) > (base['queries_per_request'] or 0) + 0.01:
+            regressions.append(
+                f"{route}: {current['queries_per_request']} queries per request, "
+                f"baseline {base['queries_per_request']}"
+            )
+        if current['errors'] > base['errors']:
+            regressions.append(f"{route}: {current['errors']} errors, baseline {base['errors']}")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def save_baseline(path, report, parameters):
+    with open(path, 'w') as fh:
+        json.dump({'parameters': parameters, 'routes': report}, fh, indent=2, sort_keys=True)
+        fh.write('\n')
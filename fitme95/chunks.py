@@ -0,0 +1,210 @@
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .jobs import enqueue
+from .models.measurement import Measurement, MeasurementArchive, MeasurementChunk
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+DAY = 24 * 60 * 60 * 1_000_000
+
+# chunk column -> array typecode; every column holds one entry per measurement, in the same order
+COLUMNS = {'dates': 'q', 'body_weight': 'd', 'body_fat': 'd', 'chest': 'd', 'waist': 'd'}
+VALUE_COLUMNS = [column for column in COLUMNS if column != 'dates']
+
+
+def to_micros(moment):
+    return (moment - EPOCH) // MICROSECOND
+
+
+def from_micros(value):
+    return EPOCH + value * MICROSECOND
+
+
+def pack(points):
+    """
+    Pack ``(micros, body_weight, body_fat, chest, waist)`` points into one byte string per column,
+    in machine byte order.
+    """
+    columns = {column: array(typecode) for column, typecode in COLUMNS.items()}
+    for point in points:
+        for values, value in zip(columns.values(), point):
+            values.append(value)
+    return {column: values.tobytes() for column, values in columns.items()}
+
+
+def unpack(packed):
+    """
+    Typed views over packed columns, e.g. a chunk's fields. No bytes are copied: indexing a view
+    reads straight from the buffer the database driver returned.
+    """
+    return {column: memoryview(packed[column]).cast(typecode) for column, typecode in COLUMNS.items()}
+
+
+def chunk_year(moment):
+    return moment.astimezone(timezone.utc).year
+
+
+def _chunk_columns(chunk):
+    return unpack({column: getattr(chunk, column) for column in COLUMNS})
+
+
+def _year_range(year):
+    start = datetime(year, 1, 1, tzinfo=timezone.utc)
+    return Q(date__gte=start, date__lt=start.replace(year=year + 1))
+
+
+def _in_years(years):
+    filters = Q()
+    for year in years or ():
+        filters |= _year_range(year)
+    return filters
+
+
+def _outside_years(years):
+    # The ranges before, between and after ``years``, which the (user, date) index can still serve
+    if not years:
+        return Q()
+    filters = Q()
+    end = None
+    for year in sorted(set(years)):
+        start = datetime(year, 1, 1, tzinfo=timezone.utc)
+        if end is None:
+            filters |= Q(date__lt=start)
+        elif end < start:
+            filters |= Q(date__gte=end, date__lt=start)
+        end = start.replace(year=year + 1)
+    return filters | Q(date__gte=end)
+
+
+def _points(user, filters):
+    points = list(
+        Measurement.objects.filter(filters, user=user)
+        .values_list('date', 'body_weight', 'body_fat', 'chest', 'waist__waist')
+    )
+    if user.has_archived_measurements:
+        points += MeasurementArchive.objects.filter(filters, user=user).values_list(
+            'date', 'body_weight', 'body_fat', 'chest', 'waist'
+        )
+    return sorted((to_micros(date), *values) for date, *values in points)
+
+
+def rebuild_chunks(user, years=None):
+    """
+    Replace ``user``'s chunks for ``years``, or all of them, with ones packed from the measurement
+    rows. Returns the new chunks.
+    """
+    with transaction.atomic():
+        existing = MeasurementChunk.objects.filter(user=user)
+        if years is not None:
+            existing = existing.filter(year__in=years)
+        # Appends wait for the rebuild instead of landing in a chunk about to be replaced. The rows are
+        # read after taking the locks, so they include every append that committed before
+        locked_years = set(existing.select_for_update().values_list('year', flat=True))
+
+        by_year = defaultdict(list)
+        for point in _points(user, _in_years(years)):
+            by_year[chunk_year(from_micros(point[0]))].append(point)
+        MeasurementChunk.objects.filter(user=user, year__in=locked_years - set(by_year)).delete()
+        # A concurrent create may insert the first chunk of a year meanwhile, so upsert
+        return MeasurementChunk.objects.bulk_create(
+            [MeasurementChunk(user=user, year=year, **pack(points)) for year, points in sorted(by_year.items())],
+            update_conflicts=True, unique_fields=['user', 'year'], update_fields=[*COLUMNS, 'stale'],
+        )
+
+
+def append_measurement(measurement):
+    """
+    Add a newly created measurement to its chunk. Call it in the transaction that created the
+    measurement. Does nothing unless ``MEASUREMENT_CHUNKS`` is on.
+    """
+    if not settings.MEASUREMENT_CHUNKS:
+        return
+    year = chunk_year(measurement.date)
+    locked = MeasurementChunk.objects.select_for_update().filter(user_id=measurement.user_id, year=year)
+    chunk = locked.first()
+    if chunk is None:
+        # First measurement of the year, or a year never packed: start the chunk stale for a job to
+        # pack from the rows. A concurrent create may insert it first, then append to that one
+        try:
+            with transaction.atomic():
+                MeasurementChunk.objects.create(user_id=measurement.user_id, year=year, stale=True)
+        except IntegrityError:
+            chunk = locked.get()
+        else:
+            enqueue('rebuild_chunks', {'user_id': measurement.user_id, 'years': [year]})
+            return
+    if chunk.stale:
+        return
+
+    packed = pack([(
+        to_micros(measurement.date),
+        measurement.body_weight,
+        measurement.body_fat,
+        measurement.chest,
+        measurement.waist.waist,
+    )])
+    for column in COLUMNS:
+        setattr(chunk, column, bytes(getattr(chunk, column)) + packed[column])
+    chunk.save(update_fields=list(COLUMNS))
+
+
+def mark_stale(user, years=None):
+    """
+    Flag ``user``'s chunks for ``years``, or all of them, after measurements were changed or
+    deleted, and queue a job rebuilding them. Does nothing unless ``MEASUREMENT_CHUNKS`` is on.
+    """
+    if not settings.MEASUREMENT_CHUNKS:
+        return
+    chunks = MeasurementChunk.objects.filter(user=user, stale=False)
+    if years is not None:
+        chunks = chunks.filter(year__in=years)
+    # Chunks already stale have their rebuild queued
+    if chunks.update(stale=True):
+        enqueue('rebuild_chunks', {'user_id': user.pk, 'years': years})
+
+
+def load_columns(user):
+    """
+    Yield the column views of ``user``'s whole history in chunks of any size and order.
+
+    Reads the chunks when ``MEASUREMENT_CHUNKS`` is on, and packs the measurement rows of every
+    other year on the fly: stale years until their rebuild job has run, and years without a chunk
+    yet, e.g. one a measurement's date was moved into. A read never writes.
+    """
+    fresh = []
+    if settings.MEASUREMENT_CHUNKS:
+        fresh = list(MeasurementChunk.objects.filter(user=user, stale=False).order_by('year'))
+    for chunk in fresh:
+        yield _chunk_columns(chunk)
+    yield unpack(pack(_points(user, _outside_years([chunk.year for chunk in fresh]))))
+
+
+def downsample(user, bucket_days):
+    """
+    Average every measurement column over ``bucket_days``-day buckets (UTC, counted from the
+    epoch) of ``user``'s whole history. Returns one dict per non-empty bucket, oldest first.
+    """
+    width = bucket_days * DAY
+    buckets = {}
+    for columns in load_columns(user):
+        values = [columns[column] for column in VALUE_COLUMNS]
+        for index, moment in enumerate(columns['dates']):
+            totals = buckets.setdefault(moment // width, [0] + [0.0] * len(values))
+            totals[0] += 1
+            for position, column in enumerate(values, 1):
+                totals[position] += column[index]
+
+    return [
+        {
+            'date': from_micros(key * width),
+            'count': count,
+            **{column: round(total / count, 2) for column, total in zip(VALUE_COLUMNS, totals)},
+        }
+        for key, (count, *totals) in sorted(buckets.items())
+    ]
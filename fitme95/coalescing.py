@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+
+def single_flight(view):
+    """
+    Let concurrent identical GETs of one user share a single run of the view; see
+    ``SingleFlightMiddleware``. Only for views whose response depends on nothing but the user,
+    the URL, the query string and the ``Accept`` header.
+    """
+    view.single_flight = True
+    return view
+
+
+def _resolve(future, response):
+    if not future.done():
+        future.set_result(response)
+
+
+class Flight:
+    """
+    One in-progress computation. Followers wait for the leader's response from threads
+    (``wait``) or event loops (``wait_async``); ``None`` tells them to compute it themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._waiters = []
+        self.response = None
+
+    def finish(self, response):
+        with self._lock:
+            self.response = response
+            self._done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, response)
+
+    def wait(self, timeout):
+        self._done.wait(timeout)
+        return self.response
+
+    async def wait_async(self, timeout):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self._done.is_set():
+                return self.response
+            self._waiters.append((loop, future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class SingleFlight:
+    """
+    In-flight computations of this process by key; the first caller of a key leads, later ones follow.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def join(self, key):
+        """
+        Return ``(flight, is_leader)`` for ``key``. A leader must call ``finish`` exactly once.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def finish(self, key, flight, response):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(response)
+
+    def forget(self, user_id):
+        """
+        Stop new requests from joining ``user_id``'s in-flight computations, which may predate a
+        write of theirs. Computations already joined still complete.
+        """
+        if user_id is None:
+            return
+        with self._lock:
+            for key in [key for key in self._flights if key[0] == user_id]:
+                del self._flights[key]
+
+
+flights = SingleFlight()
@@ -0,0 +1,41 @@
+from django.db import NotSupportedError
+from django.db.migrations.operations import AddIndex
+
+
+class AddIndexConcurrently(AddIndex):
+    """
+    ``AddIndex`` that uses ``CREATE INDEX CONCURRENTLY`` on PostgreSQL, so writes to a large table
+    keep flowing while the index builds, and a plain ``CREATE INDEX`` on other backends.
+
+    Concurrent builds cannot run inside a transaction: the migration must set ``atomic = False``.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor == 'postgresql':
+            self._ensure_not_in_transaction(schema_editor)
+            schema_editor.add_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor == 'postgresql':
+            self._ensure_not_in_transaction(schema_editor)
+            schema_editor.remove_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.remove_index(model, self.index)
+
+    @staticmethod
+    def _ensure_not_in_transaction(schema_editor):
+        if schema_editor.connection.in_atomic_block:
+            raise NotSupportedError(
+                "AddIndexConcurrently cannot run inside a transaction; set atomic = False on the migration."
+            )
+
+    def describe(self):
+        return f"Concurrently create index {self.index.name} on {self.model_name}"
@@ -0,0 +1,134 @@
+from datetime import datetime, timezone
+
+from django.db import transaction
+
+INTERVALS = ('month', 'year')
+
+
+def _truncate(moment, interval):
+    if interval == 'year':
+        return datetime(moment.year, 1, 1, tzinfo=timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def _next(bound, interval):
+    if interval == 'year':
+        return bound.replace(year=bound.year + 1)
+    if bound.month == 12:
+        return bound.replace(year=bound.year + 1, month=1)
+    return bound.replace(month=bound.month + 1)
+
+
+def partition_ranges(table, interval, start, end):
+    """
+    Yield ``(partition name, lower bound, upper bound)`` for every ``interval`` from the one
+    containing ``start`` through the one containing ``end``. Bounds are UTC, upper bound exclusive.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {INTERVALS}")
+    lower = _truncate(start, interval)
+    while lower <= end:
+        upper = _next(lower, interval)
+        suffix = f'{lower:%Y}' if interval == 'year' else f'{lower:%Y_%m}'
+        yield f'{table}_p{suffix}', lower, upper
+        lower = upper
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def create_partitions(connection, table, interval, start, end, column='date'):
+    """
+    Create the missing partitions between ``start`` and ``end`` of ``table``, partitioned on
+    ``column``. Returns the names created.
+
+    PostgreSQL refuses to create a partition while the ``<table>_default`` partition holds rows in
+    its range, so those rows are moved into the new partition in the same transaction.
+    """
+    quote = connection.ops.quote_name
+    default = f'{table}_default'
+    date = quote(column)
+    created = []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [default])
+        has_default = cursor.fetchone()[0] is not None
+        for name, lower, upper in partition_ranges(table, interval, start, end):
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+            with transaction.atomic(using=connection.alias):
+                if has_default:
+                    cursor.execute(
+                        f"CREATE TEMPORARY TABLE {quote(name + '_moved')} AS "
+                        f"WITH moved AS (DELETE FROM {quote(default)} WHERE {date} >= %s AND {date} < %s RETURNING *) "
+                        f"SELECT * FROM moved",
+                        [lower, upper],
+                    )
+                cursor.execute(
+                    f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)",
+                    [lower, upper],
+                )
+                if has_default:
+                    cursor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(name + '_moved')}")
+                    cursor.execute(f"DROP TABLE {quote(name + '_moved')}")
+            created.append(name)
+    return created
+
+
+def partition_table(connection, model, interval, end):
+    """
+    Rebuild ``model``'s table as a table partitioned by range on ``date`` and copy its rows over.
+
+    PostgreSQL requires every unique constraint of a partitioned table to contain the partition
+    key, so the primary key becomes ``(id, date)`` and the one-to-one ``waist_id`` is backed by a
+    plain index; the application still treats ``id`` as the key. Rows outside every range land
+    in a ``<table>_default`` partition. Before PostgreSQL 17 partitioned tables cannot have identity
+    columns, so ``id`` is fed by a plain sequence instead.
+    """
+    table = model._meta.db_table
+    old_table = f'{table}_unpartitioned'
+    quote = connection.ops.quote_name
+    pk = quote(model._meta.pk.column)
+    date = quote(model._meta.get_field('date').column)
+    foreign_keys = [
+        # The referenced column is the target's key, e.g. CustomUser's google_id, not necessarily "id"
+        (quote(field.column), quote(field.related_model._meta.db_table), quote(field.target_field.column))
+        for field in (model._meta.get_field('user'), model._meta.get_field('waist'))
+    ]
+    waist_column = model._meta.get_field('waist').column
+    sequence = f'{table}_{model._meta.pk.column}_seq'
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {quote(table)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"SELECT min({date}), max({pk}) FROM {quote(table)}")
+        first_date, max_id = cursor.fetchone()
+
+        cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(old_table)}")
+        cursor.execute(
+            f"CREATE TABLE {quote(table)} (LIKE {quote(old_table)} INCLUDING DEFAULTS) PARTITION BY RANGE ({date})"
+        )
+        cursor.execute(f"ALTER TABLE {quote(table)} ADD PRIMARY KEY ({pk}, {date})")
+        for column, target_table, target_column in foreign_keys:
+            cursor.execute(
+                f"ALTER TABLE {quote(table)} ADD FOREIGN KEY ({column}) REFERENCES {target_table} ({target_column}) "
+                f"DEFERRABLE INITIALLY DEFERRED"
+            )
+        cursor.execute(f"CREATE TABLE {quote(table + '_default')} PARTITION OF {quote(table)} DEFAULT")
+        create_partitions(connection, table, interval, first_date or end, end, model._meta.get_field('date').column)
+
+        cursor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(old_table)}")
+        # Also drops the old identity sequence, freeing its name
+        cursor.execute(f"DROP TABLE {quote(old_table)}")
+        cursor.execute(f"CREATE SEQUENCE {quote(sequence)} OWNED BY {quote(table)}.{pk}")
+        cursor.execute(f"ALTER TABLE {quote(table)} ALTER COLUMN {pk} SET DEFAULT nextval(%s)", [sequence])
+        if max_id is not None:
+            cursor.execute("SELECT setval(%s, %s)", [sequence, max_id])
+        # Index names are freed with the old table; recreate them under the names migrations know
+        with connection.schema_editor(atomic=False) as editor:
+            for index in model._meta.indexes:
+                editor.add_index(model, index)
+        cursor.execute(f"CREATE INDEX {quote(f'{table}_{waist_column}')} ON {quote(table)} ({quote(waist_column)})")
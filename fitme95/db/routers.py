@@ -0,0 +1,74 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+_use_primary = ContextVar('fitme95_use_primary', default=False)
+
+
+class ReplicaRouter:
+    """
+    Send reads to a random replica from ``settings.DATABASE_REPLICAS`` and writes to ``default``.
+
+    Reads go to ``default`` as well while the current request is pinned (see ``pin_to_primary``),
+    which is how a user sees their own writes despite replication lag.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or _use_primary.get():
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        return db not in settings.DATABASE_REPLICAS
+
+
+def pin_to_primary(pinned=True):
+    """
+    Route every read for the rest of the current request to the primary (or stop doing so).
+    Returns a token for ``unpin``.
+    """
+    return _use_primary.set(pinned)
+
+
+def unpin(token):
+    _use_primary.reset(token)
+
+
+@contextmanager
+def use_primary():
+    token = pin_to_primary()
+    try:
+        yield
+    finally:
+        unpin(token)
+
+
+def _sticky_key(user_id):
+    return f'fitme95:replica-sticky:{user_id}'
+
+
+def remember_write(user_id):
+    """
+    Keep the user's reads on the primary for ``REPLICA_STICKY_SECONDS``, long enough for
+    replicas to catch up with what they just wrote.
+    """
+    if settings.DATABASE_REPLICAS:
+        caches[settings.REPLICA_STICKY_CACHE].set(_sticky_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def wrote_recently(user_id):
+    if not settings.DATABASE_REPLICAS:
+        return False
+    return caches[settings.REPLICA_STICKY_CACHE].get(_sticky_key(user_id), False)
@@ -0,0 +1,59 @@
+from django.db import NotSupportedError, connections, router
+from django.db.models.expressions import Col
+
+
+def upsert(model, values, conflict_fields, update_fields, created_field):
+    """
+    Insert a row or update the one it conflicts with in a single
+    ``INSERT ... ON CONFLICT (...) DO UPDATE ... RETURNING`` statement, and return
+    ``(instance, created)``.
+
+    ``values`` maps field names to the values of a new row; other fields take their model
+    defaults. On conflict only ``update_fields`` change. ``created_field`` must never be updated
+    and hold a value no existing row can have, such as a fresh timestamp: seeing it come back
+    means the row was inserted. Needs PostgreSQL or SQLite >= 3.35.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    if not (connection.features.supports_update_conflicts_with_target
+            and connection.features.can_return_columns_from_insert):
+        raise NotSupportedError(f"{connection.vendor} cannot upsert with RETURNING")
+    if created_field in update_fields:
+        raise ValueError("created_field must not be updated on conflict")
+
+    opts = model._meta
+    quote = connection.ops.quote_name
+    new = model(**values)
+    insert_fields = [
+        field for field in opts.concrete_fields if not (field.primary_key and field.name not in values)
+    ]
+    returned_fields = opts.concrete_fields
+
+    # With nothing to update, rewrite the conflict columns so the existing row is still returned
+    update_columns = [opts.get_field(name).column for name in update_fields or conflict_fields]
+    sql = (
+        "INSERT INTO {table} ({columns}) VALUES ({placeholders}) "
+        "ON CONFLICT ({conflict}) DO UPDATE SET {updates} RETURNING {returning}"
+    ).format(
+        table=quote(opts.db_table),
+        columns=', '.join(quote(field.column) for field in insert_fields),
+        placeholders=', '.join(['%s'] * len(insert_fields)),
+        conflict=', '.join(quote(opts.get_field(name).column) for name in conflict_fields),
+        updates=', '.join(f'{quote(column)} = EXCLUDED.{quote(column)}' for column in update_columns),
+        returning=', '.join(quote(field.column) for field in returned_fields),
+    )
+    params = [field.get_db_prep_save(getattr(new, field.attname), connection) for field in insert_fields]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    converted = []
+    for field, value in zip(returned_fields, row):
+        expression = Col(opts.db_table, field)
+        for converter in connection.ops.get_db_converters(expression) + expression.get_db_converters(connection):
+            value = converter(value, expression, connection)
+        converted.append(value)
+
+    instance = model.from_db(using, [field.attname for field in returned_fields], converted)
+    return instance, getattr(instance, created_field) == getattr(new, created_field)
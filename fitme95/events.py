@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from functools import cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('fitme95.events')
+
+
+class Subscription:
+    """
+    One open event stream. Events are queued on the stream's event loop; a consumer that falls
+    ``EVENTS_QUEUE_SIZE`` events behind loses them and gets a single ``resync`` event instead.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': 'resync'})
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class LocalBroker:
+    """
+    Hands events to the streams open in this process. Enough when a single process serves
+    the ASGI app.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        """
+        Open a subscription to ``user_id``'s events. Call it from the event loop that will read it.
+        """
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions[subscription.user_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, event):
+        self.deliver(user_id, event)
+
+    def deliver(self, user_id, event):
+        """
+        Queue ``event`` on every local subscription of ``user_id``. Safe to call from any thread.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.put, event)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Fans events out to every process through PostgreSQL ``NOTIFY``. Each process that has streams
+    open LISTENs on a dedicated connection from a background thread and delivers what it receives
+    to its local subscriptions, so any number of nodes can share one database.
+    """
+    channel = 'fitme95_events'
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, user_id):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='fitme95-events', daemon=True)
+                self._listener.start()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id, event):
+        payload = json.dumps({'user': user_id, 'event': event}, cls=DjangoJSONEncoder)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def _listen(self):
+        while True:
+            listener = connections.create_connection(DEFAULT_DB_ALIAS)
+            try:
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                while True:
+                    for payload in self._receive(listener.connection, timeout=30):
+                        message = json.loads(payload)
+                        self.deliver(message['user'], message['event'])
+            except Exception:
+                logger.exception("Event listener lost its connection, reconnecting")
+                time.sleep(1)
+            finally:
+                listener.close()
+
+    @staticmethod
+    def _receive(raw_connection, timeout):
+        if callable(getattr(raw_connection, 'notifies', None)):
+            # psycopg 3
+            for notify in raw_connection.notifies(timeout=timeout):
+                yield notify.payload
+            return
+        # psycopg2
+        if select.select([raw_connection], [], [], timeout)[0]:
+            raw_connection.poll()
+            while raw_connection.notifies:
+                yield raw_connection.notifies.pop(0).payload
+
+
+@cache
+def get_broker():
+    return import_string(settings.EVENT_BROKER)()
+
+
+def _publish(user_id, event):
+    get_broker().publish(user_id, event)
+
+
+def notify(user, event_type, **fields):
+    """
+    Tell ``user``'s open streams about a change once the current transaction commits, so devices
+    never refetch before the change is visible. A failing broker is logged, never raised.
+    """
+    event = {'type': event_type, **fields}
+    transaction.on_commit(lambda: _publish(user.pk, event), robust=True)
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+from .instrumentation.connections import pool_stats
+
+logger = logging.getLogger('fitme95.health')
+
+
+def _timed(check, *args):
+    start = time.perf_counter()
+    try:
+        result = check(*args)
+        result.setdefault('status', 'ok')
+    except Exception:
+        # The probe is public and driver messages name hosts and databases, so they only go to the log
+        logger.exception("Readiness check %s failed for %s", check.__name__, args[0])
+        result = {'status': 'fail'}
+    result['latency_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def check_connectivity(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    return {}
+
+
+def check_server_connections(alias):
+    """
+    Share of the database server's connection slots in use by every client, not only this
+    process. Only PostgreSQL exposes this.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return {'status': 'skipped'}
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_stat_activity")
+        in_use = cursor.fetchone()[0]
+        cursor.execute("SHOW max_connections")
+        limit = int(cursor.fetchone()[0])
+    usage = in_use / limit
+    return {
+        'status': 'fail' if usage >= settings.READINESS_MAX_CONNECTION_USAGE else 'ok',
+        'in_use': in_use,
+        'max': limit,
+        'usage': round(usage, 3),
+    }
+
+
+def check_pool(alias):
+    """
+    This process's connection pool, when ``alias`` is pooled: it fails while requests wait for a
+    connection because every one is checked out.
+    """
+    stats = pool_stats(alias)
+    if stats is None:
+        return {'status': 'skipped'}
+    waiting = stats.get('requests_waiting', 0)
+    return {
+        'status': 'fail' if waiting else 'ok',
+        'in_use': stats['pool_size'] - stats['pool_available'],
+        'max': stats['pool_max'],
+        'waiting': waiting,
+    }
+
+
+def check_migrations(alias):
+    executor = MigrationExecutor(connections[alias])
+    pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return {
+        'status': 'fail' if pending else 'ok',
+        'pending': [f'{migration.app_label}.{migration.name}' for migration, _ in pending],
+    }
+
+
+def run_readiness_checks():
+    checks = {}
+    for alias, config in settings.DATABASES.items():
+        if config.get('ENGINE', '').endswith('dummy'):
+            continue
+        database = {'connectivity': _timed(check_connectivity, alias)}
+        if database['connectivity']['status'] == 'ok':
+            database['server_connections'] = _timed(check_server_connections, alias)
+            database['pool'] = _timed(check_pool, alias)
+            if alias == 'default':
+                database['migrations'] = _timed(check_migrations, alias)
+        checks[alias] = database
+
+    ready = all(
+        result['status'] != 'fail'
+        for database in checks.values()
+        for result in database.values()
+    )
+    return {'status': 'ok' if ready else 'fail', 'checks': checks}
+
+
+class ReadinessCache:
+    """
+    Keep the last readiness result for ``settings.READINESS_CACHE_SECONDS`` so frequent
+    orchestrator polling costs one round of checks per TTL per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expires = 0.0
+        self._result = None
+
+    def get(self):
+        if time.monotonic() < self._expires:
+            return self._result, True
+        with self._lock:
+            if time.monotonic() < self._expires:
+                return self._result, True
+            self._result = run_readiness_checks()
+            self._expires = time.monotonic() + settings.READINESS_CACHE_SECONDS
+            return self._result, False
+
+    def clear(self):
+        self._expires = 0.0
+
+
+readiness = ReadinessCache()
@@ -0,0 +1,109 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models.idempotency import IdempotencyKey
+from .utils import fm_response
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def _in_progress():
+    response = fm_response(
+        status_code=status.HTTP_409_CONFLICT,
+        message="A request with this Idempotency-Key is still being processed"
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+def _claim(user, key, fingerprint):
+    """
+    Record that a request with ``key`` started and return the row, or the response to send
+    instead when the key was used before.
+    """
+    now = timezone.now()
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint, created_at=now)
+        except IntegrityError:
+            pass
+        existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if existing is None:
+            # The first request failed and released the key in between
+            continue
+        expired = existing.created_at < now - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        # A claim still pending after its lease belongs to a request whose worker died mid-request
+        abandoned = existing.status_code is None and (
+            existing.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE_SECONDS)
+        )
+        if expired or abandoned:
+            # Take the key over; matching the old claim time lets only one of concurrent retries win
+            taken = IdempotencyKey.objects.filter(pk=existing.pk, created_at=existing.created_at).update(
+                fingerprint=fingerprint, created_at=now, status_code=None, response=None
+            )
+            if not taken:
+                return _in_progress()
+            existing.fingerprint, existing.created_at = fingerprint, now
+            return existing
+        if existing.fingerprint != fingerprint:
+            return fm_response(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                message="Idempotency-Key was already used for a different request"
+            )
+        if existing.status_code is None:
+            return _in_progress()
+        return Response(existing.response, status=existing.status_code, headers={'Idempotent-Replayed': 'true'})
+    return _in_progress()
+
+
+def idempotent(view):
+    """
+    Let clients retry a write safely: the first response to a request with an ``Idempotency-Key``
+    header is stored for the user and replayed to retries with the same key instead of running the
+    view again. Server errors are not stored, so those can be retried for real. A claim left pending
+    for ``IDEMPOTENCY_KEY_LEASE_SECONDS``, by a worker killed mid-request, is taken over by the next retry.
+
+    Apply it below ``@api_view``, where the request is authenticated. A keyed request costs four
+    more queries: the claim's insert in a savepoint and the stored response's update; six when it
+    takes an expired or abandoned key over.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return view(request, *args, **kwargs)
+        if not key or len(key) > 255:
+            return fm_response(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                message="Idempotency-Key must be 1 to 255 characters"
+            )
+
+        claim = _claim(request.user, key, _fingerprint(request))
+        if not isinstance(claim, IdempotencyKey):
+            return claim
+        # Only while the claim is still ours: past its lease a retry may have taken the key over
+        ours = IdempotencyKey.objects.filter(pk=claim.pk, created_at=claim.created_at)
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            ours.delete()
+            raise
+        if response.status_code >= 500:
+            ours.delete()
+        else:
+            ours.update(status_code=response.status_code, response=response.data)
+        return response
+    return wrapper
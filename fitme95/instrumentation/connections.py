@@ -0,0 +1,46 @@
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import registry
+
+# psycopg_pool statistic -> gauge name
+POOL_GAUGES = {
+    'pool_min': 'fitme95_db_pool_min_size',
+    'pool_max': 'fitme95_db_pool_max_size',
+    'pool_size': 'fitme95_db_pool_size',
+    'pool_available': 'fitme95_db_pool_available',
+    'requests_waiting': 'fitme95_db_pool_requests_waiting',
+}
+
+
+def count_connection(sender, connection, **kwargs):
+    registry.inc('fitme95_db_connections_total', {'alias': connection.alias, 'vendor': connection.vendor})
+
+
+def pool_stats(alias):
+    """
+    The psycopg pool statistics of ``alias`` in this process, or None when it is not pooled.
+    """
+    if not connections.settings[alias].get('OPTIONS', {}).get('pool'):
+        return None
+    pool = getattr(connections[alias], 'pool', None)
+    return None if pool is None else pool.get_stats()
+
+
+def pool_samples():
+    """
+    Gauges for every database alias served from a psycopg connection pool. Pools live in the
+    worker process, so each scrape reports the pool of the worker that answered it.
+    """
+    for alias in connections:
+        stats = pool_stats(alias)
+        if stats is None:
+            continue
+        for key, name in POOL_GAUGES.items():
+            if key in stats:
+                yield name, {'alias': alias}, stats[key]
+
+
+def install():
+    connection_created.connect(count_connection, dispatch_uid='fitme95.count_connection')
+    registry.add_collector(pool_samples)
@@ -0,0 +1,222 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name -> (type, help text, histogram buckets)
+METRICS = {
+    'fitme95_http_requests_total': (
+        'counter', 'Total HTTP requests by route, method and status code.', None),
+    'fitme95_http_request_duration_seconds': (
+        'histogram', 'Time spent handling a request, in seconds.', LATENCY_BUCKETS),
+    'fitme95_http_response_size_bytes': (
+        'histogram', 'Size of the response body, in bytes.', SIZE_BUCKETS),
+    'fitme95_db_queries_per_request': (
+        'histogram', 'Number of SQL statements executed per request.', QUERY_COUNT_BUCKETS),
+    'fitme95_db_query_duration_seconds': (
+        'histogram', 'Total time spent in SQL statements per request, in seconds.', LATENCY_BUCKETS),
+    'fitme95_db_connections_total': (
+        'counter', 'Database connections set up by Django (pool checkouts when pooling is on), by alias.', None),
+    'fitme95_jobs_total': (
+        'counter', 'Background job attempts by task and resulting status.', None),
+    'fitme95_single_flight_requests_total': (
+        'counter', 'Coalesced GETs by route; followers were answered from a leader\'s response.', None),
+    'fitme95_admission_rejected_total': (
+        'counter', 'Requests shed with 503 by route class and reason (in_flight or queue_wait).', None),
+    'fitme95_request_queue_wait_seconds': (
+        'histogram', 'Time between the proxy receiving a request and the app starting it, in seconds.', LATENCY_BUCKETS),
+}
+
+
+class MetricsRegistry:
+    """
+    Per-process metric store.
+
+    When ``settings.METRICS_DIR`` is set, every process periodically dumps its samples to
+    ``<METRICS_DIR>/metrics-<pid>.json`` and a scrape merges all files, so the totals cover
+    every gunicorn worker regardless of which one answers ``/metrics``.
+    """
+
+    flush_interval = 1.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._collectors = []
+        self.reset()
+
+    def reset(self):
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._last_flush = 0.0
+
+    def _after_fork(self):
+        # A forked worker must neither share locks nor report the parent's samples as its own.
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.reset()
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS_DIR', None)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] += amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[0][index] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def add_collector(self, collector):
+        """
+        Register a callable returning ``(name, labels, value)`` gauge samples computed at scrape time.
+        """
+        self._collectors.append(collector)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                'histograms': [
+                    [name, labels, list(buckets), total, count]
+                    for (name, labels), (buckets, total, count) in self._histograms.items()
+                ],
+            }
+
+    def maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        directory = self.directory
+        if not directory or not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_flush = time.monotonic()
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+            with os.fdopen(fd, 'w') as fh:
+                json.dump(self.snapshot(), fh)
+            os.replace(tmp_path, os.path.join(directory, f'metrics-{os.getpid()}.json'))
+        finally:
+            self._flush_lock.release()
+
+    def collect(self):
+        """
+        Return the merged counters and histograms of every process sharing the metrics directory.
+        """
+        directory = self.directory
+        if not directory:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            snapshots = []
+            for filename in os.listdir(directory):
+                if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                    continue
+                try:
+                    with open(os.path.join(directory, filename)) as fh:
+                        snapshots.append(json.load(fh))
+                except (OSError, ValueError):
+                    # The worker may be replacing its file right now; its samples show up next scrape
+                    continue
+
+        counters = defaultdict(float)
+        histograms = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                counters[(name, _label_key(labels))] += value
+            for name, labels, buckets, total, count in snapshot['histograms']:
+                key = (name, _label_key(labels))
+                merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+        return counters, histograms
+
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        counters, histograms = self.collect()
+        lines = []
+
+        for name, (metric_type, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            if metric_type == 'counter':
+                for (sample_name, labels), value in sorted(counters.items()):
+                    if sample_name == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+
+            for (sample_name, labels), (counts, total, count) in sorted(histograms.items()):
+                if sample_name != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    bucket_labels = labels + (('le', _format_value(bound)),)
+                    lines.append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+        gauges = defaultdict(list)
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                gauges[name].append((_label_key(labels), value))
+        for name, samples in gauges.items():
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in sorted(samples):
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _label_key(labels):
+    if isinstance(labels, dict):
+        labels = labels.items()
+    return tuple(sorted((str(key), str(value)) for key, value in labels))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+registry = MetricsRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry._after_fork)
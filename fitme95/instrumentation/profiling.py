@@ -0,0 +1,100 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import signing
+
+PROFILE_TOKEN_SALT = 'fitme95.profiling'
+
+
+def sign_profile_token(label):
+    """
+    Issue a value for the profiling header. ``label`` ends up in the profile file names.
+    """
+    return signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).sign(label)
+
+
+def unsign_profile_token(token):
+    """
+    Return the label of a valid, unexpired profiling token, or None.
+    """
+    try:
+        return signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+
+
+class CaptureLimiter:
+    """
+    Allow at most ``limit`` captures per minute in this process, one at a time.
+
+    Only one capture may run at once because a profiler hooks the interpreter, and newer
+    Pythons refuse to enable two of them concurrently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = threading.Lock()
+        self._window_start = 0.0
+        self._count = 0
+
+    def acquire(self, limit):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._window_start >= 60:
+                self._window_start = now
+                self._count = 0
+            if self._count >= limit or not self._running.acquire(blocking=False):
+                return False
+            self._count += 1
+            return True
+
+    def release(self):
+        self._running.release()
+
+
+limiter = CaptureLimiter()
+
+
+def write_capture(profiler, query_log, request, response, duration, label):
+    """
+    Dump the profile as ``<id>.prof`` (loadable with pstats/snakeviz) and the request's SQL
+    timeline as ``<id>.sql.json`` into ``settings.PROFILING_DIR``. Returns the capture id.
+    """
+    match = getattr(request, 'resolver_match', None)
+    route = match.view_name if match else 'unmatched'
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    capture_id = re.sub(r'[^\w.-]', '_', f'{stamp}-{route}-{label}-{os.getpid()}')
+
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(os.path.join(directory, f'{capture_id}.prof'))
+
+    timeline = {
+        'method': request.method,
+        'path': request.path,
+        'route': route,
+        'label': label,
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 3),
+        'query_count': query_log.count,
+        'query_time_ms': round(query_log.duration * 1000, 3),
+        'queries': [
+            {
+                'alias': query['alias'],
+                'start_ms': round(query['start'] * 1000, 3),
+                'duration_ms': round(query['duration'] * 1000, 3),
+                'sql': query['sql'],
+            }
+            for query in query_log.queries
+        ],
+    }
+    with open(os.path.join(directory, f'{capture_id}.sql.json'), 'w') as fh:
+        json.dump(timeline, fh, indent=2)
+    return capture_id
@@ -0,0 +1,107 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+class QueryTimer:
+    """
+    ``connection.execute_wrapper`` hook counting SQL statements and the time spent in them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class QueryLog(QueryTimer):
+    """
+    ``QueryTimer`` that also keeps every statement with its start offset and duration.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.started = time.perf_counter()
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            self.queries.append({
+                'sql': sql,
+                'alias': context['connection'].alias,
+                'start': start - self.started,
+                'duration': duration,
+            })
+
+    def repeated_shapes(self, threshold):
+        """
+        Return ``(shape, count)`` for every statement shape executed at least ``threshold`` times.
+        """
+        shapes = Counter(normalize_sql(query['sql']) for query in self.queries)
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+    def slow_queries(self, threshold):
+        return [query for query in self.queries if query['duration'] >= threshold]
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape, so queries differing only in their parameters compare equal.
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+@contextmanager
+def instrument_connections(*hooks):
+    """
+    Install the given execute wrappers on every database connection of the current thread.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            for hook in hooks:
+                stack.enter_context(connection.execute_wrapper(hook))
+        yield
+
+
+def query_budget(max_queries):
+    """
+    Declare the number of SQL statements a view may execute per request.
+
+    Apply it outermost (above ``@api_view``) so the attribute lands on the routed callable.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def declared_query_budget(view_func):
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view_func, 'view_class', None), 'query_budget', None)
+    return budget
@@ -0,0 +1,21 @@
+from .queries import normalize_sql
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin asserting that a request stayed within its view's declared ``query_budget``.
+
+    Relies on ``QueryInspectorMiddleware`` having recorded the request.
+    """
+
+    def assertWithinQueryBudget(self, response):
+        request = response.wsgi_request
+        view_name = request.resolver_match.view_name
+        budget = getattr(request, 'query_budget', None)
+        if budget is None:
+            self.fail(f"{view_name} does not declare a query budget")
+
+        log = request.query_log
+        if log.count > budget:
+            statements = '\n'.join(f"  {normalize_sql(query['sql'])}" for query in log.queries)
+            self.fail(f"{view_name} executed {log.count} queries, over its budget of {budget}:\n{statements}")
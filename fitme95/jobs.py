@@ -0,0 +1,223 @@
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .instrumentation.metrics import registry
+from .models.job import Job
+
+logger = logging.getLogger('fitme95.jobs')
+
+# task name -> Task
+tasks = {}
+
+
+class Task:
+    def __init__(self, func, name, max_attempts, concurrency):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, payload=None, **kwargs):
+        return enqueue(self.name, payload, **kwargs)
+
+
+def task(name=None, max_attempts=3, concurrency=None):
+    """
+    Register a function as a background task. It is called with the job's payload as keyword
+    arguments and its return value, which must be JSON serializable, is stored as the result.
+
+    ``concurrency`` caps how many jobs of this task run at once across all workers.
+    """
+    def register(func):
+        registered = Task(func, name or f'{func.__module__}.{func.__name__}', max_attempts, concurrency)
+        tasks[registered.name] = registered
+        return registered
+    return register
+
+
+def enqueue(task_name, payload=None, user=None, priority=0, run_after=None):
+    if task_name not in tasks:
+        raise KeyError(f"Unknown task {task_name!r}")
+    return Job.objects.create(
+        task=task_name,
+        payload=payload or {},
+        user=user,
+        priority=priority,
+        run_after=run_after or timezone.now(),
+        max_attempts=tasks[task_name].max_attempts,
+    )
+
+
+# Arbitrary key of the PostgreSQL advisory lock serializing claims while a task has a concurrency cap
+CLAIM_LOCK_KEY = 0x666d3935
+
+
+def _limits():
+    return {name: registered.concurrency for name, registered in tasks.items() if registered.concurrency}
+
+
+def _running(task_names):
+    return (
+        Job.objects.filter(status=Job.RUNNING, task__in=task_names)
+        .values('task').annotate(count=Count('id')).values_list('task', 'count')
+    )
+
+
+def _saturated_tasks(limits):
+    if not limits:
+        return []
+    return [name for name, count in _running(limits) if count >= limits[name]]
+
+
+def claim(worker_id):
+    """
+    Mark the next due job as running for ``worker_id``, count the attempt and return the job, or
+    None when idle.
+
+    PostgreSQL hands concurrent workers different rows with ``FOR UPDATE SKIP LOCKED``. Other
+    databases fall back to a conditional UPDATE on the status, retried when another worker won.
+    Either way the concurrency caps are checked while no other claim can commit.
+    """
+    limits = _limits()
+    candidates = (
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=timezone.now())
+        .order_by('-priority', 'run_after', 'id')
+    )
+    claimed = {'status': Job.RUNNING, 'locked_by': worker_id, 'locked_at': timezone.now()}
+
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            if limits:
+                # Otherwise two workers could both see a task's last free slot
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_xact_lock(%s)", [CLAIM_LOCK_KEY])
+            job = candidates.exclude(task__in=_saturated_tasks(limits)).select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            Job.objects.filter(pk=job.pk).update(attempts=F('attempts') + 1, **claimed)
+    else:
+        for job in candidates.exclude(task__in=_saturated_tasks(limits))[:10]:
+            # Opening with the write makes the database serialize this with every other claim, so the count
+            # below sees them all; over the cap, the claim is undone
+            with transaction.atomic():
+                if not Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(attempts=F('attempts') + 1, **claimed):
+                    continue
+                if job.task in limits and dict(_running([job.task]))[job.task] > limits[job.task]:
+                    transaction.set_rollback(True)
+                    continue
+            break
+        else:
+            return None
+
+    for field, value in claimed.items():
+        setattr(job, field, value)
+    job.attempts += 1
+    return job
+
+
+def requeue_abandoned():
+    """
+    Put back jobs whose worker has held them longer than ``JOB_LOCK_TIMEOUT_SECONDS``,
+    presumably because it died, or fail them once that was their last attempt. Returns the
+    number of jobs requeued or failed.
+    """
+    expired = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    abandoned = Job.objects.filter(status=Job.RUNNING, locked_at__lt=expired)
+    lost = list(abandoned.filter(attempts__gte=F('max_attempts')).values_list('pk', 'task'))
+    for pk, task_name in lost:
+        # A job that keeps killing its worker would otherwise be retried forever
+        if Job.objects.filter(pk=pk, status=Job.RUNNING, locked_at__lt=expired).update(
+            status=Job.FAILED, finished_at=timezone.now(), locked_by='', locked_at=None,
+            last_error="Worker lost the job on its last attempt",
+        ):
+            logger.error("Job %s #%s failed for good: its worker was lost on the last attempt", task_name, pk)
+            registry.inc('fitme95_jobs_total', {'task': task_name, 'status': Job.FAILED})
+    return len(lost) + abandoned.update(status=Job.QUEUED, locked_by='', locked_at=None)
+
+
+def run_job(job):
+    """
+    Execute a claimed job and record the outcome. A failure is retried with exponential
+    backoff until ``max_attempts`` is reached. The outcome is dropped when the job was requeued
+    meanwhile and another run owns it now.
+    """
+    owner = {'locked_by': job.locked_by, 'locked_at': job.locked_at}
+    registered = tasks.get(job.task)
+    try:
+        if registered is None:
+            raise KeyError(f"Unknown task {job.task!r}")
+        job.result = registered(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + timedelta(
+                seconds=settings.JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+            )
+            logger.warning("Job %s failed, retrying at %s", job, job.run_after)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+            logger.error("Job %s failed for good after %s attempts", job, job.attempts)
+    else:
+        job.status = Job.SUCCEEDED
+        job.last_error = ''
+        job.finished_at = timezone.now()
+
+    job.locked_by = ''
+    job.locked_at = None
+    fields = ['result', 'last_error', 'status', 'run_after', 'finished_at', 'locked_by', 'locked_at']
+    if not Job.objects.filter(pk=job.pk, **owner).update(**{field: getattr(job, field) for field in fields}):
+        logger.warning("Job %s ran past its lock and was requeued; dropping this run's outcome", job)
+        return job
+    registry.inc('fitme95_jobs_total', {'task': job.task, 'status': job.status})
+    registry.maybe_flush()
+    return job
+
+
+class Worker:
+    def __init__(self, worker_id=None, poll_interval=None):
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.stopping = False
+
+    def run(self, burst=False, max_jobs=None):
+        """
+        Process jobs until stopped. With ``burst`` return as soon as nothing is due.
+        Returns the number of jobs processed.
+        """
+        processed = 0
+        last_requeue = 0.0
+        while not self.stopping and (max_jobs is None or processed < max_jobs):
+            # Long-running workers must not keep a connection the server already dropped. Inside
+            # an atomic block (a worker run from a test) that would close the open transaction
+            if not connection.in_atomic_block:
+                close_old_connections()
+            if time.monotonic() - last_requeue >= settings.JOB_LOCK_TIMEOUT_SECONDS / 2:
+                requeue_abandoned()
+                last_requeue = time.monotonic()
+
+            job = claim(self.worker_id)
+            if job is None:
+                if burst:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            run_job(job)
+            processed += 1
+        return processed
+
+    def stop(self, *args):
+        self.stopping = True
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...archival import archive_measurements
+
+
+class Command(BaseCommand):
+    help = (
+        "Move measurements older than MEASUREMENT_ARCHIVE_AFTER_DAYS into the compact archive table. "
+        "Archived rows are still returned by the measurements endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Measurements moved per transaction")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        def progress(moved):
+            self.stdout.write(f"\r{moved} measurements archived", ending='')
+            self.stdout.flush()
+
+        moved = archive_measurements(batch_size=options['batch_size'], progress=progress)
+        if moved:
+            self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved} measurements older than {settings.MEASUREMENT_ARCHIVE_AFTER_DAYS} days"
+        ))
@@ -0,0 +1,72 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks.harness import (
+    SCENARIOS, compare_to_baseline, disposable_database, load_baseline, run_benchmark, save_baseline
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'benchmarks', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, drive every API route concurrently against a local server and "
+        "report latency percentiles, throughput and queries per request. Fails when results regress "
+        "against the stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--measurements-per-user', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=200, help="Requests per route")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--routes', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+        parser.add_argument(
+            '--tolerance', type=float, default=0.5,
+            help="Allowed relative p95 increase over the baseline before failing (0.5 = +50%%)"
+        )
+
+    def handle(self, *args, **options):
+        with disposable_database():
+            report = run_benchmark(
+                users=options['users'],
+                measurements_per_user=options['measurements_per_user'],
+                requests_per_route=options['requests'],
+                concurrency=options['concurrency'],
+                routes=options['routes'],
+            )
+
+        self.print_report(report)
+
+        parameters = {key: options[key] for key in ('users', 'measurements_per_user', 'requests', 'concurrency')}
+        if options['save_baseline']:
+            save_baseline(options['baseline'], report, parameters)
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+            return
+
+        if not os.path.exists(options['baseline']):
+            self.stdout.write("No baseline found; run with --save-baseline to create one")
+            return
+
+        baseline = load_baseline(options['baseline'])
+        if baseline.get('parameters') != parameters:
+            self.stderr.write(f"Warning: baseline was recorded with {baseline.get('parameters')}")
+        regressions = compare_to_baseline(report, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def print_report(self, report):
+        header = f"{'route':<22}{'reqs':>6}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for route, result in report.items():
+            queries = result['queries_per_request']
+            self.stdout.write(
+                f"{route:<22}{result['requests']:>6}{result['errors']:>8}{result['throughput_rps']:>10}"
+                f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+                f"{'-' if queries is None else queries:>8}"
+            )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from ...benchmarks.harness import Client, disposable_database, run_connection_churn, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure database connection churn: drive an authenticated route through a server with a "
+        "fixed number of threads once per CONN_MAX_AGE value and report connections opened and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--threads', type=int, default=4, help="Server threads, like gunicorn --threads")
+        parser.add_argument(
+            '--conn-max-age', type=int, nargs='+', default=[0, 60],
+            help="CONN_MAX_AGE values to compare (0 = new connection per request)"
+        )
+
+    def handle(self, *args, **options):
+        results = {}
+        with disposable_database():
+            clients = [Client(google_id) for google_id in seed(options['users'], 1)]
+            for conn_max_age in options['conn_max_age']:
+                results[conn_max_age] = run_connection_churn(
+                    clients,
+                    requests_count=options['requests'],
+                    concurrency=options['concurrency'],
+                    threads=options['threads'],
+                    conn_max_age=conn_max_age,
+                )
+
+        header = f"{'CONN_MAX_AGE':<14}{'reqs':>6}{'errors':>8}{'conns':>8}{'conn/req':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for conn_max_age, result in results.items():
+            self.stdout.write(
+                f"{conn_max_age:<14}{result['requests']:>6}{result['errors']:>8}{result['connections_opened']:>8}"
+                f"{result['connections_per_request']:>10}{result['throughput_rps']:>10}"
+                f"{result['p50_ms']:>10}{result['p95_ms']:>10}"
+            )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from ...benchmarks.harness import Client, disposable_database, run_overload, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Send more concurrent requests than a fixed pool of server threads can serve, with and without "
+        "admission control, and compare tail latency and the number of requests shed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--measurements-per-user', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--threads', type=int, default=2, help="Server threads, like gunicorn --threads")
+        parser.add_argument('--max-queue-ms', type=float, default=100, help="ADMISSION_MAX_QUEUE_SECONDS, in ms")
+
+    def handle(self, *args, **options):
+        with disposable_database():
+            clients = [Client(google_id) for google_id in seed(options['users'], options['measurements_per_user'])]
+            report = run_overload(
+                clients,
+                threads=options['threads'],
+                requests_count=options['requests'],
+                concurrency=options['concurrency'],
+                max_queue_seconds=options['max_queue_ms'] / 1000,
+            )
+
+        header = f"{'mode':<12}{'reqs':>6}{'shed':>6}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for mode, result in report.items():
+            self.stdout.write(
+                f"{mode:<12}{result['requests']:>6}{result['shed']:>6}{result['errors']:>8}{result['throughput_rps']:>10}"
+                f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+            )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from fitme95_api.server import WORKER_CLASSES
+
+from ...benchmarks.harness import Client, disposable_database, run_server_comparison, seed
+
+ROUTES = ['measurements', 'measurements/create', 'measurements/update', 'measurements/delete']
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn from gunicorn.conf.py once per worker class (sync, gthread, uvicorn) against a "
+        "throwaway database and compare latency and throughput on the measurement endpoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--worker-classes', nargs='+', choices=list(WORKER_CLASSES), default=list(WORKER_CLASSES))
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=4, help="Threads per gthread worker")
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--measurements-per-user', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=200, help="Requests per route")
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    def handle(self, *args, **options):
+        with disposable_database():
+            clients = [Client(google_id) for google_id in seed(options['users'], options['measurements_per_user'])]
+            report = run_server_comparison(
+                clients,
+                worker_classes=options['worker_classes'],
+                workers=options['workers'],
+                threads=options['threads'],
+                requests_per_route=options['requests'],
+                concurrency=options['concurrency'],
+                routes=ROUTES,
+            )
+
+        header = f"{'route':<22}{'workers':<10}{'reqs':>6}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for route in ROUTES:
+            for worker_class in options['worker_classes']:
+                result = report[(worker_class, route)]
+                self.stdout.write(
+                    f"{route:<22}{worker_class:<10}{result['requests']:>6}{result['errors']:>8}"
+                    f"{result['throughput_rps']:>10}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+                )
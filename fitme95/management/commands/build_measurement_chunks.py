@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from ...chunks import rebuild_chunks
+from ...models.user import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Pack every user's measurements into per-year chunks. Run it once after turning on "
+        "MEASUREMENT_CHUNKS; the API keeps the chunks up to date from then on."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only rebuild the chunks of this google id")
+
+    def handle(self, *args, **options):
+        users = CustomUser.objects.filter(Q(measurements__isnull=False) | Q(has_archived_measurements=True)).distinct()
+        if options['user']:
+            users = users.filter(pk=options['user'])
+
+        built = 0
+        for count, user in enumerate(users.iterator(), 1):
+            built += len(rebuild_chunks(user))
+            self.stdout.write(f"\r{count} users packed", ending='')
+            self.stdout.flush()
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f"Built {built} measurement chunks"))
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...openapi import generate_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema once and write it where `GET /openapi.json` serves it from. "
+        "Run it on every build so the file matches the deployed code."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Write the schema here instead of OPENAPI_SCHEMA_PATH")
+
+    def handle(self, *args, **options):
+        path = Path(options['output'] or settings.OPENAPI_SCHEMA_PATH)
+        content = generate_schema()
+        # Replace the file in one step so a running server never serves half a schema
+        partial = path.with_name(path.name + '.tmp')
+        partial.write_bytes(content)
+        partial.replace(path)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(content)} bytes of OpenAPI schema to {path}"))
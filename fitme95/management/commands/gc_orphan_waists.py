@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...purge import delete_orphaned_waists
+
+
+class Command(BaseCommand):
+    help = "Delete Waist rows that no measurement references any more, in small transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Waists deleted per transaction")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the orphans")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        count = delete_orphaned_waists(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"{count} orphaned waists")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Deleted {count} orphaned waists"))
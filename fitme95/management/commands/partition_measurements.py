@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from ...db.partitioning import INTERVALS, create_partitions, is_partitioned, partition_table
+from ...models.measurement import Measurement
+
+
+class Command(BaseCommand):
+    help = (
+        "PostgreSQL only: convert the measurement table to a table partitioned by date, or on an "
+        "already partitioned table create the partitions for the coming periods. Run it regularly "
+        "(e.g. monthly from cron) so new rows never fall into the default partition."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', choices=INTERVALS, default='month')
+        parser.add_argument('--ahead', type=int, default=3, help="Future intervals to create partitions for")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'postgresql':
+            raise CommandError("Measurement partitioning needs PostgreSQL")
+
+        table = Measurement._meta.db_table
+        days = 366 if options['interval'] == 'year' else 31
+        end = timezone.now() + timedelta(days=days * options['ahead'])
+
+        if is_partitioned(connection, table):
+            created = create_partitions(connection, table, options['interval'], timezone.now(), end)
+            self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions: {', '.join(created) or '-'}"))
+            return
+
+        self.stdout.write(f"Partitioning {table} by {options['interval']}; the table is locked while rows are copied")
+        partition_table(connection, Measurement, options['interval'], end)
+        self.stdout.write(self.style.SUCCESS(f"{table} is now partitioned"))
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...instrumentation.profiling import sign_profile_token
+
+
+class Command(BaseCommand):
+    help = "Issue a signed X-Fitme95-Profile header value that makes the server profile the request."
+
+    def add_arguments(self, parser):
+        parser.add_argument('label', help="Short tag included in the capture file names, e.g. a ticket id")
+
+    def handle(self, *args, **options):
+        token = sign_profile_token(options['label'])
+        self.stdout.write(f"X-Fitme95-Profile: {token}")
+        self.stderr.write(
+            f"Valid for {settings.PROFILING_TOKEN_MAX_AGE} seconds; captures are written to {settings.PROFILING_DIR}"
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...purge import delete_expired_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL_HOURS, in small transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Keys deleted per transaction")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        count = delete_expired_idempotency_keys(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired idempotency keys"))
@@ -0,0 +1,28 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from ...jobs import Worker, tasks
+
+
+class Command(BaseCommand):
+    help = "Process background jobs from the database queue. Run as many as needed; they never share a job."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help="Exit once no job is due")
+        parser.add_argument('--max-jobs', type=int, default=None, help="Exit after this many jobs")
+        parser.add_argument('--poll-interval', type=float, default=None, help="Seconds to sleep when idle")
+        parser.add_argument('--worker-id', default=None, help="Defaults to <hostname>:<pid>")
+
+    def handle(self, *args, **options):
+        worker = Worker(worker_id=options['worker_id'], poll_interval=options['poll_interval'])
+        # Finish the current job, then exit
+        previous = {signum: signal.signal(signum, worker.stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+
+        self.stdout.write(f"Worker {worker.worker_id} serving: {', '.join(sorted(tasks)) or 'no tasks registered'}")
+        try:
+            processed = worker.run(burst=options['burst'], max_jobs=options['max_jobs'])
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs"))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models.user import CustomUser
+from ...seeding import seed_fitness_data
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate users with profiles and plausible weight/body-fat/waist histories."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, required=True)
+        parser.add_argument('--measurements-per-user', type=int, required=True)
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Rows per INSERT and measurements per transaction"
+        )
+        parser.add_argument('--prefix', default='seed', help="google_id/email prefix of the generated users")
+        parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible data")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['measurements_per_user'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--users and --batch-size must be positive, --measurements-per-user not negative")
+        if CustomUser.objects.filter(google_id__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(f"Users with prefix '{options['prefix']}' already exist; pick another --prefix")
+
+        start = time.perf_counter()
+
+        def progress(users, measurements):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"\r{users} users, {measurements} measurements ({measurements / elapsed:,.0f} rows/s)", ending=''
+            )
+            self.stdout.flush()
+
+        seed_fitness_data(
+            users=options['users'],
+            measurements_per_user=options['measurements_per_user'],
+            batch_size=options['batch_size'],
+            prefix=options['prefix'],
+            seed=options['seed'],
+            progress=progress,
+        )
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - start:.1f}s"))
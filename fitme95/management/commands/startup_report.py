@@ -0,0 +1,45 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...startup import LAZY_MODULES, measure_boot
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the app in a fresh interpreter like a worker does and report the import cost per module "
+        "and per package. Fails when the boot exceeds --budget or pulls in a lazily imported module."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help="Modules to list, by cumulative import time")
+        parser.add_argument('--budget', type=float, help="Fail when imports take longer than this many milliseconds")
+
+    def handle(self, *args, **options):
+        seconds, modules, imports = measure_boot()
+        total_us = sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+
+        header = f"{'module':<56}{'self ms':>10}{'cumul. ms':>12}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, self_us, cumulative_us, _ in sorted(imports, key=lambda row: -row[2])[:options['limit']]:
+            self.stdout.write(f"{name:<56}{self_us / 1000:>10.1f}{cumulative_us / 1000:>12.1f}")
+
+        packages = defaultdict(int)
+        for name, self_us, _, _ in imports:
+            packages[name.split('.')[0]] += self_us
+        self.stdout.write('')
+        self.stdout.write(f"{'package':<56}{'ms':>10}")
+        self.stdout.write('-' * len(header))
+        for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:options['limit']]:
+            self.stdout.write(f"{package:<56}{self_us / 1000:>10.1f}")
+
+        self.stdout.write('')
+        self.stdout.write(f"{len(imports)} modules imported in {total_us / 1000:.1f} ms, boot took {seconds * 1000:.1f} ms")
+
+        eager = [module for module in LAZY_MODULES if module in modules]
+        if eager:
+            raise CommandError(f"Imported at boot although meant to be lazy: {', '.join(eager)}")
+        if options['budget'] is not None and total_us / 1000 > options['budget']:
+            raise CommandError(f"Imports took {total_us / 1000:.1f} ms, over the {options['budget']:.0f} ms budget")
+        self.stdout.write(self.style.SUCCESS("Within the startup budget"))
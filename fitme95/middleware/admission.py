@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework import status
+
+from ..instrumentation.metrics import registry
+from ..utils import fm_json_response
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def route_class(request):
+    if request.path in settings.ADMISSION_AUTH_PATHS:
+        return 'auth'
+    return 'read' if request.method in SAFE_METHODS else 'write'
+
+
+def queue_wait(request, now=None):
+    """
+    Seconds since the proxy received ``request``, from its ``X-Request-Start`` header, or None.
+    Proxies send seconds, milliseconds or microseconds since the epoch, optionally prefixed ``t=``.
+    """
+    header = request.headers.get('X-Request-Start', '')
+    try:
+        started = float(header.removeprefix('t='))
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max((now or time.time()) - started, 0.0)
+
+
+class AdmissionControlMiddleware:
+    """
+    Shed load before doing any work once this process is saturated: a request is answered 503
+    with ``Retry-After`` when it already waited in the server's queue for longer than
+    ``ADMISSION_MAX_QUEUE_SECONDS``, so it would likely time out anyway, or when its route class
+    already has ``ADMISSION_LIMITS`` requests in flight. Login and token refresh form a class of
+    their own, so slow token verification cannot take every worker thread.
+
+    Probes are answered by ProbeMiddleware ahead of this; ``ADMISSION_EXEMPT_PATHS`` are never shed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._lock = threading.Lock()
+        self.in_flight = defaultdict(int)
+
+    def __call__(self, request):
+        if request.path in settings.ADMISSION_EXEMPT_PATHS:
+            return self.get_response(request)
+
+        name = route_class(request)
+        wait = queue_wait(request)
+        if wait is not None:
+            registry.observe('fitme95_request_queue_wait_seconds', {'route_class': name}, wait)
+            if wait > settings.ADMISSION_MAX_QUEUE_SECONDS:
+                return self.reject(name, 'queue_wait')
+
+        limit = settings.ADMISSION_LIMITS.get(name, 0)
+        with self._lock:
+            admitted = not limit or self.in_flight[name] < limit
+            if admitted:
+                self.in_flight[name] += 1
+        if not admitted:
+            return self.reject(name, 'in_flight')
+        try:
+            return self.get_response(request)
+        finally:
+            with self._lock:
+                self.in_flight[name] -= 1
+
+    def reject(self, name, reason):
+        registry.inc('fitme95_admission_rejected_total', {'route_class': name, 'reason': reason})
+        response = fm_json_response(
+            status.HTTP_503_SERVICE_UNAVAILABLE, "Server is overloaded, try again shortly", error_code='overloaded'
+        )
+        response['Retry-After'] = str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+        # Counted above; logging every shed request would add I/O exactly when the process is overloaded
+        response._has_been_logged = True
+        return response
@@ -0,0 +1,128 @@
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..coalescing import flights
+from ..instrumentation.metrics import registry
+
+
+def token_user_id(request):
+    """
+    The user id of a request's access token, checked without touching the database, or None.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return AccessToken(raw_token).get(api_settings.USER_ID_CLAIM)
+    except TokenError:
+        return None
+
+
+def _shareable(response):
+    return response is not None and not response.streaming and response.status_code < 500
+
+
+def _copy(response):
+    # Every follower gets its own response object, since servers and middleware mutate them
+    return HttpResponse(response.content, status=response.status_code, headers=dict(response.headers))
+
+
+class SingleFlightMiddleware:
+    """
+    Concurrent identical GETs to ``@single_flight`` views share one run of the view and its
+    rendered response: the first request of a (user, path, query, Accept) key computes it, the
+    others wait for up to ``SINGLE_FLIGHT_TIMEOUT_SECONDS`` and get a copy. A user's writes stop
+    their reads from joining computations that started earlier, so nobody reads past their own write.
+
+    Works in threaded WSGI workers and under ASGI, where Django runs each request's sync code in
+    a thread of its own, and awaits the leader on the event loop when the chain below is async.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _flight(self, request):
+        """
+        Join the computation ``request`` may share and return ``(key, flight, is_leader)``, or None.
+        """
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if not getattr(match.func, 'single_flight', False):
+            return None
+        user_id = token_user_id(request)
+        if user_id is None:
+            return None
+        query = urlencode(sorted((key, value) for key, values in request.GET.lists() for value in values))
+        key = (user_id, request.method, request.path_info, query, request.META.get('HTTP_ACCEPT', ''))
+        flight, leader = flights.join(key)
+        role = 'leader' if leader else 'follower'
+        registry.inc('fitme95_single_flight_requests_total', {'route': match.view_name, 'role': role})
+        return key, flight, leader
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.method not in ('GET', 'HEAD'):
+            user_id = token_user_id(request)
+            # Forget before, so reads from now on start fresh, and after, for reads that started mid-write
+            flights.forget(user_id)
+            try:
+                return self.get_response(request)
+            finally:
+                flights.forget(user_id)
+
+        joined = self._flight(request)
+        if joined is None:
+            return self.get_response(request)
+        key, flight, leader = joined
+        if leader:
+            response = None
+            try:
+                response = self.get_response(request)
+                return response
+            finally:
+                flights.finish(key, flight, response if _shareable(response) else None)
+
+        response = flight.wait(settings.SINGLE_FLIGHT_TIMEOUT_SECONDS)
+        return self.get_response(request) if response is None else _copy(response)
+
+    async def __acall__(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            user_id = token_user_id(request)
+            flights.forget(user_id)
+            try:
+                return await self.get_response(request)
+            finally:
+                flights.forget(user_id)
+
+        joined = self._flight(request)
+        if joined is None:
+            return await self.get_response(request)
+        key, flight, leader = joined
+        if leader:
+            response = None
+            try:
+                response = await self.get_response(request)
+                return response
+            finally:
+                flights.finish(key, flight, response if _shareable(response) else None)
+
+        response = await flight.wait_async(settings.SINGLE_FLIGHT_TIMEOUT_SECONDS)
+        return await self.get_response(request) if response is None else _copy(response)
@@ -0,0 +1,45 @@
+import time
+
+from ..instrumentation.metrics import registry
+from ..instrumentation.queries import QueryTimer, instrument_connections
+
+
+class MetricsMiddleware:
+    """
+    Record latency, SQL usage, response size and status code of every request.
+
+    Samples are labelled with the resolved view name rather than the raw path, so the number
+    of series stays bounded no matter which ids clients put in the URL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with instrument_connections(timer):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        labels = {'method': request.method, 'route': route_name(request)}
+        registry.inc('fitme95_http_requests_total', dict(labels, status=response.status_code))
+        registry.observe('fitme95_http_request_duration_seconds', labels, duration)
+        registry.observe('fitme95_http_response_size_bytes', labels, response_size(response))
+        registry.observe('fitme95_db_queries_per_request', labels, timer.count)
+        registry.observe('fitme95_db_query_duration_seconds', labels, timer.duration)
+        registry.maybe_flush()
+        return response
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+def response_size(response):
+    if response.streaming:
+        return 0
+    return len(response.content)
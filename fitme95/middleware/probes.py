@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from .. import health
+
+
+class ProbeMiddleware:
+    """
+    Answer liveness and readiness probes before the rest of the middleware stack runs.
+
+    Liveness only proves the process serves requests and never touches the database.
+    Readiness checks every configured database and is cached for a short TTL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path in settings.LIVENESS_PATHS:
+            return HttpResponse(status=200)
+        if request.path == settings.READINESS_PATH:
+            result, cached = health.readiness.get()
+            return JsonResponse(dict(result, cached=cached), status=200 if result['status'] == 'ok' else 503)
+        return self.get_response(request)
@@ -0,0 +1,55 @@
+import cProfile
+import random
+import time
+
+from django.conf import settings
+
+from ..instrumentation import profiling
+from ..instrumentation.queries import QueryLog, instrument_connections
+
+
+class ProfilingMiddleware:
+    """
+    Run selected requests under cProfile and save the profile plus the SQL timeline.
+
+    A request is captured when it carries a valid signed ``X-Fitme95-Profile`` header (see
+    ``manage.py profile_token``) or, with ``PROFILING_ENABLED``, when it is randomly sampled at
+    ``PROFILING_SAMPLE_RATE``. Either way at most ``PROFILING_MAX_PER_MINUTE`` captures run per
+    process, so untraced requests only pay for a header lookup and a random draw.
+    """
+
+    header = 'HTTP_X_FITME95_PROFILE'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        label = self.capture_label(request)
+        if label is None or not profiling.limiter.acquire(settings.PROFILING_MAX_PER_MINUTE):
+            return self.get_response(request)
+
+        try:
+            profiler = cProfile.Profile()
+            query_log = QueryLog()
+            start = time.perf_counter()
+            with instrument_connections(query_log):
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            duration = time.perf_counter() - start
+            response['X-Fitme95-Profile-Id'] = profiling.write_capture(
+                profiler, query_log, request, response, duration, label
+            )
+            return response
+        finally:
+            profiling.limiter.release()
+
+    def capture_label(self, request):
+        token = request.META.get(self.header)
+        if token:
+            return profiling.unsign_profile_token(token)
+        if settings.PROFILING_ENABLED and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return 'sampled'
+        return None
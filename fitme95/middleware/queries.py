@@ -0,0 +1,47 @@
+import logging
+
+from django.conf import settings
+
+from ..instrumentation.queries import QueryLog, declared_query_budget, instrument_connections
+
+logger = logging.getLogger('fitme95.queries')
+
+
+class QueryInspectorMiddleware:
+    """
+    Log N+1 patterns, slow statements and query budget overruns, tagged with the view name.
+
+    The statement log and the view's declared budget stay on the request as ``query_log`` and
+    ``query_budget`` so tests can assert on them.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_log = QueryLog()
+        request.query_budget = None
+        with instrument_connections(request.query_log):
+            response = self.get_response(request)
+        self.inspect(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = declared_query_budget(view_func)
+
+    @staticmethod
+    def inspect(request):
+        log = request.query_log
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else request.path
+
+        for shape, count in log.repeated_shapes(settings.QUERY_REPEAT_THRESHOLD):
+            logger.warning("Possible N+1 in %s: statement executed %d times: %s", view_name, count, shape)
+
+        for query in log.slow_queries(settings.SLOW_QUERY_THRESHOLD_MS / 1000):
+            logger.warning("Slow query in %s (%.1f ms): %s", view_name, query['duration'] * 1000, query['sql'])
+
+        if request.query_budget is not None and log.count > request.query_budget:
+            logger.warning(
+                "%s executed %d queries, over its budget of %d", view_name, log.count, request.query_budget
+            )
@@ -0,0 +1,29 @@
+from ..db.routers import pin_to_primary, remember_write, unpin
+
+
+class ReplicaPinningMiddleware:
+    """
+    Keep reads of write requests on the primary and make the writer's next reads sticky.
+
+    Non-safe methods read from the primary for the whole request, so serializers re-reading what
+    was just saved see it. After a successful write by an authenticated user, that user's reads
+    stay on the primary for ``REPLICA_STICKY_SECONDS``.
+    """
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        is_write = request.method not in self.safe_methods
+        token = pin_to_primary(is_write)
+        try:
+            response = self.get_response(request)
+        finally:
+            unpin(token)
+
+        user = getattr(request, 'user', None)
+        if is_write and response.status_code < 400 and user is not None and user.is_authenticated:
+            remember_write(user.pk)
+        return response
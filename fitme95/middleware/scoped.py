@@ -0,0 +1,47 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BrowserMiddleware:
+    """
+    Run the cookie-based browser stack (``BROWSER_MIDDLEWARE``: sessions, CSRF, auth, messages,
+    clickjacking) only for requests under ``BROWSER_MIDDLEWARE_PATHS``, i.e. the admin. API calls
+    authenticate with JWTs through DRF and skip it entirely.
+
+    The wrapped middleware form a chain of their own below this one. Django only calls the
+    ``process_view`` hooks of middleware listed in ``MIDDLEWARE``, so this one forwards them, which
+    is where ``CsrfViewMiddleware`` rejects forged requests.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        browser_chain = get_response
+        middleware = []
+        for middleware_path in reversed(settings.BROWSER_MIDDLEWARE):
+            browser_chain = import_string(middleware_path)(browser_chain)
+            middleware.insert(0, browser_chain)
+        self.browser_chain = browser_chain
+        self.view_hooks = [instance.process_view for instance in middleware if hasattr(instance, 'process_view')]
+
+    def _is_browser_request(self, request):
+        return request.path_info.startswith(tuple(settings.BROWSER_MIDDLEWARE_PATHS))
+
+    def __call__(self, request):
+        if self._is_browser_request(request):
+            return self.browser_chain(request)
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self._is_browser_request(request):
+            return None
+        for process_view in self.view_hooks:
+            response = process_view(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+from fitme95.db.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('fitme95', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='measurement',
+            index=models.Index(fields=['user', 'date'], name='measurement_user_date_idx'),
+        ),
+    ]
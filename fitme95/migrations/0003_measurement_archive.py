@@ -0,0 +1,36 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitme95', '0002_measurement_user_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='has_archived_measurements',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='MeasurementArchive',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('body_weight', models.FloatField()),
+                ('body_fat', models.FloatField()),
+                ('chest', models.FloatField()),
+                ('waist', models.FloatField()),
+                ('waist_above_below', models.SmallIntegerField()),
+                ('date', models.DateTimeField()),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_measurements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='measurement_archive_user_idx')],
+            },
+        ),
+    ]
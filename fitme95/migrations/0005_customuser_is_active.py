@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitme95', '0004_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitme95', '0005_customuser_is_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='date_joined',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitme95', '0006_creation_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='measurement',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitme95', '0007_measurement_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=16)),
+                ('date', models.DateTimeField()),
+                ('value', models.FloatField()),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='metric_values', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'metric', 'date', 'value'], name='metric_value_series_idx')],
+            },
+        ),
+    ]
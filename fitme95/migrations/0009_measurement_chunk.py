@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitme95', '0008_metric_value'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeasurementChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.SmallIntegerField()),
+                ('stale', models.BooleanField(default=False)),
+                ('dates', models.BinaryField(default=b'')),
+                ('body_weight', models.BinaryField(default=b'')),
+                ('body_fat', models.BinaryField(default=b'')),
+                ('chest', models.BinaryField(default=b'')),
+                ('waist', models.BinaryField(default=b'')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='measurement_chunks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'year'), name='measurement_chunk_user_year')],
+            },
+        ),
+    ]
@@ -1 +1,5 @@
-from .user import CustomUser
\ No newline at end of file
+from .user import CustomUser
+from .user_profile import UserProfile
+from .measurement import Measurement, MeasurementArchive, MeasurementChunk, MetricValue, Waist
+from .job import Job
+from .idempotency import IdempotencyKey
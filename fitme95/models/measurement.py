@@ -1,6 +1,11 @@
 from django.db import models
 from django.conf import settings
 
+from .user_profile import MEASURABLE_ITEMS
+
+# Measurable items stored as series: those without a column on Measurement, so each value has a single home
+SERIES_METRICS = [item for item in MEASURABLE_ITEMS if item not in ("weight", "chest", "waist")]
+
 
 class Waist(models.Model):
     waist = models.FloatField()
@@ -15,7 +20,81 @@ class Measurement(models.Model):
     body_fat = models.FloatField()
     chest = models.FloatField()
     date = models.DateTimeField(auto_now_add=False)
+    # Bumped by every update; clients send back the version they read to detect conflicting edits
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Every read is "this user's measurements", usually ordered or bounded by date
+            models.Index(fields=['user', 'date'], name='measurement_user_date_idx'),
+        ]
 
     def delete(self, *args, **kwargs):
         self.waist.delete()
         super().delete(*args, **kwargs)
+
+
+class MeasurementArchive(models.Model):
+    """
+    Measurements older than ``settings.MEASUREMENT_ARCHIVE_AFTER_DAYS``, moved out of the hot
+    table by ``archive_measurements``. The waist is stored inline and the original id is kept.
+    """
+    id = models.IntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_measurements", db_index=False
+    )
+    body_weight = models.FloatField()
+    body_fat = models.FloatField()
+    chest = models.FloatField()
+    waist = models.FloatField()
+    waist_above_below = models.SmallIntegerField()
+    date = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='measurement_archive_user_idx'),
+        ]
+
+
+class MetricValue(models.Model):
+    """
+    One value of one metric at one moment. Stored narrow, one row per value, so any of
+    ``SERIES_METRICS`` can be tracked without a schema change.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="metric_values", db_index=False
+    )
+    metric = models.CharField(max_length=16)
+    date = models.DateTimeField()
+    value = models.FloatField()
+
+    class Meta:
+        indexes = [
+            # The metric comes before the date so a range read of one metric only touches that metric's
+            # rows; the trailing value lets every read be answered from the index alone
+            models.Index(fields=['user', 'metric', 'date', 'value'], name='metric_value_series_idx'),
+        ]
+
+
+class MeasurementChunk(models.Model):
+    """
+    One user's measurements of one UTC year, packed column by column: ``dates`` holds int64
+    microseconds since the epoch and every other column float64 values, in the same order.
+    Derived from ``Measurement`` and ``MeasurementArchive``, which stay the source of truth;
+    a ``stale`` chunk is rebuilt from them on its next read. See ``fitme95.chunks``.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="measurement_chunks", db_index=False
+    )
+    year = models.SmallIntegerField()
+    stale = models.BooleanField(default=False)
+    dates = models.BinaryField(default=b'')
+    body_weight = models.BinaryField(default=b'')
+    body_fat = models.BinaryField(default=b'')
+    chest = models.BinaryField(default=b'')
+    waist = models.BinaryField(default=b'')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'year'], name='measurement_chunk_user_year'),
+        ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin, Group, Permission
 from django.db import models
+from django.utils import timezone
 
 
 class CustomUserManager(BaseUserManager):
@@ -21,6 +22,12 @@ class CustomUser(AbstractBaseUser):
     email = models.EmailField(unique=True)
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
+    # Never updated after the insert; login's upsert compares it to tell new users apart
+    date_joined = models.DateTimeField(default=timezone.now)
+    # Cleared when the account is scheduled for deletion, which rejects all of the user's tokens
+    is_active = models.BooleanField(default=True)
+    # Set by archive_measurements; lets reads skip the archive table for everyone else
+    has_archived_measurements = models.BooleanField(default=False)
 
     objects = CustomUserManager()
 
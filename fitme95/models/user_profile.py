@@ -1,5 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+
+MEASURABLE_ITEMS = ["weight", "height", "chest", "waist", "hips", "thigh", "arm"]
 
 
 class UserProfile(models.Model):
@@ -18,3 +21,6 @@ class UserProfile(models.Model):
 
     # Selected Measurements
     measurable_items = models.JSONField(default=list)
+
+    # Never updated after the insert; onboarding's upsert compares it to tell new profiles apart
+    created_at = models.DateTimeField(default=timezone.now)
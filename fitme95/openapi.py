@@ -0,0 +1,87 @@
+import hashlib
+import os
+from functools import cache, lru_cache
+
+from django.conf import settings
+
+
+def api_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="FitMe95 API",
+        default_version='v1',
+        description="API documentation for FitMe95",
+    )
+
+
+def generate_schema():
+    """
+    Introspect every view and serializer and return the OpenAPI document as JSON bytes. Slow;
+    run it at build time through ``manage.py build_openapi_schema``, not per request.
+    """
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(api_info()).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+@lru_cache(maxsize=1)
+def _read(path, modified, size):
+    with open(path, 'rb') as artifact:
+        content = artifact.read()
+    return content, f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def load_schema():
+    """
+    The prebuilt document at ``OPENAPI_SCHEMA_PATH`` and its ETag, read once per build of the file.
+    Raises ``FileNotFoundError`` when it was never built.
+    """
+    path = str(settings.OPENAPI_SCHEMA_PATH)
+    stat = os.stat(path)
+    return _read(path, stat.st_mtime_ns, stat.st_size)
+
+
+def _ui_shell(renderer_class):
+    from django.http import HttpResponse
+    from django.template.loader import render_to_string
+    from django.utils.cache import patch_cache_control
+
+    def view(request, *args, **kwargs):
+        context = {'request': request}
+        renderer_class().set_context(context)
+        info = api_info()
+        # The generator fills in the version from the same private attribute
+        context.update(title=info.title, version=info._default_version)
+        response = HttpResponse(render_to_string(renderer_class.template, context, request))
+        patch_cache_control(response, public=True, max_age=settings.OPENAPI_CACHE_SECONDS)
+        return response
+    return view
+
+
+@cache
+def _schema_ui_view(renderer, live):
+    from drf_yasg.views import UI_RENDERERS
+
+    if live:
+        from drf_yasg.views import get_schema_view
+        from rest_framework import permissions
+
+        schema_view = get_schema_view(api_info(), public=True, permission_classes=(permissions.AllowAny,))
+        return schema_view.with_ui(renderer, cache_timeout=0)
+    return _ui_shell(UI_RENDERERS[renderer][0])
+
+
+def schema_ui(renderer, live):
+    """
+    The Swagger UI or ReDoc page. Unless ``live``, the page is the renderer's HTML shell, rendered
+    directly without a drf_yasg ``SchemaView``, which fetches the prebuilt document from ``SPEC_URL``;
+    the schema generator never runs. drf_yasg is imported on the first docs request rather than at
+    URLconf load.
+    """
+    def view(request, *args, **kwargs):
+        return _schema_ui_view(renderer, live)(request, *args, **kwargs)
+    view.csrf_exempt = True
+    return view
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models.idempotency import IdempotencyKey
+from .models.measurement import Measurement, MeasurementArchive, MetricValue, Waist
+from .models.user import CustomUser
+from .models.user_profile import UserProfile
+
+
+def _delete_in_batches(queryset, batch_size):
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            queryset.model.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+
+
+def purge_user(user_id, batch_size=1000):
+    """
+    Delete a user and everything they own, ``batch_size`` rows per transaction.
+
+    Deleting the user directly would cascade to all measurements in one long, locking
+    statement and orphan their waists, since a cascade never calls ``Measurement.delete``.
+    Safe to rerun after a crash. Returns the number of rows deleted per kind.
+    """
+    counts = {'measurements': 0}
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Measurement.objects.filter(user_id=user_id).order_by('id').values_list('id', 'waist_id')[:batch_size]
+            )
+            if not batch:
+                break
+            Measurement.objects.filter(id__in=[measurement_id for measurement_id, _ in batch]).delete()
+            Waist.objects.filter(id__in=[waist_id for _, waist_id in batch]).delete()
+        counts['measurements'] += len(batch)
+
+    counts['archived_measurements'] = _delete_in_batches(
+        MeasurementArchive.objects.filter(user_id=user_id), batch_size
+    )
+    counts['metric_values'] = _delete_in_batches(MetricValue.objects.filter(user_id=user_id), batch_size)
+    counts['idempotency_keys'] = _delete_in_batches(IdempotencyKey.objects.filter(user_id=user_id), batch_size)
+    with transaction.atomic():
+        counts['profiles'] = UserProfile.objects.filter(user_id=user_id).delete()[0]
+        counts['users'] = CustomUser.objects.filter(pk=user_id).delete()[1].get(CustomUser._meta.label, 0)
+    return counts
+
+
+def delete_orphaned_waists(batch_size=1000, dry_run=False):
+    """
+    Delete waists no measurement points to, left behind by bulk deletes and cascades.
+    Returns how many there were.
+    """
+    orphans = Waist.objects.filter(measurement__isnull=True)
+    if dry_run:
+        return orphans.count()
+    return _delete_in_batches(orphans, batch_size)
+
+
+def delete_expired_idempotency_keys(batch_size=1000):
+    """
+    Delete stored responses older than ``IDEMPOTENCY_KEY_TTL_HOURS``. Returns how many there were.
+    """
+    cutoff = timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    return _delete_in_batches(IdempotencyKey.objects.filter(created_at__lt=cutoff), batch_size)
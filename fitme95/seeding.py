@@ -0,0 +1,112 @@
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models.measurement import Measurement, Waist
+from .models.user import CustomUser
+from .models.user_profile import MEASURABLE_ITEMS, UserProfile
+
+
+def _profile(user, rng):
+    gender = rng.choice(['m', 'f'])
+    metric = rng.random() < 0.7
+    height = rng.gauss(178 if gender == 'm' else 165, 7)
+    optional_items = [item for item in MEASURABLE_ITEMS if item != 'weight']
+    return UserProfile(
+        user=user,
+        weight_unit='kg' if metric else 'lbs',
+        height_unit='cm' if metric else 'ft',
+        distance_unit='km' if metric else 'mi',
+        length_unit='cm' if metric else 'in',
+        weight=round(rng.gauss(82 if gender == 'm' else 68, 12), 1),
+        height=round(height, 1),
+        dob=f'{rng.randint(50, 99):02d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+        gender=gender,
+        measurable_items=['weight'] + rng.sample(optional_items, rng.randint(1, len(optional_items))),
+    )
+
+
+def _series(profile, count, end, rng):
+    """
+    Yield ``count`` (date, weight, body_fat, chest, waist, above_below) points going back in time
+    from ``end``: a slow random-walk trend with day-to-day noise, fat and girths tracking weight.
+    """
+    weight = profile.weight
+    body_fat = rng.uniform(10, 22) if profile.gender == 'm' else rng.uniform(18, 32)
+    chest = rng.gauss(100 if profile.gender == 'm' else 92, 6)
+    waist = rng.gauss(88 if profile.gender == 'm' else 76, 8)
+    trend = rng.gauss(0, 0.05)
+    date = end
+    for _ in range(count):
+        delta = trend + rng.gauss(0, 0.15)
+        weight = max(weight + delta, 35.0)
+        body_fat = min(max(body_fat + delta * 0.3 + rng.gauss(0, 0.1), 3.0), 60.0)
+        chest += delta * 0.4 + rng.gauss(0, 0.1)
+        waist += delta * 0.6 + rng.gauss(0, 0.15)
+        yield (
+            date,
+            round(weight + rng.gauss(0, 0.4), 1),
+            round(body_fat, 1),
+            round(chest, 1),
+            round(waist, 1),
+            rng.randint(0, 1),
+        )
+        date -= timedelta(days=rng.choice((1, 1, 1, 2, 3, 7)), minutes=rng.randint(-90, 90))
+
+
+def seed_fitness_data(users, measurements_per_user, batch_size=5000, prefix='seed', seed=None,
+                      email_domain='seed.fitme95.local', progress=None):
+    """
+    Bulk-insert ``users`` onboarded users with ``measurements_per_user`` measurements each.
+
+    Users are processed in chunks sized so that one chunk holds about ``batch_size``
+    measurements; every chunk is written by a handful of ``bulk_create`` calls inside a single
+    transaction. Returns the google ids of the created users.
+    """
+    rng = random.Random(seed)
+    end = timezone.now()
+    users_per_chunk = max(batch_size // max(measurements_per_user, 1), 1)
+    google_ids = []
+
+    for chunk_start in range(0, users, users_per_chunk):
+        chunk = range(chunk_start, min(chunk_start + users_per_chunk, users))
+        with transaction.atomic():
+            created = CustomUser.objects.bulk_create([
+                CustomUser(
+                    google_id=f'{prefix}-{i}',
+                    email=f'{prefix}-{i}@{email_domain}',
+                    first_name=rng.choice(['Alex', 'Sam', 'Jordan', 'Taylor', 'Chris', 'Robin', 'Kim']),
+                    last_name=rng.choice(['Smith', 'Garcia', 'Kumar', 'Chen', 'Novak', 'Okafor', 'Silva']),
+                )
+                for i in chunk
+            ], batch_size=batch_size)
+            profiles = UserProfile.objects.bulk_create(
+                [_profile(user, rng) for user in created], batch_size=batch_size
+            )
+
+            points = [
+                (profile.user, point)
+                for profile in profiles
+                for point in _series(profile, measurements_per_user, end, rng)
+            ]
+            waists = Waist.objects.bulk_create(
+                [Waist(waist=point[4], above_below=point[5]) for _, point in points], batch_size=batch_size
+            )
+            Measurement.objects.bulk_create([
+                Measurement(
+                    user=user,
+                    waist_id=waist.pk,
+                    date=point[0],
+                    body_weight=point[1],
+                    body_fat=point[2],
+                    chest=point[3],
+                )
+                for (user, point), waist in zip(points, waists)
+            ], batch_size=batch_size)
+
+        google_ids.extend(user.google_id for user in created)
+        if progress:
+            progress(len(google_ids), len(google_ids) * measurements_per_user)
+    return google_ids
@@ -0,0 +1,11 @@
+from rest_framework import serializers
+from ..models.job import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        # Tracebacks stay server side; clients only learn that the job failed
+        fields = ['id', 'task', 'status', 'priority', 'attempts', 'max_attempts', 'run_after', 'created_at',
+                  'finished_at', 'result']
+        read_only_fields = fields
@@ -1,5 +1,6 @@
+from django.db import transaction
 from rest_framework import serializers
-from ..models.measurement import Measurement, Waist
+from ..models.measurement import SERIES_METRICS, Measurement, MeasurementArchive, MetricValue, Waist
 
 
 class WaistSerializer(serializers.ModelSerializer):
@@ -14,25 +15,58 @@ class MeasurementSerializer(serializers.ModelSerializer):
     class Meta:
         model = Measurement
         fields = '__all__'
-        read_only_fields = ["user"]
+        read_only_fields = ["user", "version"]
 
     def create(self, validated_data):
         waist_data = validated_data.pop('waist')
         waist_instance = Waist.objects.create(**waist_data)
         return Measurement.objects.create(waist=waist_instance, **validated_data)
 
-    def update(self, instance, validated_data):
-        waist_data = validated_data.pop('waist', None)
-
-        # Update Waist if new data is provided
-        if waist_data:
-            waist = instance.waist
-            for key, value in waist_data.items():
-                setattr(waist, key, value)
-            waist.save()
-
-        # Update Measurement fields
-        for key, value in validated_data.items():
-            setattr(instance, key, value)
-        instance.save()
-        return instance
+
+class ArchivedMeasurementSerializer(serializers.ModelSerializer):
+    """
+    Read-only view of an archived measurement in the same shape as ``MeasurementSerializer``.
+    """
+    waist = serializers.SerializerMethodField()
+    version = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MeasurementArchive
+        fields = ['id', 'waist', 'body_weight', 'body_fat', 'chest', 'date', 'version', 'user']
+        read_only_fields = fields
+
+    def get_waist(self, instance):
+        # The waist row is gone once archived, so it has no id of its own
+        return {'id': None, 'waist': instance.waist, 'above_below': instance.waist_above_below}
+
+    def get_version(self, instance):
+        # Archived measurements cannot be edited
+        return None
+
+
+class MetricValuesSerializer(serializers.Serializer):
+    """
+    Values of any of ``SERIES_METRICS`` taken at one moment, e.g. ``{"hips": 98.0, "arm": 33.5}``.
+    """
+    date = serializers.DateTimeField()
+    values = serializers.DictField(child=serializers.FloatField(), allow_empty=False)
+
+    @staticmethod
+    def validate_values(value):
+        invalid_metrics = [metric for metric in value if metric not in SERIES_METRICS]
+        if invalid_metrics:
+            raise serializers.ValidationError(
+                f"Invalid metrics: {', '.join(invalid_metrics)}. Must be from: {', '.join(SERIES_METRICS)}")
+        return value
+
+    def create(self, validated_data):
+        user = validated_data['user']
+        date = validated_data['date']
+        values = validated_data['values']
+        # Recording a metric again at the same moment replaces the earlier value
+        with transaction.atomic():
+            MetricValue.objects.filter(user=user, metric__in=values, date=date).delete()
+            MetricValue.objects.bulk_create([
+                MetricValue(user=user, metric=metric, date=date, value=value) for metric, value in values.items()
+            ])
+        return validated_data
@@ -1,20 +1,19 @@
 from rest_framework import serializers
-from ..models.user_profile import UserProfile
+from ..models.user_profile import UserProfile, MEASURABLE_ITEMS
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserProfile
-        fields = '__all__'
+        exclude = ['created_at']
         read_only_fields = ('user',)
 
     @staticmethod
     def validate_measurable_items(value):
         if not isinstance(value, list):
             raise serializers.ValidationError("Measurable items must be a list")
-        valid_items = ["weight", "height", "chest", "waist", "hips", "thigh", "arm"]
-        invalid_items = [item for item in value if item not in valid_items]
+        invalid_items = [item for item in value if item not in MEASURABLE_ITEMS]
         if invalid_items:
             raise serializers.ValidationError(
-                f"Invalid measurable items: {', '.join(invalid_items)}. Must be from: {', '.join(valid_items)}")
+                f"Invalid measurable items: {', '.join(invalid_items)}. Must be from: {', '.join(MEASURABLE_ITEMS)}")
         return value
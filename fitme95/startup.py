@@ -0,0 +1,83 @@
+import gc
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.db import connections
+
+# Imported on first use instead of at worker boot; ``warm_up`` loads them ahead of a fork
+LAZY_MODULES = [
+    'google.auth.transport.requests',
+    'google.oauth2.id_token',
+    'drf_yasg.views',
+]
+
+# Boots the app the way a worker does and reports what it loaded; run with ``-X importtime``
+BOOT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+# A plain import, unlike the resolver's import_module, shows up in the -X importtime output
+__import__(settings.ROOT_URLCONF)
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({'seconds': time.perf_counter() - start, 'modules': sorted(sys.modules)}))
+"""
+
+
+def measure_boot():
+    """
+    Boot the app in a fresh interpreter and return ``(seconds, modules, imports)``: the wall time,
+    the modules loaded and, for every import, ``(module, self_us, cumulative_us, depth)`` in import order.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'fitme95_api.settings'))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+        capture_output=True, text=True, env=env, cwd=settings.BASE_DIR, check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        stripped = name.lstrip()
+        imports.append((stripped, int(self_us), int(cumulative_us), (len(name) - len(stripped) - 1) // 2))
+    report = json.loads(result.stdout.splitlines()[-1])
+    return report['seconds'], set(report['modules']), imports
+
+
+def warm_up():
+    """
+    Do in the gunicorn master what workers would otherwise each do on their first requests:
+    import the lazily imported modules, build the URL resolver and docs views and read the schema.
+    """
+    from django.urls import get_resolver
+
+    from .openapi import _schema_ui_view, load_schema
+
+    for module in LAZY_MODULES:
+        importlib.import_module(module)
+    get_resolver().url_patterns
+    for renderer in ('swagger', 'redoc'):
+        _schema_ui_view(renderer, settings.OPENAPI_LIVE_SCHEMA)
+    try:
+        load_schema()
+    except FileNotFoundError:
+        pass
+
+
+def prepare_preloaded_master():
+    """
+    Ready a ``preload_app`` master for forking: warm everything up, drop database connections
+    (a socket shared by several workers corrupts their sessions) and freeze the heap so that
+    the garbage collector in workers does not write to, and so copy, the pages they share.
+    """
+    warm_up()
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
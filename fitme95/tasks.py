@@ -0,0 +1,18 @@
+from .chunks import rebuild_chunks
+from .jobs import task
+from .models.user import CustomUser
+from .purge import purge_user
+
+
+@task(name='purge_user', max_attempts=5, concurrency=2)
+def purge_user_task(user_id):
+    return purge_user(user_id)
+
+
+@task(name='rebuild_chunks', max_attempts=5)
+def rebuild_chunks_task(user_id, years=None):
+    user = CustomUser.objects.filter(pk=user_id).first()
+    if user is None:
+        # Deleted since, together with its chunks
+        return 0
+    return len(rebuild_chunks(user, years))
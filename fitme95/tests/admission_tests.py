@@ -0,0 +1,55 @@
+import time
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..middleware.admission import AdmissionControlMiddleware, queue_wait
+from ..models.user import CustomUser
+
+
+class QueueWaitTest(SimpleTestCase):
+    def test_units(self):
+        factory = RequestFactory()
+        for header in ('t=1700000000.5', '1700000000500', 't=1700000000500000'):
+            request = factory.get('/measurements', headers={'X-Request-Start': header})
+            self.assertAlmostEqual(queue_wait(request, now=1700000001.0), 0.5)
+        self.assertIsNone(queue_wait(factory.get('/measurements')))
+        self.assertIsNone(queue_wait(factory.get('/measurements', headers={'X-Request-Start': 'soon'})))
+
+
+class AdmissionControlTest(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(google_id="admission_google_id", email="admission@example.com")
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    # Test that a request which queued too long is shed before any work is done
+    def test_sheds_after_queue_wait(self):
+        stale = {'X-Request-Start': f't={time.time() - 60:.3f}', **self.headers}
+        response = self.client.get(reverse('get_measurements'), headers=stale)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response.json()['status']['errorCode'], 'overloaded')
+
+        fresh = {'X-Request-Start': f't={time.time():.3f}', **self.headers}
+        self.assertEqual(self.client.get(reverse('get_measurements'), headers=fresh).status_code, 200)
+
+    # Test that probes and metrics are never shed
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_probes_bypass(self):
+        stale = {'X-Request-Start': f't={time.time() - 60:.3f}', 'Authorization': 'Bearer scrape-token'}
+        self.assertEqual(self.client.get('/livez', headers=stale).status_code, 200)
+        self.assertEqual(self.client.get(reverse('metrics'), headers=stale).status_code, 200)
+
+    # Test that logins beyond the auth class limit are rejected while other classes still run
+    def test_in_flight_limit(self):
+        middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+        factory = RequestFactory()
+        middleware.in_flight['auth'] = 2
+        self.assertEqual(middleware(factory.post('/login')).status_code, 503)
+        self.assertEqual(middleware(factory.get('/measurements')).status_code, 200)
+
+        middleware.in_flight['auth'] = 1
+        self.assertEqual(middleware(factory.post('/login')).status_code, 200)
+        self.assertEqual(middleware.in_flight['auth'], 1)
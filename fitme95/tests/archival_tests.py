@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..archival import archive_measurements
+from ..db.partitioning import create_partitions, is_partitioned, partition_ranges
+from ..instrumentation.testing import QueryBudgetMixin
+from ..models.measurement import Measurement, MeasurementArchive, Waist
+from ..models.user import CustomUser
+
+
+@override_settings(MEASUREMENT_ARCHIVE_AFTER_DAYS=365)
+class ArchiveMeasurementsTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(google_id="archive_google_id", email="archive@example.com")
+        self.other_user = CustomUser.objects.create_user(google_id="other_google_id", email="other@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+        now = timezone.now()
+        self.old = [self.measure(self.user, now - timedelta(days=days), 90.0 - i) for i, days in enumerate((800, 400))]
+        self.recent = [self.measure(self.user, now - timedelta(days=days), 80.0 - i) for i, days in enumerate((30, 1))]
+        self.measure(self.other_user, now - timedelta(days=500), 60.0)
+
+    def measure(self, user, date, weight):
+        return Measurement.objects.create(
+            user=user,
+            body_weight=weight,
+            body_fat=20.0,
+            chest=100.0,
+            waist=Waist.objects.create(waist=weight, above_below=1),
+            date=date
+        )
+
+    def weights(self, **params):
+        response = self.client.get(reverse('get_measurements'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
+        return [measurement['body_weight'] for measurement in response.data['data']['measurements']]
+
+    # Test that old measurements move to the archive together with their waist
+    def test_archive_moves_old_rows(self):
+        self.assertEqual(archive_measurements(batch_size=2), 3)
+        self.assertEqual(Measurement.objects.count(), 2)
+        self.assertEqual(Waist.objects.count(), 2)
+        self.assertEqual(MeasurementArchive.objects.count(), 3)
+
+        archived = MeasurementArchive.objects.get(id=self.old[0].id)
+        self.assertEqual((archived.user_id, archived.waist, archived.waist_above_below), (self.user.pk, 90.0, 1))
+        self.assertEqual(archived.date, self.old[0].date)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.has_archived_measurements)
+        self.assertEqual(archive_measurements(), 0)
+
+    # Test that reads return archived and hot rows in their original order and shape
+    def test_reads_include_archive(self):
+        before = self.client.get(reverse('get_measurements')).data['data']['measurements']
+        archive_measurements()
+        after = self.client.get(reverse('get_measurements')).data['data']['measurements']
+
+        self.assertEqual([m['id'] for m in after], [m['id'] for m in before])
+        self.assertEqual([m['body_weight'] for m in after], [90.0, 89.0, 80.0, 79.0])
+        self.assertEqual(after[0]['waist'], {'id': None, 'waist': 90.0, 'above_below': 1})
+        self.assertEqual(list(after[0]), list(before[0]))
+
+    # Test that date bounds apply to both tables and recent ranges skip the archive
+    def test_date_bounds(self):
+        archive_measurements()
+        now = timezone.now()
+        self.assertEqual(self.weights(**{'from': (now - timedelta(days=500)).isoformat()}), [89.0, 80.0, 79.0])
+        self.assertEqual(self.weights(to=(now - timedelta(days=100)).date().isoformat()), [90.0, 89.0])
+        with self.assertNumQueries(2):
+            self.assertEqual(self.weights(**{'from': (now - timedelta(days=60)).date().isoformat()}), [80.0, 79.0])
+
+    # Test that users without archived rows never query the archive
+    def test_users_without_archive_skip_it(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.weights(), [90.0, 89.0, 80.0, 79.0])
+
+    # Test that malformed bounds are rejected
+    def test_invalid_bounds(self):
+        response = self.client.get(reverse('get_measurements'), {'from': 'last tuesday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Test that archived measurements can still be deleted by id
+    def test_delete_archived(self):
+        archive_measurements()
+        response = self.client.delete(reverse('delete_measurement', args=[self.old[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(MeasurementArchive.objects.filter(id=self.old[0].id).exists())
+
+        other_id = MeasurementArchive.objects.get(user=self.other_user).id
+        response = self.client.delete(reverse('delete_measurement', args=[other_id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    # Test the management command
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_measurements', stdout=out)
+        self.assertIn('Archived 3 measurements older than 365 days', out.getvalue())
+
+
+class PartitioningTest(SimpleTestCase):
+    # Test that monthly ranges are aligned and roll over the year
+    def test_monthly_ranges(self):
+        ranges = list(partition_ranges(
+            'fitme95_measurement', 'month',
+            datetime(2024, 11, 17, tzinfo=dt_timezone.utc), datetime(2025, 1, 3, tzinfo=dt_timezone.utc)
+        ))
+        self.assertEqual([name for name, _, _ in ranges], [
+            'fitme95_measurement_p2024_11', 'fitme95_measurement_p2024_12', 'fitme95_measurement_p2025_01'
+        ])
+        self.assertEqual(ranges[1][1:], (
+            datetime(2024, 12, 1, tzinfo=dt_timezone.utc), datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        ))
+
+    # Test yearly ranges
+    def test_yearly_ranges(self):
+        ranges = list(partition_ranges(
+            'fitme95_measurement', 'year',
+            datetime(2023, 6, 1, tzinfo=dt_timezone.utc), datetime(2024, 2, 1, tzinfo=dt_timezone.utc)
+        ))
+        self.assertEqual([name for name, _, _ in ranges], ['fitme95_measurement_p2023', 'fitme95_measurement_p2024'])
+
+    # Test that the command refuses to run on other databases
+    def test_command_needs_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command('partition_measurements', stdout=StringIO())
+
+
+@skipUnless(connection.vendor == 'postgresql', "Partitioning needs PostgreSQL")
+class PartitionTableTest(TransactionTestCase):
+    # Test that the measurement table is rebuilt partitioned with its rows, keys and id sequence intact
+    def test_partition_table(self):
+        user = CustomUser.objects.create_user(google_id="partition_google_id", email="partition@example.com")
+        now = timezone.now()
+        old = [
+            Measurement.objects.create(
+                user=user, body_weight=80.0, body_fat=20.0, chest=100.0,
+                waist=Waist.objects.create(waist=90.0, above_below=1), date=now - timedelta(days=days)
+            )
+            for days in (0, 40, 400)
+        ]
+
+        call_command('partition_measurements', interval='month', ahead=1, stdout=StringIO())
+
+        self.assertTrue(is_partitioned(connection, Measurement._meta.db_table))
+        self.assertEqual(sorted(Measurement.objects.filter(user=user).values_list('id', flat=True)),
+                         sorted(measurement.id for measurement in old))
+        created = Measurement.objects.create(
+            user=user, body_weight=79.0, body_fat=19.0, chest=99.0,
+            waist=Waist.objects.create(waist=89.0, above_below=1), date=now
+        )
+        self.assertGreater(created.id, max(measurement.id for measurement in old))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT confrelid::regclass::text FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                [Measurement._meta.db_table]
+            )
+            self.assertEqual(sorted(row[0] for row in cursor.fetchall()), ['fitme95_customuser', 'fitme95_waist'])
+
+        # Running it again only adds the partitions for the coming months
+        out = StringIO()
+        call_command('partition_measurements', interval='month', ahead=2, stdout=out)
+        self.assertRegex(out.getvalue(), r'Created [12] partitions')
+
+    # Test that rows that landed in the default partition move into the partition created for them
+    def test_create_partition_moves_default_rows(self):
+        user = CustomUser.objects.create_user(google_id="default_google_id", email="default@example.com")
+        now = timezone.now()
+        call_command('partition_measurements', interval='month', ahead=1, stdout=StringIO())
+        ahead = Measurement.objects.create(
+            user=user, body_weight=80.0, body_fat=20.0, chest=100.0,
+            waist=Waist.objects.create(waist=90.0, above_below=1), date=now + timedelta(days=150)
+        )
+        table = Measurement._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT tableoid::regclass::text FROM {table} WHERE id = %s", [ahead.id])
+            self.assertEqual(cursor.fetchone()[0], f'{table}_default')
+
+        created = create_partitions(connection, table, 'month', now, now + timedelta(days=150))
+        self.assertIn(f'{table}_p{ahead.date:%Y_%m}', created)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT tableoid::regclass::text FROM {table} WHERE id = %s", [ahead.id])
+            self.assertEqual(cursor.fetchone()[0], f'{table}_p{ahead.date:%Y_%m}')
+        self.assertEqual(Measurement.objects.filter(user=user).count(), 1)
@@ -6,6 +6,7 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from unittest.mock import patch
 from ..models.user_profile import UserProfile
+from ..throttling import get_store
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
 from rest_framework_simplejwt.views import TokenRefreshView
 
@@ -14,6 +15,9 @@ User = get_user_model()
 
 class AuthViewsTest(APITestCase):
     def setUp(self):
+        # Every login and refresh here is the same account, which the throttles count across tests
+        get_store().clear()
+        self.addCleanup(get_store().clear)
         self.client = APIClient()
         self.user = User.objects.create_user(
             google_id="test_google_id",
@@ -60,6 +64,21 @@ class AuthViewsTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['data']['user']['email'], 'test@example.com')
 
+    # Test that logging in refreshes a changed name and email
+    @patch('google.oauth2.id_token.verify_firebase_token')
+    def test_google_login_updates_user_details(self, mock_verify_firebase_token):
+        mock_verify_firebase_token.return_value = dict(
+            self.valid_token_payload, email='renamed@example.com', given_name='Renamed', family_name='Person'
+        )
+        response = self.client.post(self.login, {'id': 'fake_token'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(
+            (self.user.email, self.user.first_name, self.user.last_name),
+            ('renamed@example.com', 'Renamed', 'Person')
+        )
+        self.assertEqual(User.objects.count(), 1)
+
     # Test login with existing user that has a profile
     @patch('google.oauth2.id_token.verify_firebase_token')
     def test_google_login_success_with_profile(self, mock_verify_firebase_token):
@@ -0,0 +1,62 @@
+from django.test import SimpleTestCase, TransactionTestCase
+
+from ..benchmarks.harness import SCENARIOS, compare_to_baseline, load_baseline, percentile, run_benchmark
+from ..management.commands.benchmark import DEFAULT_BASELINE
+
+
+class BenchmarkHarnessTest(TransactionTestCase):
+    # Test that a small run drives the local server and reports every metric
+    def test_run_benchmark(self):
+        report = run_benchmark(
+            users=2, measurements_per_user=3, requests_per_route=4, concurrency=2,
+            routes=['login', 'user-info', 'measurements'],
+        )
+        self.assertEqual(list(report), ['login', 'user-info', 'measurements'])
+        for result in report.values():
+            self.assertEqual(result['requests'], 4)
+            self.assertEqual(result['errors'], 0)
+            self.assertGreater(result['throughput_rps'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(report['measurements']['queries_per_request'], 2)
+
+    # Test that the stored baseline still matches every route's queries per request, so a change to a
+    # route's queries has to re-record it (`manage.py benchmark --save-baseline`) or the gate goes blind
+    def test_baseline_query_counts(self):
+        baseline = load_baseline(DEFAULT_BASELINE)['routes']
+        self.assertEqual(sorted(baseline), sorted(SCENARIOS))
+        report = run_benchmark(users=2, measurements_per_user=3, requests_per_route=4, concurrency=2)
+        for route, result in report.items():
+            self.assertEqual(result['errors'], 0, route)
+            self.assertEqual(result['queries_per_request'], baseline[route]['queries_per_request'], route)
+
+
+class BaselineComparisonTest(SimpleTestCase):
+    def setUp(self):
+        self.baseline = {'routes': {
+            'measurements': {'p95_ms': 10.0, 'queries_per_request': 2.0, 'errors': 0},
+        }}
+
+    def result(self, **overrides):
+        return {'measurements': dict({'p95_ms': 10.0, 'queries_per_request': 2.0, 'errors': 0}, **overrides)}
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_within_tolerance(self):
+        self.assertEqual(compare_to_baseline(self.result(p95_ms=16.0), self.baseline, tolerance=0.5), [])
+
+    def test_latency_regression(self):
+        regressions = compare_to_baseline(self.result(p95_ms=25.0), self.baseline, tolerance=0.5)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('p95', regressions[0])
+
+    def test_query_regression(self):
+        regressions = compare_to_baseline(self.result(queries_per_request=12.0), self.baseline, tolerance=0.5)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('queries per request', regressions[0])
+
+    def test_error_regression(self):
+        self.assertEqual(len(compare_to_baseline(self.result(errors=3), self.baseline, tolerance=0.5)), 1)
@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..chunks import from_micros, pack, to_micros, unpack
+from ..instrumentation.testing import QueryBudgetMixin
+from ..jobs import Worker
+from ..models.measurement import Measurement, MeasurementArchive, MeasurementChunk, Waist
+from ..models.user import CustomUser
+
+
+class PackingTest(SimpleTestCase):
+    # Test that packed columns round-trip and decode without copying
+    def test_round_trip(self):
+        moment = datetime(2024, 3, 1, 8, 30, 0, 123456, tzinfo=dt_timezone.utc)
+        packed = pack([(to_micros(moment), 80.5, 20.0, 100.0, 90.0), (to_micros(moment) + 1, 80.0, 19.5, 99.5, 89.5)])
+        columns = unpack(packed)
+
+        self.assertEqual(from_micros(columns['dates'][0]), moment)
+        self.assertEqual(list(columns['body_weight']), [80.5, 80.0])
+        self.assertEqual(len(packed['waist']), 16)
+        self.assertIs(columns['waist'].obj, packed['waist'])
+
+
+@override_settings(MEASUREMENT_CHUNKS=True)
+class MeasurementChunkTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(google_id="chunk_google_id", email="chunk@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.start = datetime(2023, 12, 25, 12, tzinfo=dt_timezone.utc)
+        for day in range(14):
+            Measurement.objects.create(
+                user=self.user, body_weight=80.0 - day * 0.1, body_fat=20.0, chest=100.0,
+                waist=Waist.objects.create(waist=90.0, above_below=1), date=self.start + timedelta(days=day)
+            )
+
+    def history(self, days=7):
+        response = self.client.get(reverse('get_measurement_history'), {'days': days})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def chunk(self, year):
+        return MeasurementChunk.objects.get(user=self.user, year=year)
+
+    def create(self, date, body_weight=70.0, queries=None):
+        data = {
+            "body_weight": body_weight, "body_fat": 15.0, "chest": 95.0,
+            "waist": {"waist": 80.0, "above_below": 1}, "date": date.isoformat()
+        }
+        if queries is None:
+            response = self.client.post(reverse('create_measurement'), data, format='json')
+            self.assertWithinQueryBudget(response)
+        else:
+            with self.assertNumQueries(queries):
+                response = self.client.post(reverse('create_measurement'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['data']['measurement']['id']
+
+    def count(self):
+        return sum(bucket['count'] for bucket in self.history().data['data']['measurements'])
+
+    # Test that the backfill packs one chunk per year and the history reads the same either way
+    def test_build_and_read_chunks(self):
+        from_rows = self.history().data['data']['measurements']
+        call_command('build_measurement_chunks', stdout=StringIO())
+
+        self.assertEqual(len(unpack_chunk(self.chunk(2023))['dates']), 7)
+        self.assertEqual(len(unpack_chunk(self.chunk(2024))['dates']), 7)
+        response = self.history()
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(response.data['data']['measurements'], from_rows)
+        self.assertEqual(sum(bucket['count'] for bucket in from_rows), 14)
+
+    # Test that a new measurement is appended to its year's chunk
+    def test_create_appends(self):
+        call_command('build_measurement_chunks', stdout=StringIO())
+        self.create(self.start + timedelta(days=20), body_weight=60.0)
+
+        columns = unpack_chunk(self.chunk(2024))
+        self.assertEqual(len(columns['dates']), 8)
+        self.assertEqual(columns['body_weight'][-1], 60.0)
+        self.assertFalse(self.chunk(2024).stale)
+
+    # Test that the first measurement of a new year starts that year's chunk, packed by a job
+    def test_create_starts_new_year(self):
+        call_command('build_measurement_chunks', stdout=StringIO())
+        # Once a year, so over the budget: starting the chunk in a savepoint and queueing its job
+        self.create(datetime(2025, 6, 1, tzinfo=dt_timezone.utc), queries=10)
+        self.assertTrue(self.chunk(2025).stale)
+        self.assertEqual(self.count(), 15)
+
+        Worker('w1').run(burst=True)
+        self.assertFalse(self.chunk(2025).stale)
+        self.assertEqual(len(unpack_chunk(self.chunk(2025))['dates']), 1)
+        self.assertEqual(self.count(), 15)
+
+    # Test that a create appends to the chunk a concurrent create inserted after it looked for one
+    def test_create_races_new_year(self):
+        call_command('build_measurement_chunks', stdout=StringIO())
+        inserted = []
+
+        def insert_chunk(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if 'FROM "fitme95_measurementchunk"' in sql and not inserted:
+                inserted.append(MeasurementChunk.objects.create(user=self.user, year=2025))
+            return result
+
+        with connection.execute_wrapper(insert_chunk):
+            response = self.client.post(reverse('create_measurement'), {
+                "body_weight": 70.0, "body_fat": 15.0, "chest": 95.0,
+                "waist": {"waist": 80.0, "above_below": 1}, "date": "2025-06-01T00:00:00Z"
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(self.chunk(2025).stale)
+        self.assertEqual(len(unpack_chunk(self.chunk(2025))['dates']), 1)
+
+    # Test that edits and deletes mark the chunk stale, reads pack stale years from the rows and a job rebuilds them
+    def test_update_and_delete_rebuild(self):
+        call_command('build_measurement_chunks', stdout=StringIO())
+        measurement = Measurement.objects.get(date=self.start)
+
+        self.assertWithinQueryBudget(
+            self.client.put(reverse('update_measurement', args=[measurement.id]), {"body_weight": 50.0}, format='json')
+        )
+        self.assertTrue(self.chunk(2023).stale)
+        self.assertFalse(self.chunk(2024).stale)
+        response = self.history(days=1)
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(response.data['data']['measurements'][0]['body_weight'], 50.0)
+        self.assertTrue(self.chunk(2023).stale)
+        self.assertEqual(Worker('w1').run(burst=True), 1)
+        self.assertFalse(self.chunk(2023).stale)
+        self.assertEqual(unpack_chunk(self.chunk(2023))['body_weight'][0], 50.0)
+
+        # Over the budget: marking the chunk stale and queueing its rebuild
+        with self.assertNumQueries(10):
+            self.client.delete(reverse('delete_measurement', args=[measurement.id]))
+        self.assertEqual(self.count(), 13)
+        Worker('w1').run(burst=True)
+        self.assertEqual(self.count(), 13)
+
+        # A moved date may empty another year, so every chunk is rebuilt
+        other = Measurement.objects.get(date=self.start + timedelta(days=1))
+        self.client.put(reverse('update_measurement', args=[other.id]), {"date": "2024-02-01T00:00:00Z"}, format='json')
+        self.assertTrue(self.chunk(2023).stale and self.chunk(2024).stale)
+        Worker('w1').run(burst=True)
+        self.assertEqual(len(unpack_chunk(self.chunk(2024))['dates']), 8)
+        self.assertEqual(self.count(), 13)
+
+    # Test that a year without a chunk is read from the rows before any job has run
+    def test_history_reads_years_without_chunk(self):
+        call_command('build_measurement_chunks', stdout=StringIO())
+        moved = Measurement.objects.get(date=self.start)
+        response = self.client.put(
+            reverse('update_measurement', args=[moved.id]), {"date": "2026-03-01T00:00:00Z"}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        Measurement.objects.create(
+            user=self.user, body_weight=60.0, body_fat=20.0, chest=100.0,
+            waist=Waist.objects.create(waist=90.0, above_below=1), date=datetime(2027, 1, 1, tzinfo=dt_timezone.utc)
+        )
+        self.assertFalse(MeasurementChunk.objects.filter(year__in=[2026, 2027]).exists())
+
+        response = self.history(days=1)
+        self.assertWithinQueryBudget(response)
+        dates = [bucket['date'] for bucket in response.data['data']['measurements']]
+        self.assertEqual(len(dates), 15)
+        self.assertEqual(dates[-2:], [
+            datetime(2026, 3, 1, tzinfo=dt_timezone.utc), datetime(2027, 1, 1, tzinfo=dt_timezone.utc)
+        ])
+
+    # Test that archived measurements are part of the packed history
+    def test_chunks_include_archive(self):
+        MeasurementArchive.objects.create(
+            id=10_000, user=self.user, body_weight=90.0, body_fat=25.0, chest=105.0,
+            waist=95.0, waist_above_below=1, date=datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+        )
+        CustomUser.objects.filter(pk=self.user.pk).update(has_archived_measurements=True)
+        call_command('build_measurement_chunks', stdout=StringIO())
+        self.assertEqual(unpack_chunk(self.chunk(2020))['body_weight'][0], 90.0)
+
+    def test_invalid_bucket(self):
+        response = self.client.get(reverse('get_measurement_history'), {'days': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def unpack_chunk(chunk):
+    return unpack({column: getattr(chunk, column) for column in ('dates', 'body_weight', 'body_fat', 'chest', 'waist')})
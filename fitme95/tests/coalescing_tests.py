@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+from django.db import connection
+from asgiref.sync import ThreadSensitiveContext
+from django.test import SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..coalescing import SingleFlight
+from ..models.measurement import Measurement, Waist
+from ..models.user import CustomUser
+from ..serializers.measurement_serializer import MeasurementSerializer
+
+BURST = 6
+
+
+def create_user(google_id):
+    user = CustomUser.objects.create_user(google_id=google_id, email=f"{google_id}@example.com")
+    for i in range(3):
+        Measurement.objects.create(
+            user=user, body_weight=80.0 - i, body_fat=20.0, chest=100.0,
+            waist=Waist.objects.create(waist=90.0, above_below=1), date=timezone.now()
+        )
+    return user, str(RefreshToken.for_user(user).access_token)
+
+
+class SingleFlightTest(SimpleTestCase):
+    def test_followers_join_until_finished(self):
+        group = SingleFlight()
+        flight, leader = group.join(('me', '/measurements'))
+        self.assertTrue(leader)
+        self.assertEqual(group.join(('me', '/measurements')), (flight, False))
+        self.assertTrue(group.join(('you', '/measurements'))[1])
+
+        group.finish(('me', '/measurements'), flight, 'response')
+        self.assertEqual(flight.wait(0), 'response')
+        self.assertTrue(group.join(('me', '/measurements'))[1])
+
+    # Test that after a user's write their reads no longer join earlier computations
+    def test_forget_after_write(self):
+        group = SingleFlight()
+        flight, _ = group.join(('me', '/measurements'))
+        group.forget('me')
+        self.assertIsNot(group.join(('me', '/measurements'))[0], flight)
+
+    async def test_async_followers(self):
+        group = SingleFlight()
+        flight, _ = group.join(('me', '/measurements'))
+        follower = asyncio.ensure_future(flight.wait_async(1))
+        await asyncio.sleep(0)
+        await asyncio.to_thread(group.finish, ('me', '/measurements'), flight, 'response')
+        self.assertEqual(await follower, 'response')
+        self.assertIsNone(await group.join(('me', '/user-info'))[0].wait_async(0.01))
+
+
+class ThreadedCoalescingTest(TransactionTestCase):
+    # Test that a burst of identical GETs from WSGI threads runs the measurement query once
+    def test_burst_hits_database_once(self):
+        user, token = create_user("burst_google_id")
+        barrier = threading.Barrier(BURST)
+        statements = []
+        responses = []
+
+        def count(execute, sql, params, many, context):
+            statements.append(sql)
+            if 'FROM "fitme95_measurement"' in sql:
+                # Keep the leader busy long enough for the whole burst to arrive
+                time.sleep(0.3)
+            return execute(sql, params, many, context)
+
+        def fetch():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            barrier.wait()
+            try:
+                with connection.execute_wrapper(count):
+                    responses.append(client.get(reverse('get_measurements'), {'from': '2000-01-01'}))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=fetch) for _ in range(BURST)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len([sql for sql in statements if 'FROM "fitme95_measurement"' in sql]), 1)
+        self.assertEqual(len([sql for sql in statements if 'FROM "fitme95_customuser"' in sql]), 1)
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(len({response.content for response in responses}), 1)
+
+        # Once the burst is over the next read computes afresh
+        statements.clear()
+        barrier = threading.Barrier(1)
+        fetch()
+        self.assertEqual(len([sql for sql in statements if 'FROM "fitme95_measurement"' in sql]), 1)
+
+
+class AsyncCoalescingTest(TransactionTestCase):
+    def setUp(self):
+        _, self.token = create_user("async_google_id")
+        _, self.other_token = create_user("other_async_google_id")
+
+    # Test that concurrent identical GETs on the ASGI handler share one run of the view
+    def test_burst_runs_view_once(self):
+        runs = []
+
+        def slow_serializer(*args, **kwargs):
+            runs.append(kwargs.get('instance'))
+            time.sleep(0.3)
+            return MeasurementSerializer(*args, **kwargs)
+
+        async def get(access_token):
+            # Like the ASGI handler, give every request a sync thread of its own
+            async with ThreadSensitiveContext():
+                return await self.async_client.get(
+                    reverse('get_measurements'), headers={'Authorization': f'Bearer {access_token}'}
+                )
+
+        async def burst():
+            return await asyncio.gather(*[get(self.token) for _ in range(BURST)], get(self.other_token))
+
+        # A plain event loop: an async test method would send all sync code to the test's own thread
+        with patch('fitme95.views.measurement_views.MeasurementSerializer', side_effect=slow_serializer):
+            responses = asyncio.run(burst())
+
+        # One run for the burst, one for the other user
+        self.assertEqual(len(runs), 2)
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(len({response.content for response in responses[:BURST]}), 1)
+        self.assertNotEqual(responses[0].content, responses[-1].content)
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from ..benchmarks.harness import Client, run_connection_churn, seed
+from ..instrumentation.connections import pool_samples
+from ..instrumentation.metrics import registry
+
+
+class ConnectionMetricsTest(TestCase):
+    def opened(self):
+        return sum(
+            value for name, labels, value in registry.snapshot()['counters']
+            if name == 'fitme95_db_connections_total' and ['alias', 'default'] in map(list, labels)
+        )
+
+    # Test that every new database connection is counted
+    def test_new_connections_are_counted(self):
+        before = self.opened()
+        connection = connections.create_connection('default')
+        try:
+            connection.ensure_connection()
+        finally:
+            connection.close()
+        self.assertEqual(self.opened(), before + 1)
+
+    # Test that the counter is exposed on the metrics endpoint
+    def test_counter_is_rendered(self):
+        connection = connections.create_connection('default')
+        connection.ensure_connection()
+        connection.close()
+        self.assertIn('fitme95_db_connections_total{alias="default",vendor="sqlite"}', registry.render())
+
+
+class PoolSamplesTest(SimpleTestCase):
+    # Test that aliases without a pool report nothing
+    def test_no_pool(self):
+        self.assertEqual(list(pool_samples()), [])
+
+    # Test that pool statistics become gauges labelled by alias
+    def test_pool_statistics(self):
+        pool = mock.Mock()
+        pool.get_stats.return_value = {'pool_min': 2, 'pool_max': 8, 'pool_size': 3, 'pool_available': 1}
+        options = {'pool': {'max_size': 8}}
+        with mock.patch.dict(connections.settings['default'], OPTIONS=options), \
+                mock.patch.object(type(connections['default']), 'pool', pool, create=True):
+            samples = list(pool_samples())
+        self.assertIn(('fitme95_db_pool_max_size', {'alias': 'default'}, 8), samples)
+        self.assertIn(('fitme95_db_pool_available', {'alias': 'default'}, 1), samples)
+        self.assertNotIn('fitme95_db_pool_requests_waiting', [name for name, _, _ in samples])
+
+
+class ConnMaxAgeDefaultTest(SimpleTestCase):
+    def conn_max_age(self, module):
+        env = {key: value for key, value in os.environ.items() if key not in ('DB_CONN_MAX_AGE', 'DJANGO_ASGI')}
+        return subprocess.run(
+            [sys.executable, '-c', f"import {module}; from django.conf import settings; print(settings.DB_CONN_MAX_AGE)"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+
+    # Test that persistent connections are only the default for the WSGI app
+    def test_off_under_asgi(self):
+        self.assertEqual(self.conn_max_age('fitme95_api.wsgi'), '60')
+        self.assertEqual(self.conn_max_age('fitme95_api.asgi'), '0')
+
+
+class ConnectionChurnTest(TransactionTestCase):
+    # Test that persistent connections are reused by the server threads (the in-memory test
+    # database never really closes, so the CONN_MAX_AGE=0 case is left to the command)
+    def test_persistent_connections_are_reused(self):
+        clients = [Client(google_id) for google_id in seed(2, 1)]
+        result = run_connection_churn(clients, requests_count=12, concurrency=2, threads=2, conn_max_age=60)
+        self.assertEqual(result['requests'], 12)
+        self.assertEqual(result['errors'], 0)
+        self.assertLessEqual(result['connections_opened'], 2)
+        self.assertEqual(result['connections_per_request'], round(result['connections_opened'] / 12, 3))
+        self.assertEqual(connections.settings['default']['CONN_MAX_AGE'], 0)
@@ -0,0 +1,135 @@
+import asyncio
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..events import LocalBroker
+from ..models.measurement import Measurement, Waist
+from ..models.user import CustomUser
+
+
+class LocalBrokerTest(SimpleTestCase):
+    # Test that events published from another thread reach only the user's subscriptions
+    async def test_delivers_across_threads(self):
+        broker = LocalBroker()
+        mine, theirs = broker.subscribe('me'), broker.subscribe('them')
+        await asyncio.to_thread(broker.publish, 'me', {'type': 'measurement.created', 'id': 1})
+
+        self.assertEqual(await mine.get(timeout=1), {'type': 'measurement.created', 'id': 1})
+        self.assertTrue(theirs.queue.empty())
+
+        broker.unsubscribe(mine)
+        broker.publish('me', {'type': 'measurement.deleted', 'id': 1})
+        await asyncio.sleep(0)
+        self.assertTrue(mine.queue.empty())
+
+    # Test that a consumer falling too far behind is told to resync
+    @override_settings(EVENTS_QUEUE_SIZE=2)
+    async def test_overflow_resyncs(self):
+        broker = LocalBroker()
+        subscription = broker.subscribe('me')
+        for i in range(3):
+            broker.publish('me', {'type': 'measurement.created', 'id': i})
+        await asyncio.sleep(0)
+        self.assertEqual(await subscription.get(timeout=1), {'type': 'resync'})
+        self.assertTrue(subscription.queue.empty())
+
+
+class ChangeNotificationTest(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(google_id="events_google_id", email="events@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.measurement = Measurement.objects.create(
+            user=self.user, body_weight=80.0, body_fat=20.0, chest=100.0,
+            waist=Waist.objects.create(waist=90.0, above_below=1), date=timezone.now()
+        )
+        patcher = patch('fitme95.events.get_broker')
+        self.broker = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def published(self):
+        return [call.args for call in self.broker.publish.call_args_list]
+
+    # Test that every write publishes once it commits, and nothing before
+    def test_writes_publish_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse('create_measurement'), {
+                "body_weight": 75.5, "body_fat": 15.0, "chest": 95.0,
+                "waist": {"waist": 80.0, "above_below": 1}, "date": "2025-01-15T08:00:00Z"
+            }, format='json')
+        self.assertEqual(self.published(), [])
+        for callback in callbacks:
+            callback()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(reverse('update_measurement', args=[self.measurement.id]), {"chest": 99.0}, format='json')
+            self.client.delete(reverse('delete_measurement', args=[self.measurement.id]))
+            self.client.post(
+                reverse('setup_profile'),
+                {"weight": 70.5, "height": 175.0, "dob": "18-11-01", "measurable_items": ["weight"]},
+                format='json'
+            )
+
+        created_id = Measurement.objects.get(user=self.user).id
+        self.assertEqual(self.published(), [
+            (self.user.pk, {'type': 'measurement.created', 'id': created_id}),
+            (self.user.pk, {'type': 'measurement.updated', 'id': self.measurement.id, 'version': 2}),
+            (self.user.pk, {'type': 'measurement.deleted', 'id': self.measurement.id}),
+            (self.user.pk, {'type': 'profile.updated'}),
+        ])
+
+    # Test that rejected writes publish nothing
+    def test_failed_writes_do_not_publish(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                reverse('update_measurement', args=[self.measurement.id]), {"chest": 99.0, "version": 7}, format='json'
+            )
+            self.client.delete(reverse('delete_measurement', args=[99999]))
+        self.assertEqual(self.published(), [])
+
+
+class EventStreamTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(google_id="stream_google_id", email="stream@example.com")
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    # Test that the stream is authenticated with the API's JWT and relays the user's events
+    async def test_stream_relays_events(self):
+        broker = LocalBroker()
+        with patch('fitme95.views.event_views.get_broker', return_value=broker):
+            response = await self.async_client.get(reverse('events'), headers={'Authorization': f'Bearer {self.token}'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+            stream = aiter(response.streaming_content)
+            self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+            next_chunk = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0)
+            broker.publish(self.user.pk, {'type': 'measurement.created', 'id': 5})
+            chunk = await asyncio.wait_for(next_chunk, 1)
+
+            # A client disconnecting cancels the stream, which must drop its subscription
+            pending = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0)
+            pending.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await pending
+
+        self.assertEqual(chunk, b'event: measurement.created\ndata: {"type": "measurement.created", "id": 5}\n\n')
+        self.assertEqual(broker._subscriptions, {})
+
+    async def test_stream_requires_token(self):
+        response = await self.async_client.get(reverse('events'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(reverse('events'), headers={'Authorization': 'Bearer invalid'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # Test that the WSGI app refuses to hold streams open
+    def test_stream_needs_asgi(self):
+        response = self.client.get(reverse('events'), headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
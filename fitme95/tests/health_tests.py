@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .. import health
+
+
+class ProbeTest(TestCase):
+    def setUp(self):
+        health.readiness.clear()
+
+    def tearDown(self):
+        health.readiness.clear()
+
+    # Test that liveness answers without touching the database or the middleware stack
+    def test_liveness_short_circuits(self):
+        for path in ('/livez', '/health'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(queries), 0)
+            # XFrameOptionsMiddleware would have set this header had the request gone through it
+            self.assertNotIn('X-Frame-Options', response)
+
+    # Test that readiness reports each check with its latency
+    def test_readiness_ok(self):
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['status'], 'ok')
+        default = body['checks']['default']
+        self.assertEqual(default['connectivity']['status'], 'ok')
+        self.assertIn('latency_ms', default['connectivity'])
+        self.assertEqual(default['migrations']['pending'], [])
+        self.assertNotIn('test', body['checks'])
+
+    # Test that pending migrations make the instance not ready
+    def test_readiness_fails_with_pending_migrations(self):
+        with patch.object(health, 'check_migrations', return_value={'status': 'fail', 'pending': ['fitme95.0099']}):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['default']['migrations']['pending'], ['fitme95.0099'])
+
+    # Test that an unreachable database makes the instance not ready
+    def test_readiness_fails_without_database(self):
+        error = Exception('could not connect to server "db.internal" (10.0.0.5), database "fitme95"')
+        with patch.object(health, 'check_connectivity', side_effect=error, autospec=True), \
+                self.assertLogs('fitme95.health', 'ERROR') as logs:
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        connectivity = response.json()['checks']['default']['connectivity']
+        self.assertEqual(connectivity['status'], 'fail')
+        self.assertNotIn('db.internal', response.content.decode())
+        self.assertIn('db.internal', '\n'.join(logs.output))
+
+    # Test that a pooled database reports this process's pool and fails while requests wait for it
+    def test_readiness_reports_pool(self):
+        self.assertEqual(self.client.get('/readyz').json()['checks']['default']['pool']['status'], 'skipped')
+        health.readiness.clear()
+        stats = {'pool_min': 2, 'pool_max': 4, 'pool_size': 4, 'pool_available': 0, 'requests_waiting': 3}
+        with patch.object(health, 'pool_stats', return_value=stats):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        pool = response.json()['checks']['default']['pool']
+        self.assertEqual((pool['status'], pool['in_use'], pool['max'], pool['waiting']), ('fail', 4, 4, 3))
+
+    # Test that the readiness result is reused within its TTL
+    @override_settings(READINESS_CACHE_SECONDS=60)
+    def test_readiness_is_cached(self):
+        with patch.object(health, 'run_readiness_checks', wraps=health.run_readiness_checks) as checks:
+            first = self.client.get('/readyz').json()
+            second = self.client.get('/readyz').json()
+        self.assertEqual(checks.call_count, 1)
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..instrumentation.testing import QueryBudgetMixin
+from ..models.idempotency import IdempotencyKey
+from ..models.measurement import Measurement, Waist
+from ..models.user import CustomUser
+
+MEASUREMENT = {
+    "body_weight": 70.0, "body_fat": 15.0, "chest": 95.0,
+    "waist": {"waist": 80.0, "above_below": 1}, "date": "2025-01-01T08:00:00Z"
+}
+
+
+class IdempotencyTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(google_id="idempotent_google_id", email="idempotent@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def create(self, key, body=MEASUREMENT):
+        response = self.client.post(reverse('create_measurement'), body, format='json', headers={'Idempotency-Key': key})
+        self.assertWithinQueryBudget(response)
+        return response
+
+    def take_over(self, key):
+        # Over the view's budget, which covers fresh keys: the failed claim's savepoint and the
+        # takeover's read and update come on top
+        with self.assertNumQueries(12):
+            response = self.client.post(
+                reverse('create_measurement'), MEASUREMENT, format='json', headers={'Idempotency-Key': key}
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        return response
+
+    # Test that a retried create replays the first response instead of inserting again
+    def test_retry_replays_create(self):
+        first = self.create('retry-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        retry = self.create('retry-1')
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Measurement.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Waist.objects.count(), 1)
+
+        self.assertEqual(self.create('retry-2').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Measurement.objects.filter(user=self.user).count(), 2)
+
+    def test_key_reused_for_other_request(self):
+        self.create('reused')
+        response = self.create('reused', dict(MEASUREMENT, body_weight=71.0))
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_key_in_progress(self):
+        self.create('running')
+        # As if the first request were still running
+        IdempotencyKey.objects.update(status_code=None, response=None)
+        response = self.create('running')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(Measurement.objects.count(), 1)
+
+    # Test that a claim left pending by a worker that died mid-request is taken over after its lease
+    def test_abandoned_key_taken_over(self):
+        self.create('abandoned')
+        IdempotencyKey.objects.update(status_code=None, response=None, created_at=timezone.now() - timedelta(minutes=2))
+        self.take_over('abandoned')
+        self.assertEqual(self.create('abandoned')['Idempotent-Replayed'], 'true')
+        self.assertEqual(IdempotencyKey.objects.get().status_code, status.HTTP_201_CREATED)
+
+    # Test that an update retried after its first attempt succeeded is not applied twice
+    def test_retry_replays_update(self):
+        measurement_id = self.create('create').json()['data']['measurement']['id']
+        url = reverse('update_measurement', args=[measurement_id])
+        for _ in range(2):
+            response = self.client.put(url, {"body_weight": 60.0, "version": 1}, format='json',
+                                       headers={'Idempotency-Key': 'update'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertWithinQueryBudget(response)
+        self.assertEqual(Measurement.objects.get(pk=measurement_id).version, 2)
+
+    # Test that keys belong to one user
+    def test_keys_per_user(self):
+        self.create('shared')
+        other = CustomUser.objects.create_user(google_id="other_idempotent_id", email="other@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(other).access_token}')
+        self.assertNotIn('Idempotent-Replayed', self.create('shared'))
+        self.assertEqual(Measurement.objects.count(), 2)
+
+    # Test that expired keys run the request again and are purged
+    def test_expired_keys(self):
+        self.create('old')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(hours=25))
+        self.take_over('old')
+        self.assertEqual(Measurement.objects.count(), 2)
+
+        self.create('new')
+        IdempotencyKey.objects.filter(key='old').update(created_at=timezone.now() - timedelta(hours=25))
+        call_command('purge_idempotency_keys', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['new'])
+
+    def test_invalid_key(self):
+        self.assertEqual(self.create('').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.create('k' * 256).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,199 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .. import jobs
+from ..jobs import Worker, claim, enqueue, requeue_abandoned, run_job, task
+from ..models.job import Job
+from ..models.user import CustomUser
+
+calls = []
+
+
+def add(a, b):
+    calls.append((a, b))
+    return a + b
+
+
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError("not yet")
+    return 'done'
+
+
+@override_settings(JOB_RETRY_BASE_SECONDS=10, JOB_LOCK_TIMEOUT_SECONDS=60)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(jobs.tasks, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        calls.clear()
+        task(name='add')(add)
+        task(name='flaky', max_attempts=2)(flaky)
+        task(name='limited', concurrency=1)(add)
+
+    # Test that a job runs once and stores its result
+    def test_run_job(self):
+        job = enqueue('add', {'a': 2, 'b': 3})
+        self.assertEqual(Worker('w1').run(burst=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.attempts), (Job.SUCCEEDED, 5, 1))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(calls, [(2, 3)])
+
+    # Test that unknown tasks cannot be enqueued
+    def test_unknown_task(self):
+        with self.assertRaises(KeyError):
+            enqueue('missing')
+
+    # Test that higher priority and earlier jobs are claimed first and future jobs wait
+    def test_claim_order(self):
+        low = enqueue('add', {'a': 1, 'b': 1})
+        high = enqueue('add', {'a': 2, 'b': 2}, priority=5)
+        enqueue('add', {'a': 3, 'b': 3}, priority=9, run_after=timezone.now() + timedelta(hours=1))
+        self.assertEqual(claim('w1').pk, high.pk)
+        self.assertEqual(claim('w1').pk, low.pk)
+        self.assertIsNone(claim('w1'))
+
+    # Test that a claimed job is not handed to a second worker
+    def test_claim_is_exclusive(self):
+        job = enqueue('add', {'a': 1, 'b': 1})
+        claimed = claim('w1')
+        self.assertEqual((claimed.pk, claimed.status, claimed.locked_by), (job.pk, Job.RUNNING, 'w1'))
+        self.assertIsNone(claim('w2'))
+
+    # Test that failures are retried with backoff and fail for good after max_attempts
+    def test_retries(self):
+        job = enqueue('flaky', {'fail_times': 5})
+        run_job(claim('w1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('not yet', job.last_error)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=5))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        run_job(claim('w1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    # Test that a retry can succeed
+    def test_retry_succeeds(self):
+        job = enqueue('flaky', {'fail_times': 1})
+        run_job(claim('w1'))
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        run_job(claim('w1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (Job.SUCCEEDED, 'done'))
+
+    # Test that the per task concurrency limit holds back further jobs
+    def test_concurrency_limit(self):
+        enqueue('limited', {'a': 1, 'b': 1})
+        enqueue('limited', {'a': 2, 'b': 2})
+        other = enqueue('add', {'a': 3, 'b': 3})
+        first = claim('w1')
+        self.assertEqual(first.task, 'limited')
+        self.assertEqual(claim('w2').pk, other.pk)
+        self.assertIsNone(claim('w2'))
+        run_job(first)
+        self.assertEqual(claim('w2').task, 'limited')
+
+    # Test that a claim racing past a stale saturation check is undone once it sees the running job
+    def test_concurrency_limit_checked_at_claim(self):
+        enqueue('limited', {'a': 1, 'b': 1})
+        second = enqueue('limited', {'a': 2, 'b': 2})
+        self.assertEqual(claim('w1').task, 'limited')
+        with mock.patch.object(jobs, '_saturated_tasks', return_value=[]):
+            self.assertIsNone(claim('w2'))
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.attempts, second.locked_by), (Job.QUEUED, 0, ''))
+
+    # Test that jobs of a dead worker are requeued after the lock timeout
+    def test_requeue_abandoned(self):
+        job = enqueue('add', {'a': 1, 'b': 1})
+        claim('w1')
+        self.assertEqual(requeue_abandoned(), 0)
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(requeue_abandoned(), 1)
+        self.assertEqual(claim('w2').pk, job.pk)
+
+    # Test that a job whose worker keeps dying fails once it has used its attempts
+    def test_abandoned_job_fails_after_max_attempts(self):
+        job = enqueue('flaky', {'fail_times': 0})
+        for attempt in (1, 2):
+            self.assertEqual(claim('w1').attempts, attempt)
+            Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+            self.assertEqual(requeue_abandoned(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim('w2'))
+
+    # Test that a worker finishing after its job was requeued does not overwrite the new run
+    def test_late_worker_outcome_dropped(self):
+        job = enqueue('add', {'a': 1, 'b': 1})
+        slow = claim('w1')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+        requeue_abandoned()
+        rerun = claim('w2')
+        run_job(slow)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), (Job.RUNNING, 'w2', 2))
+        run_job(rerun)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.locked_by), (Job.SUCCEEDED, 2, ''))
+
+    # Test the management command in burst mode
+    def test_run_worker_command(self):
+        enqueue('add', {'a': 1, 'b': 2})
+        out = StringIO()
+        call_command('run_worker', '--burst', '--worker-id', 'cmd', stdout=out)
+        self.assertIn('Processed 1 jobs', out.getvalue())
+
+
+class JobStatusViewsTest(APITestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(jobs.tasks, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        task(name='add')(add)
+
+        self.user = CustomUser.objects.create_user(google_id="jobs_google_id", email="jobs@example.com")
+        self.other_user = CustomUser.objects.create_user(google_id="other_google_id", email="other@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    # Test that owners see their job's status and result
+    def test_job_status(self):
+        job = enqueue('add', {'a': 1, 'b': 2}, user=self.user)
+        response = self.client.get(reverse('job_status', args=[job.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['job']['status'], Job.QUEUED)
+
+        Worker('w1').run(burst=True)
+        response = self.client.get(reverse('job_status', args=[job.pk]))
+        self.assertEqual(response.data['data']['job']['status'], Job.SUCCEEDED)
+        self.assertEqual(response.data['data']['job']['result'], 3)
+        self.assertNotIn('last_error', response.data['data']['job'])
+
+    # Test that other users' jobs are not visible
+    def test_other_users_jobs_are_hidden(self):
+        job = enqueue('add', {'a': 1, 'b': 2}, user=self.other_user)
+        response = self.client.get(reverse('job_status', args=[job.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('list_jobs'))
+        self.assertEqual(response.data['data']['jobs'], [])
+
+    # Test that the list shows the newest jobs first
+    def test_list_jobs(self):
+        first = enqueue('add', {'a': 1, 'b': 2}, user=self.user)
+        second = enqueue('add', {'a': 3, 'b': 4}, user=self.user)
+        response = self.client.get(reverse('list_jobs'))
+        self.assertEqual([job['id'] for job in response.data['data']['jobs']], [second.pk, first.pk])
@@ -1,12 +1,17 @@
+import threading
+
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework import status
 from unittest.mock import patch
 from ..models.measurement import Measurement, Waist
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.urls import reverse
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -42,7 +47,8 @@ class MeasurementViewsTest(APITestCase):
             "waist": {
                 "waist": 80.0,
                 "above_below": 1
-            }
+            },
+            "date": "2025-01-15T08:00:00Z"
         }
 
         # Create test measurement
@@ -53,14 +59,16 @@ class MeasurementViewsTest(APITestCase):
             body_weight=75.5,
             body_fat=15.0,
             chest=95.0,
-            waist=waist1
+            waist=waist1,
+            date=timezone.now()
         )
         self.test_measurement2 = Measurement.objects.create(
             user=self.user,
             body_weight=75,
             body_fat=15.5,
             chest=95.0,
-            waist=waist2
+            waist=waist2,
+            date=timezone.now()
         )
 
         # URLs
@@ -203,6 +211,50 @@ class MeasurementViewsTest(APITestCase):
         self.assertEqual(measurement['waist']['waist'], update_data['waist']['waist'])
         self.assertEqual(measurement['waist']['above_below'], update_data['waist']['above_below'])
 
+    # Test that an update writes only the fields sent and bumps the version
+    def test_update_measurement_writes_changed_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(
+                self.update_url,
+                {"body_weight": 77.0, "version": 1},
+                format='json',
+                **self.auth_headers
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['measurement']['version'], 2)
+        self.assertEqual(response.data['data']['measurement']['chest'], 95.0)
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"body_weight"', updates[0])
+        self.assertNotIn('"chest"', updates[0])
+
+    # Test that an update based on a stale version is rejected instead of overwriting
+    def test_update_measurement_version_conflict(self):
+        first = self.client.put(self.update_url, {"body_weight": 77.0, "version": 1}, format='json', **self.auth_headers)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        second = self.client.put(
+            self.update_url,
+            {"chest": 99.0, "waist": {"waist": 70.0}, "version": 1},
+            format='json',
+            **self.auth_headers
+        )
+        self.assertEqual(second.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(second.data['data']['measurement']['version'], 2)
+
+        self.test_measurement.refresh_from_db()
+        self.test_measurement.waist.refresh_from_db()
+        self.assertEqual(self.test_measurement.body_weight, 77.0)
+        self.assertEqual(self.test_measurement.chest, 95.0)
+        self.assertEqual(self.test_measurement.waist.waist, 80.0)
+
+    # Test measurement update with a malformed version
+    def test_update_measurement_invalid_version(self):
+        response = self.client.put(self.update_url, {"body_weight": 77.0, "version": "x"}, format='json', **self.auth_headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('version', response.data['status']['errors'])
+
     # Test updating non-existent measurement
     def test_update_measurement_not_found(self):
         non_existent_url = reverse('update_measurement', args=[99999])
@@ -224,7 +276,8 @@ class MeasurementViewsTest(APITestCase):
             body_weight=70.0,
             body_fat=14.0,
             chest=90.0,
-            waist=waist
+            waist=waist,
+            date=timezone.now()
         )
         update_url = reverse('update_measurement', args=[other_measurement.id])
         response = self.client.put(
@@ -297,7 +350,8 @@ class MeasurementViewsTest(APITestCase):
             body_weight=70.0,
             body_fat=14.0,
             chest=90.0,
-            waist=waist
+            waist=waist,
+            date=timezone.now()
         )
         delete_url = reverse('delete_measurement', args=[other_measurement.id])
         response = self.client.delete(
@@ -313,3 +367,39 @@ class MeasurementViewsTest(APITestCase):
     def test_delete_measurement_unauthorized(self):
         response = self.client.delete(self.delete_url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ConcurrentDeleteTests(TransactionTestCase):
+    # Test that parallel deletes of one user's measurements all succeed instead of failing on the database lock
+    def test_parallel_deletes(self):
+        user = User.objects.create_user(google_id="parallel_delete_id", email="parallel_delete@example.com")
+        token = RefreshToken.for_user(user).access_token
+        threads_count = 8
+        ids = [
+            Measurement.objects.create(
+                user=user, body_weight=70.0, body_fat=15.0, chest=95.0,
+                waist=Waist.objects.create(waist=80.0, above_below=1), date=timezone.now()
+            ).id
+            for _ in range(threads_count)
+        ]
+        barrier = threading.Barrier(threads_count)
+        statuses = []
+
+        def delete(measurement_id):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            barrier.wait()
+            try:
+                statuses.append(client.delete(reverse('delete_measurement', args=[measurement_id])).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=delete, args=(measurement_id,)) for measurement_id in ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses, [200] * threads_count)
+        self.assertFalse(Measurement.objects.exists())
+        self.assertFalse(Waist.objects.exists())
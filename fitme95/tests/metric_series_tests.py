@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..instrumentation.testing import QueryBudgetMixin
+from ..models.measurement import Measurement, MetricValue, Waist
+from ..models.user import CustomUser
+
+
+class MetricSeriesTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(google_id="series_google_id", email="series@example.com")
+        self.other_user = CustomUser.objects.create_user(google_id="other_google_id", email="other@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+        self.now = timezone.now().replace(microsecond=0)
+        self.yesterday = self.now - timedelta(days=1)
+        MetricValue.objects.bulk_create([
+            MetricValue(user=self.user, metric='hips', date=self.yesterday, value=99.0),
+            MetricValue(user=self.user, metric='arm', date=self.yesterday, value=33.0),
+            MetricValue(user=self.user, metric='hips', date=self.now, value=98.0),
+            MetricValue(user=self.other_user, metric='hips', date=self.now, value=120.0),
+        ])
+        self.measurement = Measurement.objects.create(
+            user=self.user, body_weight=80.0, body_fat=20.0, chest=100.0, date=self.now,
+            waist=Waist.objects.create(waist=85.0, above_below=1),
+        )
+
+    # Test that values of several metrics taken together are stored one row each
+    def test_record_values(self):
+        response = self.client.post(
+            reverse('record_metric_values'),
+            {"date": "2025-01-15T08:00:00Z", "values": {"thigh": 55.0, "arm": 32.5}},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(
+            sorted(MetricValue.objects.filter(user=self.user, date__year=2025).values_list('metric', 'value')),
+            [('arm', 32.5), ('thigh', 55.0)]
+        )
+
+    # Test that recording a metric again at the same moment replaces the value
+    def test_record_replaces_same_moment(self):
+        response = self.client.post(
+            reverse('record_metric_values'), {"date": self.now.isoformat(), "values": {"hips": 97.0}}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(MetricValue.objects.filter(user=self.user, date=self.now).values_list('value', flat=True)), [97.0]
+        )
+
+    def test_record_unknown_metric(self):
+        response = self.client.post(
+            reverse('record_metric_values'), {"date": self.now.isoformat(), "values": {"neck": 40.0}}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('values', response.data['status']['errors'])
+
+    # Test that items with a column on Measurement are not also stored as series
+    def test_record_measurement_column(self):
+        for metric in ('weight', 'chest', 'waist', 'body_fat'):
+            response = self.client.post(
+                reverse('record_metric_values'), {"date": self.now.isoformat(), "values": {metric: 80.0}}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Test that reads are pivoted to one row per moment in the shape of GET /measurements
+    def test_pivoted_values(self):
+        response = self.client.get(reverse('get_metric_values'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
+        measurements = response.data['data']['measurements']
+        self.assertEqual(measurements, [
+            {
+                'id': None, 'waist': None, 'body_weight': None, 'body_fat': None, 'chest': None,
+                'date': self.yesterday.isoformat().replace('+00:00', 'Z'), 'version': None, 'user': self.user.pk,
+                'height': None, 'hips': 99.0, 'thigh': None, 'arm': 33.0,
+            },
+            {
+                **self.client.get(reverse('get_measurements')).data['data']['measurements'][0],
+                'height': None, 'hips': 98.0, 'thigh': None, 'arm': None,
+            },
+        ])
+        self.assertEqual(measurements[1]['id'], self.measurement.id)
+
+    def test_pivoted_values_for_chosen_metrics_and_range(self):
+        response = self.client.get(
+            reverse('get_metric_values'), {'metrics': 'arm,thigh', 'from': self.yesterday.isoformat()}
+        )
+        [row] = response.data['data']['measurements']
+        self.assertEqual((row['arm'], row['thigh']), (33.0, None))
+        self.assertNotIn('hips', row)
+
+        response = self.client.get(reverse('get_metric_values'), {'metrics': 'neck'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Test that a single metric's series only returns that metric
+    def test_metric_series(self):
+        response = self.client.get(reverse('get_metric_series', args=['hips']), {'to': self.yesterday.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(response.data['data']['values'], [{'date': self.yesterday, 'value': 99.0}])
+
+        response = self.client.get(reverse('get_metric_series', args=['neck']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
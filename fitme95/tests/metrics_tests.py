@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..instrumentation.metrics import MetricsRegistry
+from ..models.user import CustomUser
+
+
+@override_settings(METRICS_TOKEN='scrape-token')
+class MetricsEndpointTest(TestCase):
+    scrape_headers = {'Authorization': 'Bearer scrape-token'}
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(google_id="metrics_google_id", email="metrics@example.com")
+        self.auth_headers = {
+            'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        }
+
+    # Test that handled requests show up in the Prometheus exposition
+    def test_metrics_report_requests_by_route(self):
+        self.client.get(reverse('user_info'), **self.auth_headers)
+        response = self.client.get(reverse('metrics'), headers=self.scrape_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('# TYPE fitme95_http_request_duration_seconds histogram', body)
+        self.assertIn('fitme95_http_requests_total{method="GET",route="user_info",status="200"}', body)
+
+    # Test that SQL statements are counted for the route that issued them
+    def test_metrics_report_db_queries(self):
+        self.client.get(reverse('user_info'), **self.auth_headers)
+        body = self.client.get(reverse('metrics'), headers=self.scrape_headers).content.decode()
+        self.assertIn('fitme95_db_queries_per_request_count{method="GET",route="user_info"}', body)
+        self.assertIn('fitme95_db_query_duration_seconds_sum{method="GET",route="user_info"}', body)
+
+    # Test that unresolved paths share one label instead of one series per path
+    def test_unmatched_paths_are_grouped(self):
+        self.client.get('/does-not-exist/123')
+        body = self.client.get(reverse('metrics'), headers=self.scrape_headers).content.decode()
+        self.assertIn('route="unmatched",status="404"', body)
+
+
+    # Test that scrapes without the token are refused and that no token turns the endpoint off
+    def test_metrics_need_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+        response = self.client.get(reverse('metrics'), **self.auth_headers)
+        self.assertEqual(response.status_code, 401)
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get(reverse('metrics'), headers=self.scrape_headers).status_code, 404)
+
+
+class MetricsRegistryTest(TestCase):
+    # Test histogram buckets are rendered cumulatively with sum and count
+    def test_histogram_rendering(self):
+        registry = MetricsRegistry()
+        labels = {'method': 'GET', 'route': 'get_measurements'}
+        registry.observe('fitme95_http_request_duration_seconds', labels, 0.003)
+        registry.observe('fitme95_http_request_duration_seconds', labels, 0.2)
+        registry.observe('fitme95_http_request_duration_seconds', labels, 60)
+        body = registry.render()
+        prefix = 'fitme95_http_request_duration_seconds'
+        self.assertIn(f'{prefix}_bucket{{method="GET",route="get_measurements",le="0.005"}} 1', body)
+        self.assertIn(f'{prefix}_bucket{{method="GET",route="get_measurements",le="0.25"}} 2', body)
+        self.assertIn(f'{prefix}_bucket{{method="GET",route="get_measurements",le="10"}} 2', body)
+        self.assertIn(f'{prefix}_bucket{{method="GET",route="get_measurements",le="+Inf"}} 3', body)
+        self.assertIn(f'{prefix}_count{{method="GET",route="get_measurements"}} 3', body)
+
+    # Test that samples written by other worker processes are merged on scrape
+    def test_aggregates_across_processes(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            labels = {'method': 'GET', 'route': 'health_check', 'status': '200'}
+            other_worker = MetricsRegistry()
+            other_worker.inc('fitme95_http_requests_total', labels, 2)
+            with open(os.path.join(directory, 'metrics-99999.json'), 'w') as fh:
+                json.dump(other_worker.snapshot(), fh)
+
+            registry = MetricsRegistry()
+            registry.inc('fitme95_http_requests_total', labels, 3)
+            body = registry.render()
+
+            self.assertIn(f'metrics-{os.getpid()}.json', os.listdir(directory))
+            self.assertIn('fitme95_http_requests_total{method="GET",route="health_check",status="200"} 5', body)
+
+    # Test label values are escaped per the exposition format
+    def test_label_escaping(self):
+        registry = MetricsRegistry()
+        registry.inc('fitme95_http_requests_total', {'route': 'a"b\\c'})
+        self.assertIn('route="a\\"b\\\\c"', registry.render())
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.test import Client, TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..benchmarks.harness import Client as BenchClient, full_middleware, run_middleware_comparison
+from ..models.user import CustomUser
+
+
+class BrowserMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(google_id="lean_google_id", email="lean@example.com")
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    # Test that API calls skip the session, CSRF and clickjacking middleware
+    def test_api_skips_browser_stack(self):
+        response = self.client.get(reverse('get_measurements'), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Frame-Options', response.headers)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+
+    # Test that the admin still gets sessions, clickjacking protection and CSRF checks
+    def test_admin_gets_browser_stack(self):
+        response = self.client.get('/admin/login/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Frame-Options'], 'DENY')
+        self.assertIn('csrftoken', response.cookies)
+        self.assertTrue(hasattr(response.wsgi_request, 'session'))
+
+        response = Client(enforce_csrf_checks=True).post('/admin/login/', {'username': 'a', 'password': 'b'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_middleware_comparison(self):
+        self.assertIn('django.middleware.csrf.CsrfViewMiddleware', full_middleware())
+        stacks = {'full': full_middleware(), 'scoped': settings.MIDDLEWARE}
+        report = run_middleware_comparison(BenchClient("lean_google_id"), stacks, 10, paths=['/measurements'])
+        self.assertEqual(report[('full', '/measurements')]['requests'], 10)
+        self.assertEqual(report[('scoped', '/measurements')]['requests'], 10)
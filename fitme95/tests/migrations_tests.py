@@ -0,0 +1,22 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..models.measurement import Measurement
+
+
+class MigrationsTest(TestCase):
+    # Test that every model change has a committed migration
+    def test_no_missing_migrations(self):
+        try:
+            call_command('makemigrations', '--check', '--dry-run', stdout=StringIO())
+        except SystemExit:
+            self.fail("Models have changes that are not reflected in a migration")
+
+    # Test that the hot-path index exists
+    def test_measurement_user_date_index(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Measurement._meta.db_table)
+        self.assertEqual(constraints['measurement_user_date_idx']['columns'], ['user_id', 'date'])
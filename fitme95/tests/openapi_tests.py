@@ -0,0 +1,66 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+from ..openapi import schema_ui
+
+
+class OpenApiSchemaTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'openapi.json'
+        settings_override = override_settings(OPENAPI_SCHEMA_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    # Test that the command writes the whole API into the artifact
+    def test_build_schema(self):
+        call_command('build_openapi_schema', stdout=StringIO())
+        schema = json.loads(self.path.read_bytes())
+        self.assertEqual(schema['info']['title'], "FitMe95 API")
+        self.assertIn('/measurements', schema['paths'])
+
+    # Test that the artifact is served with long-lived caching headers and revalidates by ETag
+    def test_serve_schema(self):
+        call_command('build_openapi_schema', stdout=StringIO())
+        response = self.client.get(reverse('openapi-schema'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.path.read_bytes())
+        self.assertIn('max-age=86400', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+
+        response = self.client.get(reverse('openapi-schema'), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    # Test that a rebuilt schema is picked up without a restart
+    def test_serve_rebuilt_schema(self):
+        call_command('build_openapi_schema', stdout=StringIO())
+        etag = self.client.get(reverse('openapi-schema'))['ETag']
+        self.path.write_bytes(b'{}')
+        response = self.client.get(reverse('openapi-schema'), headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'{}')
+
+    def test_schema_not_built(self):
+        self.assertEqual(self.client.get(reverse('openapi-schema')).status_code, 404)
+
+    # Test that outside development the docs pages load the artifact and never generate the schema
+    @override_settings(SWAGGER_SETTINGS={'SPEC_URL': 'openapi-schema'}, REDOC_SETTINGS={'SPEC_URL': 'openapi-schema'})
+    def test_docs_use_prebuilt_schema(self):
+        factory = RequestFactory()
+        with mock.patch.object(OpenAPISchemaGenerator, 'get_schema', side_effect=AssertionError("schema generated")):
+            for renderer in ('swagger', 'redoc'):
+                view = schema_ui(renderer, live=False)
+                for query in ({}, {'v': renderer}, {'format': 'openapi'}):
+                    page = view(factory.get(f'/{renderer}/', query))
+                    self.assertEqual(page.status_code, 200)
+                    self.assertIn(reverse('openapi-schema'), page.content.decode())
+                    self.assertIn("FitMe95 API", page.content.decode())
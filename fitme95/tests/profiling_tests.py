@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..instrumentation import profiling
+from ..instrumentation.profiling import CaptureLimiter, sign_profile_token
+from ..models.measurement import Measurement, Waist
+from ..models.user import CustomUser
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            PROFILING_DIR=self.directory.name,
+            PROFILING_ENABLED=False,
+            PROFILING_MAX_PER_MINUTE=5,
+        )
+        self.settings_override.enable()
+        profiling.limiter = CaptureLimiter()
+
+        self.user = CustomUser.objects.create_user(google_id="profile_google_id", email="profile@example.com")
+        Measurement.objects.create(
+            user=self.user,
+            body_weight=80.0,
+            body_fat=20.0,
+            chest=100.0,
+            waist=Waist.objects.create(waist=90.0, above_below=1),
+            date=timezone.now()
+        )
+        self.auth_headers = {
+            'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        }
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    def captures(self):
+        return sorted(os.listdir(self.directory.name))
+
+    # Test that a signed header captures the profile and SQL timeline
+    def test_signed_header_captures_request(self):
+        response = self.client.get(
+            reverse('get_measurements'),
+            HTTP_X_FITME95_PROFILE=sign_profile_token('ticket-42'),
+            **self.auth_headers
+        )
+        self.assertEqual(response.status_code, 200)
+        capture_id = response['X-Fitme95-Profile-Id']
+        self.assertIn('get_measurements-ticket-42', capture_id)
+        self.assertEqual(self.captures(), [f'{capture_id}.prof', f'{capture_id}.sql.json'])
+
+        with open(os.path.join(self.directory.name, f'{capture_id}.sql.json')) as fh:
+            timeline = json.load(fh)
+        self.assertEqual(timeline['route'], 'get_measurements')
+        self.assertEqual(timeline['query_count'], len(timeline['queries']))
+        self.assertTrue(any('fitme95_measurement' in query['sql'] for query in timeline['queries']))
+
+    # Test that a tampered header is ignored
+    def test_invalid_signature_is_not_profiled(self):
+        response = self.client.get(
+            reverse('get_measurements'),
+            HTTP_X_FITME95_PROFILE=sign_profile_token('ticket-42') + 'x',
+            **self.auth_headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Fitme95-Profile-Id', response)
+        self.assertEqual(self.captures(), [])
+
+    # Test that untraced requests are not profiled when sampling is off
+    def test_untraced_requests_are_not_profiled(self):
+        self.client.get(reverse('get_measurements'), **self.auth_headers)
+        self.assertEqual(self.captures(), [])
+
+    # Test that sampling captures requests without a header
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0)
+    def test_sampling(self):
+        response = self.client.get(reverse('get_measurements'), **self.auth_headers)
+        self.assertIn('sampled', response['X-Fitme95-Profile-Id'])
+
+    # Test that captures per minute are capped
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_MAX_PER_MINUTE=2)
+    def test_rate_limit(self):
+        responses = [self.client.get(reverse('get_measurements'), **self.auth_headers) for _ in range(4)]
+        profiled = [response for response in responses if 'X-Fitme95-Profile-Id' in response]
+        self.assertEqual(len(profiled), 2)
+
+    # Test that the management command issues a usable token
+    def test_profile_token_command(self):
+        with tempfile.TemporaryFile('w+') as out, tempfile.TemporaryFile('w+') as err:
+            call_command('profile_token', 'ticket-7', stdout=out, stderr=err)
+            out.seek(0)
+            token = out.read().strip().split(': ', 1)[1]
+        self.assertEqual(profiling.unsign_profile_token(token), 'ticket-7')
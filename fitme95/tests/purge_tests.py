@@ -0,0 +1,87 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..jobs import Worker
+from ..models.job import Job
+from ..models.measurement import Measurement, MeasurementArchive, MetricValue, Waist
+from ..models.user import CustomUser
+from ..models.user_profile import UserProfile
+from ..purge import delete_orphaned_waists, purge_user
+from ..seeding import seed_fitness_data
+
+
+class PurgeUserTest(TestCase):
+    def setUp(self):
+        self.google_ids = seed_fitness_data(users=2, measurements_per_user=7, seed=5)
+        MeasurementArchive.objects.create(
+            id=10_000, user_id=self.google_ids[0], body_weight=80.0, body_fat=20.0, chest=100.0,
+            waist=90.0, waist_above_below=1, date=timezone.now() - timedelta(days=900)
+        )
+        MetricValue.objects.create(user_id=self.google_ids[0], metric='hips', date=timezone.now(), value=98.0)
+
+    # Test that every row of the user goes, in batches, without orphaning waists
+    def test_purge_removes_everything(self):
+        counts = purge_user(self.google_ids[0], batch_size=3)
+        self.assertEqual(
+            counts, {'measurements': 7, 'archived_measurements': 1, 'metric_values': 1, 'idempotency_keys': 0, 'profiles': 1, 'users': 1}
+        )
+        self.assertFalse(CustomUser.objects.filter(pk=self.google_ids[0]).exists())
+        self.assertEqual(Measurement.objects.count(), 7)
+        self.assertEqual(Waist.objects.count(), 7)
+        self.assertEqual(UserProfile.objects.count(), 1)
+        self.assertEqual(delete_orphaned_waists(dry_run=True), 0)
+
+    # Test that purging again is harmless
+    def test_purge_is_idempotent(self):
+        purge_user(self.google_ids[0])
+        self.assertEqual(
+            purge_user(self.google_ids[0]),
+            {'measurements': 0, 'archived_measurements': 0, 'metric_values': 0, 'idempotency_keys': 0, 'profiles': 0, 'users': 0}
+        )
+
+    # Test that a plain cascade orphans waists and the collector removes them
+    def test_gc_orphan_waists(self):
+        CustomUser.objects.filter(pk=self.google_ids[1]).delete()
+        self.assertEqual(delete_orphaned_waists(dry_run=True), 7)
+
+        out = StringIO()
+        call_command('gc_orphan_waists', '--batch-size', '2', stdout=out)
+        self.assertIn('Deleted 7 orphaned waists', out.getvalue())
+        self.assertEqual(Waist.objects.count(), Measurement.objects.count())
+
+
+class DeleteAccountViewTest(APITestCase):
+    def setUp(self):
+        self.google_id = seed_fitness_data(users=1, measurements_per_user=4, seed=2)[0]
+        self.user = CustomUser.objects.get(pk=self.google_id)
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    # Test that the endpoint deactivates the account at once and a worker purges it
+    def test_delete_account(self):
+        response = self.client.delete(reverse('delete_account'))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertNotIn('job_id', response.data.get('data') or {})
+        job = Job.objects.get(task='purge_user')
+        self.assertEqual((job.payload, job.user), ({'user_id': self.google_id}, None))
+
+        # Existing tokens stop working before the purge has run
+        self.assertEqual(self.client.get(reverse('user_info')).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post(reverse('refresh_token'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        Worker('w1').run(burst=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result['measurements'], 4)
+        self.assertFalse(CustomUser.objects.filter(pk=self.google_id).exists())
+        self.assertEqual(Waist.objects.count(), 0)
@@ -0,0 +1,141 @@
+from unittest.mock import patch
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..instrumentation.queries import QueryLog, normalize_sql
+from ..instrumentation.testing import QueryBudgetMixin
+from ..models.measurement import Measurement, Waist
+from ..models.user import CustomUser
+from ..models.user_profile import UserProfile
+
+
+class QueryBudgetTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            google_id="budget_google_id",
+            email="budget@example.com",
+            first_name="Budget",
+            last_name="User"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        for i in range(10):
+            Measurement.objects.create(
+                user=self.user,
+                body_weight=80 - i,
+                body_fat=20.0,
+                chest=100.0,
+                waist=Waist.objects.create(waist=90.0, above_below=1),
+                date=timezone.now()
+            )
+        self.measurement = Measurement.objects.filter(user=self.user).first()
+        self.measurement_data = {
+            "body_weight": 75.5,
+            "body_fat": 15.0,
+            "chest": 95.0,
+            "waist": {"waist": 80.0, "above_below": 1},
+            "date": "2025-01-15T08:00:00Z"
+        }
+
+    # Test that listing measurements does not query once per nested waist
+    def test_get_measurements_within_budget(self):
+        response = self.client.get(reverse('get_measurements'))
+        self.assertEqual(len(response.data['data']['measurements']), 10)
+        self.assertWithinQueryBudget(response)
+
+    def test_user_info_within_budget(self):
+        UserProfile.objects.create(user=self.user, weight=80.0, height=180.0, dob="18-11-01")
+        self.assertWithinQueryBudget(self.client.get(reverse('user_info')))
+
+    def test_create_measurement_within_budget(self):
+        response = self.client.post(reverse('create_measurement'), self.measurement_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertWithinQueryBudget(response)
+
+    def test_update_measurement_within_budget(self):
+        response = self.client.put(
+            reverse('update_measurement', args=[self.measurement.id]),
+            {"body_weight": 70.0, "waist": {"waist": 85.0, "above_below": 0}},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
+
+    def test_delete_measurement_within_budget(self):
+        response = self.client.delete(reverse('delete_measurement', args=[self.measurement.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
+
+    def test_setup_user_profile_within_budget(self):
+        response = self.client.post(
+            reverse('setup_profile'),
+            {"weight": 70.5, "height": 175.0, "dob": "18-11-01", "measurable_items": ["weight"]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertWithinQueryBudget(response)
+
+    @patch('google.oauth2.id_token.verify_firebase_token')
+    def test_google_login_within_budget(self, mock_verify_firebase_token):
+        mock_verify_firebase_token.return_value = {
+            'email': 'budget@example.com',
+            'sub': 'budget_google_id',
+            'name': 'Budget User',
+        }
+        self.client.credentials()
+        response = self.client.post(reverse('login'), {'id': 'fake_token'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
+
+    # Test that the helper fails when a view goes over budget
+    def test_budget_overrun_fails(self):
+        with patch('fitme95.views.measurement_views.get_measurements.query_budget', 1):
+            response = self.client.get(reverse('get_measurements'))
+        with self.assertRaises(AssertionError):
+            self.assertWithinQueryBudget(response)
+
+
+class QueryInspectorTest(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(google_id="inspector_google_id", email="inspector@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    # Test that statements differing only in parameters share a shape
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql('SELECT * FROM t WHERE id = 12 AND name = \'it\'\'s\'  AND x IN (%s, %s, %s)'),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)'
+        )
+
+    # Test that repeated statement shapes are reported once with their count
+    def test_repeated_shapes(self):
+        log = QueryLog()
+        log.queries = [{'sql': f'SELECT * FROM t WHERE id = {i}', 'duration': 0.0} for i in range(6)]
+        self.assertEqual(log.repeated_shapes(5), [('SELECT * FROM t WHERE id = ?', 6)])
+        self.assertEqual(log.repeated_shapes(7), [])
+
+    # Test that an N+1 pattern is logged with the view name
+    def test_n_plus_one_is_logged(self):
+        for i in range(6):
+            Measurement.objects.create(
+                user=self.user,
+                body_weight=80.0,
+                body_fat=20.0,
+                chest=100.0,
+                waist=Waist.objects.create(waist=90.0, above_below=1),
+                date=timezone.now()
+            )
+        with patch('django.db.models.query.QuerySet.select_related', lambda qs, *fields: qs), \
+                self.assertLogs('fitme95.queries', level='WARNING') as logs:
+            self.client.get(reverse('get_measurements'))
+        self.assertTrue(any('Possible N+1 in get_measurements' in line for line in logs.output))
+
+    # Test that statements over the slow threshold are logged
+    def test_slow_query_is_logged(self):
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0), \
+                self.assertLogs('fitme95.queries', level='WARNING') as logs:
+            self.client.get(reverse('get_measurements'))
+        self.assertTrue(any('Slow query in get_measurements' in line for line in logs.output))
@@ -0,0 +1,140 @@
+from django.core.cache import cache
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..db.routers import ReplicaRouter, use_primary
+from ..models.measurement import Measurement, Waist
+from ..models.user import CustomUser
+from ..models.user_profile import UserProfile
+
+REPLICA = 'replica_0'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTest(APITestCase):
+    """
+    Runs against two independent SQLite databases: the test ``default`` as primary and an
+    in-memory stand-in replica, so every read shows which of them served it.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # The replica is registered only for this class and after TestCase wrapped its
+        # databases, so it sits outside the test transaction and tearDown empties it
+        super().setUpClass()
+        connections.settings[REPLICA] = connections.configure_settings({
+            'default': connections.settings['default'],
+            REPLICA: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+        })[REPLICA]
+        cls.databases = cls.databases | {REPLICA}
+        with connections[REPLICA].schema_editor() as editor:
+            for model in (CustomUser, UserProfile, Waist, Measurement):
+                editor.create_model(model)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        cls.databases = cls.databases - {REPLICA}
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        for alias in ('default', REPLICA):
+            self.user = CustomUser.objects.db_manager(alias).create_user(
+                google_id="replica_google_id", email="replica@example.com"
+            )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+        # Only the replica has this row, so seeing it proves the read was served by the replica
+        Measurement.objects.using(REPLICA).create(
+            user=self.user,
+            body_weight=99.0,
+            body_fat=20.0,
+            chest=100.0,
+            waist=Waist.objects.using(REPLICA).create(waist=90.0, above_below=1),
+            date=timezone.now()
+        )
+        self.measurement_data = {
+            "body_weight": 75.5,
+            "body_fat": 15.0,
+            "chest": 95.0,
+            "waist": {"waist": 80.0, "above_below": 1},
+            "date": "2025-01-15T08:00:00Z"
+        }
+
+    def tearDown(self):
+        cache.clear()
+        with connections[REPLICA].cursor() as cursor:
+            for model in (Measurement, Waist, UserProfile, CustomUser):
+                cursor.execute(f'DELETE FROM {model._meta.db_table}')
+
+    def weights(self):
+        response = self.client.get(reverse('get_measurements'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [measurement['body_weight'] for measurement in response.data['data']['measurements']]
+
+    # Test that reads are served by the replica
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.weights(), [99.0])
+
+    # Test that writes go to the primary and the writer then reads their own write
+    def test_read_your_writes_after_create(self):
+        response = self.client.post(reverse('create_measurement'), self.measurement_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Measurement.objects.using('default').count(), 1)
+        self.assertEqual(Measurement.objects.using(REPLICA).count(), 1)
+
+        self.assertEqual(self.weights(), [75.5])
+
+    # Test that reads return to the replica once the sticky window is over
+    def test_stickiness_expires(self):
+        self.client.post(reverse('create_measurement'), self.measurement_data, format='json')
+        cache.clear()
+        self.assertEqual(self.weights(), [99.0])
+
+    # Test that onboarding also pins the user to the primary
+    def test_read_your_writes_after_onboarding(self):
+        response = self.client.post(
+            reverse('setup_profile'),
+            {"weight": 70.5, "height": 175.0, "dob": "18-11-01", "measurable_items": ["weight"]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get(reverse('user_info'))
+        self.assertTrue(response.data['data']['user']['is_onboarded'])
+
+    # Test that a failed write does not pin the user
+    def test_failed_write_does_not_pin(self):
+        response = self.client.post(reverse('create_measurement'), {"body_weight": "x"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.weights(), [99.0])
+
+
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_default(self):
+        self.assertEqual(self.router.db_for_read(Measurement), 'default')
+        self.assertEqual(self.router.db_for_write(Measurement), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+    def test_reads_spread_over_replicas(self):
+        chosen = {self.router.db_for_read(Measurement) for _ in range(50)}
+        self.assertEqual(chosen, {'replica_0', 'replica_1'})
+        self.assertEqual(self.router.db_for_write(Measurement), 'default')
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Measurement), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_migrations_only_run_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'fitme95'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'fitme95'))
@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..models.measurement import Measurement, Waist
+from ..models.user import CustomUser
+from ..models.user_profile import MEASURABLE_ITEMS, UserProfile
+from ..seeding import seed_fitness_data
+
+
+class SeedFitnessDataTest(TestCase):
+    # Test that every user gets a profile and a full, linked measurement history
+    def test_seed_counts_and_links(self):
+        google_ids = seed_fitness_data(users=7, measurements_per_user=12, batch_size=25, seed=3)
+        self.assertEqual(len(google_ids), 7)
+        self.assertEqual(CustomUser.objects.count(), 7)
+        self.assertEqual(UserProfile.objects.count(), 7)
+        self.assertEqual(Measurement.objects.count(), 84)
+        self.assertEqual(Waist.objects.count(), 84)
+        self.assertEqual(Measurement.objects.values('waist_id').distinct().count(), 84)
+        for user in CustomUser.objects.all():
+            self.assertEqual(user.measurements.count(), 12)
+
+    # Test that generated values stay plausible and profiles use valid measurable items
+    def test_seed_values_are_plausible(self):
+        seed_fitness_data(users=5, measurements_per_user=50, seed=1)
+        for profile in UserProfile.objects.all():
+            self.assertIn('weight', profile.measurable_items)
+            self.assertTrue(set(profile.measurable_items) <= set(MEASURABLE_ITEMS))
+        for measurement in Measurement.objects.select_related('waist'):
+            self.assertTrue(30 < measurement.body_weight < 200)
+            self.assertTrue(3 <= measurement.body_fat <= 60)
+            self.assertTrue(40 < measurement.waist.waist < 160)
+
+    # Test that the command refuses to reuse a prefix
+    def test_command_rejects_existing_prefix(self):
+        call_command('seed_fitness_data', users=2, measurements_per_user=3, prefix='dup', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('seed_fitness_data', users=2, measurements_per_user=3, prefix='dup')
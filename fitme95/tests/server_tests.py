@@ -0,0 +1,53 @@
+import io
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from fitme95_api.server import available_cpus, available_memory_mb, worker_plan
+
+
+def cgroup_files(files):
+    def fake_open(path, *args, **kwargs):
+        if path not in files:
+            raise FileNotFoundError(path)
+        return io.StringIO(files[path])
+    return mock.patch('builtins.open', fake_open)
+
+
+class WorkerPlanTest(SimpleTestCase):
+    def test_workers_from_cpus(self):
+        self.assertEqual(worker_plan('gthread', cpus=2, memory_mb=4096, worker_memory_mb=150), (5, 4))
+        self.assertEqual(worker_plan('sync', cpus=2, memory_mb=4096, worker_memory_mb=150), (5, 1))
+
+    # Test that a small memory budget caps the worker count, but never below one
+    def test_workers_capped_by_memory(self):
+        self.assertEqual(worker_plan('uvicorn', cpus=8, memory_mb=400, worker_memory_mb=150), (2, 1))
+        self.assertEqual(worker_plan('gthread', cpus=8, memory_mb=100, worker_memory_mb=150, threads=8), (1, 8))
+
+    def test_explicit_workers(self):
+        self.assertEqual(worker_plan('gthread', cpus=8, memory_mb=100, worker_memory_mb=150, workers=6), (6, 4))
+
+    def test_available_memory(self):
+        self.assertGreater(available_memory_mb(), 0)
+
+    def test_available_cpus(self):
+        self.assertGreaterEqual(available_cpus(), 1)
+
+    # Test that a cgroup CPU quota caps the CPUs the process is pinned to, rounded up
+    @mock.patch('os.sched_getaffinity', return_value=set(range(16)), create=True)
+    def test_cpus_capped_by_quota(self, _):
+        with cgroup_files({'/sys/fs/cgroup/cpu.max': '150000 100000\n'}):
+            self.assertEqual(available_cpus(), 2)
+        with cgroup_files({'/sys/fs/cgroup/cpu.max': 'max 100000\n'}):
+            self.assertEqual(available_cpus(), 16)
+        with cgroup_files({
+            '/sys/fs/cgroup/cpu/cpu.cfs_quota_us': '50000\n', '/sys/fs/cgroup/cpu/cpu.cfs_period_us': '100000\n'
+        }):
+            self.assertEqual(available_cpus(), 1)
+        with cgroup_files({}):
+            self.assertEqual(available_cpus(), 16)
+
+    @mock.patch('os.sched_getaffinity', return_value={0, 1}, create=True)
+    def test_cpus_from_affinity(self, _):
+        with cgroup_files({'/sys/fs/cgroup/cpu.max': '400000 100000\n'}):
+            self.assertEqual(available_cpus(), 2)
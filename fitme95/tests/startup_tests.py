@@ -0,0 +1,21 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..startup import LAZY_MODULES, measure_boot
+
+
+class StartupTest(SimpleTestCase):
+    # Test that booting a worker leaves the Google verification stack and the docs tooling unimported
+    def test_boot_skips_lazy_modules(self):
+        seconds, modules, imports = measure_boot()
+        self.assertGreater(seconds, 0)
+        self.assertIn('fitme95.views.auth_views', modules)
+        self.assertFalse([module for module in LAZY_MODULES if module in modules])
+        self.assertIn('fitme95_api.urls', [name for name, _, _, depth in imports if depth == 0])
+
+    def test_startup_report(self):
+        stdout = StringIO()
+        call_command('startup_report', limit=5, budget=60_000, stdout=stdout)
+        self.assertIn('Within the startup budget', stdout.getvalue())
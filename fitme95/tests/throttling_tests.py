@@ -0,0 +1,140 @@
+from unittest.mock import patch
+
+import jwt
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..models.user import CustomUser
+from ..throttling import BucketThrottle, CacheBucketStore, LocalBucketStore, get_store, take_token
+
+
+class BucketStoreTest(SimpleTestCase):
+    # Test that a bucket allows its burst, then refills at the configured rate
+    def test_take(self):
+        for store in (LocalBucketStore(), CacheBucketStore()):
+            store.clear()
+            self.assertEqual([store.take('ip:a', 60, 2, now=100.0) for _ in range(2)], [0, 0])
+            self.assertAlmostEqual(store.take('ip:a', 60, 2, now=100.0), 1.0)
+            self.assertAlmostEqual(store.take('ip:a', 60, 2, now=100.5), 0.5)
+            self.assertEqual(store.take('ip:a', 60, 2, now=101.0), 0)
+            self.assertEqual(store.take('ip:b', 60, 2, now=101.0), 0)
+            store.clear()
+
+    # Test that clearing the shared buckets leaves the rest of the cached state alone
+    def test_clear_keeps_other_caches(self):
+        caches['default'].set('replica:sticky:someone', True)
+        self.addCleanup(caches['default'].delete, 'replica:sticky:someone')
+        CacheBucketStore().take('ip:a', 60, 2, now=100.0)
+        CacheBucketStore().clear()
+        self.assertTrue(caches['default'].get('replica:sticky:someone'))
+
+
+    # Test that buckets are charged per scope and key, and unconfigured scopes or missing keys pass
+    @override_settings(AUTH_THROTTLE_RATES={'subject': (60, 1)})
+    def test_take_token(self):
+        get_store().clear()
+        self.addCleanup(get_store().clear)
+        self.assertEqual(take_token('subject', 'a'), 0)
+        self.assertGreater(take_token('subject', 'a'), 0)
+        self.assertEqual(take_token('subject', 'b'), 0)
+        self.assertEqual(take_token('subject', None), 0)
+        self.assertEqual(take_token('ip', 'a'), 0)
+
+    # Test that a throttle must say which bucket a request charges
+    def test_throttle_needs_key(self):
+        class Unkeyed(BucketThrottle):
+            scope = 'ip'
+
+        with self.assertRaises(TypeError):
+            Unkeyed()
+
+
+@override_settings(AUTH_THROTTLE_RATES={'ip': (60, 2), 'subject': (60, 1)})
+class AuthThrottleTest(APITestCase):
+    def setUp(self):
+        get_store().clear()
+        self.addCleanup(get_store().clear)
+        self.user = CustomUser.objects.create_user(google_id="throttle_google_id", email="throttle@example.com")
+
+    # Test that a client IP gets its burst of logins, then 429 in the usual envelope
+    @override_settings(AUTH_THROTTLE_RATES={'ip': (60, 2)})
+    @patch('google.oauth2.id_token.verify_firebase_token')
+    def test_login_throttled_per_ip(self, mock_verify_firebase_token):
+        mock_verify_firebase_token.return_value = {
+            'sub': 'throttle_google_id', 'email': 'throttle@example.com', 'name': 'Throttle User',
+            'given_name': 'Throttle', 'family_name': 'User',
+        }
+        statuses = [
+            self.client.post(reverse('login'), {'id': 'fake_token'}, REMOTE_ADDR='10.0.0.1').status_code
+            for _ in range(3)
+        ]
+        self.assertEqual(statuses, [status.HTTP_200_OK, status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS])
+        self.assertEqual(mock_verify_firebase_token.call_count, 2)
+
+        response = self.client.post(reverse('login'), {'id': 'fake_token'}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response.data['status']['errorCode'], 'throttled')
+        self.assertEqual(response.data['status']['errors'], {'retry_after': 1})
+
+        response = self.client.post(reverse('login'), {'id': 'fake_token'}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    # Test that forged tokens naming an account, from any number of spoofed IPs, cannot lock that account out
+    @patch('google.oauth2.id_token.verify_firebase_token')
+    def test_forged_tokens_do_not_lock_account_out(self, mock_verify_firebase_token):
+        forged = jwt.encode({'sub': 'throttle_google_id'}, 'not-google', algorithm='HS256')
+
+        def verify(token, request):
+            if token == forged:
+                raise ValueError("Could not verify token signature")
+            return {
+                'sub': 'throttle_google_id', 'email': 'throttle@example.com', 'name': 'Throttle User',
+                'given_name': 'Throttle', 'family_name': 'User',
+            }
+        mock_verify_firebase_token.side_effect = verify
+
+        statuses = [
+            self.client.post(
+                reverse('login'), {'id': forged}, REMOTE_ADDR='10.0.2.1', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}'
+            ).status_code
+            for i in range(4)
+        ]
+        # X-Forwarded-For is not trusted without NUM_PROXIES, so the spoofed addresses share one bucket
+        self.assertEqual(statuses, [status.HTTP_401_UNAUTHORIZED] * 2 + [status.HTTP_429_TOO_MANY_REQUESTS] * 2)
+
+        response = self.client.post(reverse('login'), {'id': 'real_token'}, REMOTE_ADDR='10.0.2.9')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The verified logins do count against the account
+        response = self.client.post(reverse('login'), {'id': 'real_token'}, REMOTE_ADDR='10.0.2.10')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    # Test that behind trusted proxies the client IP comes from X-Forwarded-For
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    @patch('google.oauth2.id_token.verify_firebase_token', side_effect=ValueError("invalid"))
+    def test_ip_from_trusted_proxy(self, mock_verify_firebase_token):
+        def login(client_ip):
+            return self.client.post(
+                reverse('login'), {'id': 'token'}, REMOTE_ADDR='10.0.3.1', HTTP_X_FORWARDED_FOR=f'1.2.3.4, {client_ip}'
+            ).status_code
+        self.assertEqual([login('192.0.2.1') for _ in range(3)], [401, 401, 429])
+        self.assertEqual(login('192.0.2.2'), status.HTTP_401_UNAUTHORIZED)
+
+    # Test that refreshes are limited per user across IPs and forged tokens do not count against them
+    def test_refresh_throttled_per_subject(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        response = self.client.post(reverse('refresh_token'), {'refresh': refresh}, REMOTE_ADDR='10.0.1.1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        refresh = response.data['data']['refresh_token']
+
+        forged = refresh[:-4] + ('AAAA' if not refresh.endswith('AAAA') else 'BBBB')
+        response = self.client.post(reverse('refresh_token'), {'refresh': forged}, REMOTE_ADDR='10.0.1.2')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(reverse('refresh_token'), {'refresh': refresh}, REMOTE_ADDR='10.0.1.3')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
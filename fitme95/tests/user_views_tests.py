@@ -1,7 +1,11 @@
+import threading
+
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test import TransactionTestCase
 from rest_framework import status
 from rest_framework.reverse import reverse
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from unittest.mock import patch
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -56,6 +60,7 @@ class SetupUserProfileTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data["status"]["message"], "User Profile Setup Completed")
         self.assertIn("data", response.data)
+        self.assertNotIn("created_at", response.data["data"])
 
         # Verify saved data
         profile = UserProfile.objects.get(user=self.user)
@@ -159,9 +164,9 @@ class SetupUserProfileTests(APITestCase):
         self.assertEqual(profile.height, 170.0)  # Original value preserved
 
     # Test handling of database integrity errors
-    @patch("fitme95.models.user_profile.UserProfile.objects.get")
-    def test_database_integrity_error_returns_500(self, mock_get):
-        mock_get.side_effect = IntegrityError("Test Integrity Error")
+    @patch("fitme95.views.user_views.upsert")
+    def test_database_integrity_error_returns_500(self, mock_upsert):
+        mock_upsert.side_effect = IntegrityError("Test Integrity Error")
         response = self.client.post(self.onboarding_url, self.valid_data, format="json")
         self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
         self.assertEqual(response.data["status"]["message"],
@@ -188,3 +193,40 @@ class SetupUserProfileTests(APITestCase):
         response = self.client.post(self.onboarding_url, invalid_measurements_data, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("errors", response.data["status"])
+
+    # Test that a partial update cannot create an incomplete profile
+    def test_partial_data_without_profile_returns_400(self):
+        response = self.client.post(self.onboarding_url, {"weight": 62.5}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("height", response.data["status"]["errors"])
+        self.assertFalse(UserProfile.objects.filter(user=self.user).exists())
+
+
+class ConcurrentOnboardingTests(TransactionTestCase):
+    # Test that parallel onboarding calls of one user create one profile without errors
+    def test_parallel_onboarding(self):
+        user = CustomUser.objects.create(google_id="parallel_google_id", email="parallel@example.com")
+        token = RefreshToken.for_user(user).access_token
+        data = {"weight": 70.5, "height": 175.0, "dob": "18-11-01", "measurable_items": ["weight"]}
+        threads_count = 8
+        barrier = threading.Barrier(threads_count)
+        statuses = []
+
+        def onboard(weight):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            barrier.wait()
+            try:
+                statuses.append(client.post(reverse("setup_profile"), dict(data, weight=weight), format="json").status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=onboard, args=(60.0 + i,)) for i in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [200] * (threads_count - 1) + [201])
+        profile = UserProfile.objects.get(user=user)
+        self.assertIn(profile.weight, [60.0 + i for i in range(threads_count)])
@@ -0,0 +1,137 @@
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+
+def refill(tokens, updated, now, per_minute, burst):
+    return min(burst, tokens + (now - updated) * per_minute / 60)
+
+
+class LocalBucketStore:
+    """
+    Token buckets in this process's memory. Each worker process limits on its own, so the
+    effective limit is the configured one times the number of processes.
+    """
+    max_buckets = 100_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, per_minute, burst, now):
+        """
+        Take a token from ``key``'s bucket. Returns 0 when one was available, else the seconds
+        until one will be.
+        """
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = refill(tokens, updated, now, per_minute, burst)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._prune(now)
+            return (1 - tokens) * 60 / per_minute
+
+    def _prune(self, now):
+        # Buckets untouched for an hour are full again for any sensible rate, like missing ones
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < 3600}
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Token buckets in the ``AUTH_THROTTLE_CACHE`` cache, shared by every process using it. The
+    read-modify-write is not atomic, so concurrent requests of one client may both get the last token.
+    """
+
+    def take(self, key, per_minute, burst, now):
+        cache = caches[settings.AUTH_THROTTLE_CACHE]
+        tokens, updated = cache.get(f'throttle:{key}', (burst, now))
+        tokens = refill(tokens, updated, now, per_minute, burst)
+        allowed = tokens >= 1
+        # Expire once the bucket would be full again anyway
+        cache.set(f'throttle:{key}', (tokens - 1 if allowed else tokens, now), timeout=int(burst * 60 / per_minute) + 1)
+        return 0 if allowed else (1 - tokens) * 60 / per_minute
+
+    def clear(self):
+        # Empties the whole cache, which is why AUTH_THROTTLE_CACHE must not be shared with anything else
+        caches[settings.AUTH_THROTTLE_CACHE].clear()
+
+
+@cache
+def get_store():
+    return import_string(settings.AUTH_THROTTLE_STORE)()
+
+
+def take_token(scope, key):
+    """
+    Take a token from ``key``'s bucket under ``AUTH_THROTTLE_RATES[scope]``, given as (tokens
+    refilled per minute, burst). Returns 0 when one was available, else the seconds until one will
+    be. A scope missing from the setting, or a missing key, is not throttled.
+    """
+    rate = settings.AUTH_THROTTLE_RATES.get(scope)
+    if not rate or not key:
+        return 0
+    return get_store().take(f'{scope}:{key}', *rate, now=time.time())
+
+
+class BucketThrottle(BaseThrottle, metaclass=ABCMeta):
+    """
+    DRF throttle over ``take_token`` for ``scope``, keyed by ``get_key``.
+    """
+    scope = None
+
+    @abstractmethod
+    def get_key(self, request):
+        """
+        The bucket to charge for ``request``, or None to let it through.
+        """
+
+    def allow_request(self, request, view):
+        self.retry_after = take_token(self.scope, self.get_key(request))
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
+
+
+class IPThrottle(BucketThrottle):
+    """
+    Per client IP, taken from ``X-Forwarded-For`` only as far as ``NUM_PROXIES`` trusted proxies
+    vouch for it; entries further left are whatever the client sent.
+    """
+    scope = 'ip'
+
+    def get_key(self, request):
+        return self.get_ident(request)
+
+
+class RefreshSubjectThrottle(BucketThrottle):
+    """
+    Per user, from the refresh token. Only the signature is checked, which is a cheap HMAC, so a
+    forged token cannot use up somebody else's budget.
+    """
+    scope = 'subject'
+
+    def get_key(self, request):
+        refresh = request.data.get('refresh')
+        if not isinstance(refresh, str):
+            return None
+        try:
+            return UntypedToken(refresh).get(api_settings.USER_ID_CLAIM)
+        except TokenError:
+            return None
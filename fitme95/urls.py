@@ -1,8 +1,8 @@
 from django.urls import path
 from .views import measurement_views
-from .views import auth_views, user_views
+from .views import auth_views, event_views, job_views, user_views
 from .views.auth_views import CustomTokenRefreshView
-from .views import health_check
+from .views import health_check, metrics, openapi_schema
 
 urlpatterns = [
     # Measurement
@@ -10,6 +10,10 @@ urlpatterns = [
     path('measurements', measurement_views.get_measurements, name='get_measurements'),
     path('measurements/update/<int:measurement_id>', measurement_views.update_measurement, name='update_measurement'),
     path('measurements/delete/<int:measurement_id>', measurement_views.delete_measurement, name='delete_measurement'),
+    path('measurements/history', measurement_views.get_measurement_history, name='get_measurement_history'),
+    path('measurements/series/create', measurement_views.record_metric_values, name='record_metric_values'),
+    path('measurements/series', measurement_views.get_metric_values, name='get_metric_values'),
+    path('measurements/series/<str:metric>', measurement_views.get_metric_series, name='get_metric_series'),
 
     # Authentication
     path('login', auth_views.google_login, name='login'),
@@ -17,6 +21,16 @@ urlpatterns = [
     path('refresh-token', CustomTokenRefreshView.as_view(), name='refresh_token'),
 
     path('onboarding', user_views.setup_user_profile, name='setup_profile'),
+    path('account', user_views.delete_account, name='delete_account'),
+
+    # Change notifications for other devices, served by the ASGI app
+    path('events', event_views.measurement_events, name='events'),
+
+    # Background jobs
+    path('jobs', job_views.list_jobs, name='list_jobs'),
+    path('jobs/<int:job_id>', job_views.job_status, name='job_status'),
 
     path('health', health_check, name='health_check'),
+    path('metrics', metrics, name='metrics'),
+    path('openapi.json', openapi_schema, name='openapi-schema'),
 ]
@@ -1,4 +1,10 @@
+import math
+
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import Throttled
 from rest_framework.response import Response
+from rest_framework.views import exception_handler
 
 
 def fm_response(status_code, message, data=None, error_code=None, errors=None):
@@ -21,3 +27,40 @@ def fm_response(status_code, message, data=None, error_code=None, errors=None):
         },
         "data": data
     }, status=status_code)
+
+
+def fm_json_response(status_code, message, data=None, error_code=None, errors=None):
+    """
+    ``fm_response`` as a plain ``JsonResponse``, for code that answers outside DRF's rendering:
+    async views and middleware.
+    """
+    return JsonResponse({
+        "status": {
+            "statusCode": status_code,
+            "errorCode": error_code,
+            "message": message,
+            "errors": errors
+        },
+        "data": data
+    }, status=status_code)
+
+
+def throttled_response(wait):
+    retry_after = math.ceil(wait or 0)
+    response = fm_response(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        message="Too many requests, try again later",
+        error_code='throttled',
+        errors={'retry_after': retry_after}
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def fm_exception_handler(exc, context):
+    """
+    DRF's exception handler, except that throttled requests get the ``fm_response`` envelope.
+    """
+    if isinstance(exc, Throttled):
+        return throttled_response(exc.wait)
+    return exception_handler(exc, context)
@@ -1,4 +1,43 @@
-from django.http import HttpResponse
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+from ..instrumentation.metrics import registry
+from ..openapi import load_schema
+
 
 def health_check(request):
     return HttpResponse(status=200)
+
+
+def metrics(request):
+    """
+    The Prometheus exposition, for scrapers sending ``Authorization: Bearer <METRICS_TOKEN>``.
+    It names every route and reports error rates and database load, so it is never public.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404("Metrics are disabled; set METRICS_TOKEN to scrape them")
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer realm="metrics"'
+        return response
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def openapi_schema(request):
+    try:
+        content, etag = load_schema()
+    except FileNotFoundError:
+        raise Http404("The API schema was not built; run `manage.py build_openapi_schema`")
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.OPENAPI_CACHE_SECONDS)
+    return response
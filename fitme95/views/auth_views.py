@@ -1,24 +1,29 @@
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
-from google.auth.transport import requests
-from google.oauth2 import id_token
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework_simplejwt.tokens import AccessToken
 from django.db.utils import IntegrityError
+from django.utils import timezone
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from ..coalescing import single_flight
 from ..models.user import CustomUser
 from ..models.user_profile import UserProfile
 from ..serializers.user_profile_serializer import UserProfileSerializer
-from ..utils import fm_response
+from ..db.routers import remember_write
+from ..db.upsert import upsert
+from ..instrumentation.queries import query_budget
+from ..throttling import IPThrottle, RefreshSubjectThrottle, take_token
+from ..utils import fm_response, throttled_response
 
 
+@query_budget(6)
 @swagger_auto_schema(
     method='post',
     operation_description="Login a user using a Google ID token. Returns access & refresh tokens.",
@@ -34,11 +39,13 @@ from ..utils import fm_response
         201: "User created and login successful",
         400: "Bad request (e.g. missing ID token)",
         401: "Invalid token or authentication failed",
+        403: "Account is being deleted",
         500: "Internal server or database error"
     }
 )
 @api_view(['POST'])
 @permission_classes([])
+@throttle_classes([IPThrottle])
 def google_login(request):
     try:
         id_token_received = request.data.get('id')
@@ -49,7 +56,10 @@ def google_login(request):
                 message="ID Token is required"
             )
 
-        # Validate token with Firebase
+        # Validate token with Firebase. The Google stack is imported on first use to keep it out of worker boot
+        from google.auth.transport import requests
+        from google.oauth2 import id_token
+
         try:
             google_info = id_token.verify_firebase_token(id_token_received, requests.Request())
         except ValueError as e:
@@ -62,6 +72,12 @@ def google_login(request):
         # Extract user info
         email = google_info.get('email')
         google_id = google_info.get('sub')
+
+        # Per account, charged only once the token proved the account is the caller's: keyed on the
+        # unverified claim, forged tokens naming somebody else's account would lock that account out
+        wait = take_token('subject', google_id)
+        if wait:
+            return throttled_response(wait)
         full_name = google_info.get('name')
 
         # Get first and last name
@@ -83,15 +99,27 @@ def google_login(request):
         try:
             # Atomic transaction to avoid partial updates
             with transaction.atomic():
-                user, created = CustomUser.objects.get_or_create(
-                    google_id=google_id,
-                    defaults={
+                # Create the user or refresh the name and email Google reports, in one statement
+                user, created = upsert(
+                    CustomUser,
+                    {
+                        "google_id": google_id,
                         "first_name": first_name,
                         "last_name": last_name,
-                        "email": email
-                    }
+                        "email": email,
+                        "date_joined": timezone.now(),
+                    },
+                    conflict_fields=["google_id"],
+                    update_fields=["first_name", "last_name", "email"],
+                    created_field="date_joined",
                 )
 
+                if not user.is_active:
+                    return fm_response(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        message="This account is being deleted"
+                    )
+
                 # Generate authentication token
                 token = RefreshToken.for_user(user)
 
@@ -105,6 +133,10 @@ def google_login(request):
                 # Token Expiry Time in Milliseconds
                 token_expiry_ms = int(token.access_token.lifetime.total_seconds() * 1000)
 
+            if created:
+                # The new user authenticates with the returned token right away; keep those reads off lagging replicas
+                remember_write(user.pk)
+
             status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
             return fm_response(
                 status_code=status_code,
@@ -146,6 +178,8 @@ def google_login(request):
         )
 
 
+@single_flight
+@query_budget(2)
 @swagger_auto_schema(
     method='get',
     operation_description="Fetch current authenticated user profile information.",
@@ -221,6 +255,8 @@ def user_info(request):
     }
 )
 class CustomTokenRefreshView(TokenRefreshView):
+    throttle_classes = [IPThrottle, RefreshSubjectThrottle]
+
     def post(self, request, *args, **kwargs):
         try:
             # Check if refresh token is provided
@@ -233,7 +269,8 @@ class CustomTokenRefreshView(TokenRefreshView):
 
             try:
                 response = super().post(request, *args, **kwargs)
-            except TokenError as e:
+            except (TokenError, AuthenticationFailed) as e:
+                # AuthenticationFailed: the token is fine but its user was deactivated or deleted
                 return fm_response(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     message="Invalid or expired refresh token",
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+
+from ..events import get_broker
+from ..instrumentation.queries import query_budget
+from ..utils import fm_json_response
+
+
+def _authenticate(request):
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        if result is not None:
+            return result[0]
+    return None
+
+
+async def _stream(user_id):
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment lines keep proxies and load balancers from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@query_budget(1)
+async def measurement_events(request):
+    """
+    Server-sent events announcing the user's measurement and profile changes made on any device,
+    so clients refetch when told to instead of polling. Authenticated like the rest of the API.
+    """
+    if request.method != 'GET':
+        return fm_json_response(status.HTTP_405_METHOD_NOT_ALLOWED, f'Method "{request.method}" not allowed.')
+    if not hasattr(request, 'scope'):
+        # Under WSGI every open stream would hold a worker thread for as long as it stays open
+        return fm_json_response(status.HTTP_501_NOT_IMPLEMENTED, "Event streams are only served by the ASGI application")
+
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return fm_json_response(status.HTTP_401_UNAUTHORIZED, "Authentication credentials were not provided or are invalid")
+
+    return StreamingHttpResponse(
+        _stream(user.pk),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
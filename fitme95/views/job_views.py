@@ -0,0 +1,39 @@
+from rest_framework import status
+from rest_framework.decorators import api_view
+
+from ..models.job import Job
+from ..serializers.job_serializer import JobSerializer
+from ..instrumentation.queries import query_budget
+from ..utils import fm_response
+
+RECENT_JOBS = 20
+
+
+@query_budget(2)
+@api_view(['GET'])
+def list_jobs(request):
+    jobs = Job.objects.filter(user=request.user).order_by('-created_at', '-id')[:RECENT_JOBS]
+    return fm_response(
+        status_code=status.HTTP_200_OK,
+        message="Your recent jobs",
+        data={'jobs': JobSerializer(instance=jobs, many=True).data}
+    )
+
+
+@query_budget(2)
+@api_view(['GET'])
+def job_status(request, job_id):
+    try:
+        job = Job.objects.get(id=job_id, user=request.user)
+    except Job.DoesNotExist as e:
+        return fm_response(
+            status_code=status.HTTP_404_NOT_FOUND,
+            message="Job not found",
+            errors=str(e)
+        )
+
+    return fm_response(
+        status_code=status.HTTP_200_OK,
+        message=f"Job is {job.status}",
+        data={'job': JobSerializer(instance=job).data}
+    )
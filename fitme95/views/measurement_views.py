@@ -1,12 +1,28 @@
+from datetime import datetime, time, timedelta
+
 from rest_framework.decorators import api_view
 from rest_framework import status
-from ..models.measurement import Measurement
-from ..serializers.measurement_serializer import MeasurementSerializer
+from ..archival import archive_horizon
+from ..chunks import append_measurement, chunk_year, downsample, mark_stale
+from ..coalescing import single_flight
+from ..events import notify
+from ..idempotency import idempotent
+from ..models.measurement import SERIES_METRICS, Measurement, MeasurementArchive, MetricValue, Waist
+from ..serializers.measurement_serializer import (
+    ArchivedMeasurementSerializer, MeasurementSerializer, MetricValuesSerializer
+)
+from django.db import transaction
+from django.db.models import F, Max, Q
 from django.db.utils import IntegrityError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from ..instrumentation.queries import query_budget
 from ..utils import fm_response
 
 
+@query_budget(9)
 @api_view(['POST'])
+@idempotent
 def create_measurement(request):
     if not request.data:
         return fm_response(
@@ -18,7 +34,10 @@ def create_measurement(request):
 
     if serializer.is_valid():
         try:
-            serializer.save(user=request.user)
+            with transaction.atomic():
+                serializer.save(user=request.user)
+                append_measurement(serializer.instance)
+                notify(request.user, 'measurement.created', id=serializer.instance.id)
             return fm_response(
                 message="Measurement created successfully",
                 data={'measurement': serializer.data},
@@ -38,22 +57,82 @@ def create_measurement(request):
     )
 
 
+def _parse_bound(value):
+    """
+    Parse an ISO 8601 date or datetime query parameter into ``(aware datetime, is_bare_date)``.
+    Raises ``ValueError`` on anything else.
+    """
+    moment = parse_datetime(value)
+    is_date = moment is None
+    if is_date:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, is_date
+
+
+def _date_filters(params):
+    """
+    Turn the optional ``from`` and ``to`` query parameters into filters on ``date``.
+    Raises ``ValueError`` when either is malformed.
+    """
+    filters = {}
+    if params.get('from'):
+        filters['date__gte'], _ = _parse_bound(params['from'])
+    if params.get('to'):
+        end, is_date = _parse_bound(params['to'])
+        # A bare date as the upper bound covers that whole day
+        if is_date:
+            filters['date__lt'] = end + timedelta(days=1)
+        else:
+            filters['date__lte'] = end
+    return filters
+
+
+def _invalid_range():
+    return fm_response(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        message="'from' and 'to' must be ISO 8601 dates or datetimes"
+    )
+
+
+@single_flight
+@query_budget(3)
 @api_view(['GET'])
 def get_measurements(request):
     try:
-        measurements = Measurement.objects.filter(user=request.user)
-        if not measurements.exists():
+        filters = _date_filters(request.GET)
+    except ValueError:
+        return _invalid_range()
+
+    try:
+        # Join the waist in the same query, otherwise WaistSerializer issues one query per measurement.
+        # Bounding by date lets a partitioned table skip the partitions outside the range
+        measurements = list(Measurement.objects.filter(user=request.user, **filters).select_related('waist'))
+        data = MeasurementSerializer(instance=measurements, many=True).data
+        # Archived rows are all older than the horizon; ranges starting after it never need the archive
+        needs_archive = 'date__gte' not in filters or filters['date__gte'] < archive_horizon()
+        if request.user.has_archived_measurements and needs_archive:
+            archived = MeasurementArchive.objects.filter(user=request.user, **filters)
+            data = sorted(
+                ArchivedMeasurementSerializer(instance=archived, many=True).data + data,
+                key=lambda measurement: measurement['id']
+            )
+
+        if not data:
             return fm_response(
                 status_code=status.HTTP_200_OK,
                 message="No measurements found. Please add a measurement",
                 data={'measurements': []},
             )
 
-        serializer = MeasurementSerializer(instance=measurements, many=True)
         return fm_response(
             status_code=status.HTTP_200_OK,
             message="Your measurements",
-            data={'measurements': serializer.data}
+            data={'measurements': data}
         )
 
     except Exception as e:
@@ -64,52 +143,98 @@ def get_measurements(request):
         )
 
 
+@query_budget(9)
 @api_view(['PUT'])
+@idempotent
 def update_measurement(request, measurement_id):
+    """
+    Partially update a measurement. Only the fields sent are written, with one conditional UPDATE
+    per table in a single transaction. A client sending the ``version`` it last read gets a 409 with
+    the current measurement when the measurement changed since, instead of overwriting that change.
+    """
     if not request.data:
         return fm_response(
             status_code=status.HTTP_400_BAD_REQUEST,
             message="No data provided"
         )
 
-    try:
-        measurement = Measurement.objects.get(id=measurement_id, user=request.user)
-    except Measurement.DoesNotExist as e:
+    serializer = MeasurementSerializer(data=request.data, partial=True)
+    version = request.data.get('version')
+    if version is not None:
+        try:
+            version = int(version)
+        except (TypeError, ValueError):
+            return fm_response(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                message="Invalid measurement data",
+                errors={'version': ['A valid integer is required.']}
+            )
+
+    if not serializer.is_valid():
         return fm_response(
-            status_code=status.HTTP_404_NOT_FOUND,
-            message="Measurement not found",
-            errors=str(e)
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Invalid measurement data",
+            errors=serializer.errors
         )
 
-    serializer = MeasurementSerializer(measurement, data=request.data, partial=True)
+    changes = dict(serializer.validated_data)
+    waist_changes = changes.pop('waist', None)
+    rows = Measurement.objects.filter(id=measurement_id, user=request.user)
+    if version is not None:
+        rows = rows.filter(version=version)
 
-    if serializer.is_valid():
-        try:
-            serializer.save()
-            return fm_response(
-                status_code=status.HTTP_200_OK,
-                message="Measurement updated successfully",
-                data={'measurement': serializer.data}
-            )
-        except IntegrityError as e:
-            return fm_response(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                message="Database error occurred while updating measurement",
-                errors=str(e)
+    try:
+        with transaction.atomic():
+            updated = rows.update(version=F('version') + 1, **changes)
+            if updated and waist_changes:
+                Waist.objects.filter(measurement__id=measurement_id).update(**waist_changes)
+            measurement = (
+                Measurement.objects.select_related('waist').filter(id=measurement_id, user=request.user).first()
             )
+            if updated:
+                # A moved date may leave the old year's chunk behind, and that year is unknown by now
+                mark_stale(request.user, None if 'date' in changes else [chunk_year(measurement.date)])
+                notify(request.user, 'measurement.updated', id=measurement_id, version=measurement.version)
+    except IntegrityError as e:
+        return fm_response(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            message="Database error occurred while updating measurement",
+            errors=str(e)
+        )
 
+    if measurement is None:
+        return fm_response(
+            status_code=status.HTTP_404_NOT_FOUND,
+            message="Measurement not found"
+        )
+    if not updated:
+        return fm_response(
+            status_code=status.HTTP_409_CONFLICT,
+            message="Measurement was changed by another request",
+            data={'measurement': MeasurementSerializer(measurement).data}
+        )
     return fm_response(
-        status_code=status.HTTP_400_BAD_REQUEST,
-        message="Invalid measurement data",
-        errors=serializer.errors
+        status_code=status.HTTP_200_OK,
+        message="Measurement updated successfully",
+        data={'measurement': MeasurementSerializer(measurement).data}
     )
 
 
+@query_budget(8)
 @api_view(['DELETE'])
 def delete_measurement(request, measurement_id):
     try:
         measurement = Measurement.objects.get(id=measurement_id, user=request.user)
     except Measurement.DoesNotExist as e:
+        # Archived measurements keep their id, so they can still be deleted through the same URL
+        archived = MeasurementArchive.objects.filter(id=measurement_id, user=request.user)
+        if request.user.has_archived_measurements and archived.delete()[0]:
+            mark_stale(request.user)
+            notify(request.user, 'measurement.deleted', id=measurement_id)
+            return fm_response(
+                status_code=status.HTTP_200_OK,
+                message="Measurement deleted successfully"
+            )
         return fm_response(
             status_code=status.HTTP_404_NOT_FOUND,
             message="Measurement not found",
@@ -117,7 +242,20 @@ def delete_measurement(request, measurement_id):
         )
 
     try:
-        measurement.delete()
+        with transaction.atomic():
+            # Open with the write: SQLite cannot upgrade a transaction that read first to a writer
+            # once another one writes, and fails at once with "database is locked" instead of waiting
+            deleted, _ = Measurement.objects.filter(id=measurement_id, user=request.user).delete()
+            if deleted:
+                Waist.objects.filter(id=measurement.waist_id).delete()
+                mark_stale(request.user, [chunk_year(measurement.date)])
+                notify(request.user, 'measurement.deleted', id=measurement_id)
+        if not deleted:
+            # Deleted by a concurrent request since it was read
+            return fm_response(
+                status_code=status.HTTP_404_NOT_FOUND,
+                message="Measurement not found"
+            )
         return fm_response(
             status_code=status.HTTP_200_OK,
             message="Measurement deleted successfully"
@@ -128,3 +266,133 @@ def delete_measurement(request, measurement_id):
             message="Failed to delete measurement",
             errors=str(e)
         )
+
+
+@query_budget(9)
+@api_view(['POST'])
+@idempotent
+def record_metric_values(request):
+    serializer = MetricValuesSerializer(data=request.data)
+    if not serializer.is_valid():
+        return fm_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Invalid measurement data",
+            errors=serializer.errors
+        )
+
+    try:
+        serializer.save(user=request.user)
+    except IntegrityError as e:
+        return fm_response(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            message="Database error occurred while saving measurement",
+            errors=str(e)
+        )
+    return fm_response(
+        status_code=status.HTTP_201_CREATED,
+        message="Measurement created successfully",
+        data={'measurement': serializer.data}
+    )
+
+
+def _blank_measurement(user, date):
+    # A moment with series values only, in the shape of a measurement with nothing else recorded
+    blank = dict.fromkeys(MeasurementSerializer().fields)
+    blank.update(date=MeasurementSerializer().fields['date'].to_representation(date), user=user.pk)
+    return blank
+
+
+@query_budget(4)
+@api_view(['GET'])
+def get_metric_values(request):
+    """
+    Series values pivoted to one row per moment, in the shape of ``GET /measurements``: the
+    measurement taken at that moment, or one with every field null, plus one key per metric, null
+    when not recorded then. ``metrics`` narrows the comma-separated set.
+    """
+    metrics = request.GET['metrics'].split(',') if request.GET.get('metrics') else SERIES_METRICS
+    invalid_metrics = [metric for metric in metrics if metric not in SERIES_METRICS]
+    if invalid_metrics:
+        return fm_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message=f"Invalid metrics: {', '.join(invalid_metrics)}"
+        )
+    try:
+        filters = _date_filters(request.GET)
+    except ValueError:
+        return _invalid_range()
+
+    # Pivot in the database: one aggregate per metric over the rows sharing a date
+    rows = list(
+        MetricValue.objects.filter(user=request.user, metric__in=metrics, **filters)
+        .values('date')
+        .annotate(**{metric: Max('value', filter=Q(metric=metric)) for metric in metrics})
+        .order_by('date')
+    )
+    dates = [row.pop('date') for row in rows]
+    taken = {}
+    if dates:
+        measurements = Measurement.objects.filter(user=request.user, date__in=dates).select_related('waist')
+        taken.update((measurement.date, MeasurementSerializer(measurement).data) for measurement in measurements)
+        missing = [date for date in dates if date not in taken]
+        if missing and request.user.has_archived_measurements:
+            archived = MeasurementArchive.objects.filter(user=request.user, date__in=missing)
+            taken.update((measurement.date, ArchivedMeasurementSerializer(measurement).data) for measurement in archived)
+
+    data = [
+        {**(taken.get(date) or _blank_measurement(request.user, date)), **row} for date, row in zip(dates, rows)
+    ]
+    return fm_response(
+        status_code=status.HTTP_200_OK,
+        message="Your measurements" if data else "No measurements found. Please add a measurement",
+        data={'measurements': data}
+    )
+
+
+@query_budget(2)
+@api_view(['GET'])
+def get_metric_series(request, metric):
+    if metric not in SERIES_METRICS:
+        return fm_response(
+            status_code=status.HTTP_404_NOT_FOUND,
+            message="Metric not found"
+        )
+    try:
+        filters = _date_filters(request.GET)
+    except ValueError:
+        return _invalid_range()
+
+    values = list(
+        MetricValue.objects.filter(user=request.user, metric=metric, **filters)
+        .order_by('date').values('date', 'value')
+    )
+    return fm_response(
+        status_code=status.HTTP_200_OK,
+        message="Your measurements" if values else "No measurements found. Please add a measurement",
+        data={'metric': metric, 'values': values}
+    )
+
+
+@query_budget(4)
+@api_view(['GET'])
+def get_measurement_history(request):
+    """
+    The user's whole history averaged per ``days``-day bucket (default 7), for charts and exports
+    spanning years. Served from packed chunks when ``MEASUREMENT_CHUNKS`` is on.
+    """
+    try:
+        days = int(request.GET.get('days', 7))
+        if not 1 <= days <= 366:
+            raise ValueError(days)
+    except ValueError:
+        return fm_response(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="'days' must be a whole number from 1 to 366"
+        )
+
+    data = downsample(request.user, days)
+    return fm_response(
+        status_code=status.HTTP_200_OK,
+        message="Your measurements" if data else "No measurements found. Please add a measurement",
+        data={'measurements': data}
+    )
@@ -1,12 +1,19 @@
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view
 
+from ..db.upsert import upsert
+from ..events import notify
+from ..jobs import enqueue
+from ..models.user import CustomUser
 from ..models.user_profile import UserProfile
 from ..serializers.user_profile_serializer import UserProfileSerializer
+from ..instrumentation.queries import query_budget
 from ..utils import fm_response
 
 
+@query_budget(3)
 @api_view(['POST'])
 def setup_user_profile(request):
     user = request.user
@@ -18,42 +25,51 @@ def setup_user_profile(request):
         )
 
     try:
-        # Check if a profile exists
-        try:
-            user_profile = UserProfile.objects.get(user=user)
-            created = False
-        except UserProfile.DoesNotExist:
-            # For new profiles, validate all required fields
-            serializer = UserProfileSerializer(data=request.data)
-            if not serializer.is_valid():
+        serializer = UserProfileSerializer(data=request.data)
+        if serializer.is_valid():
+            # A complete profile: create it or overwrite the given fields in one statement, so
+            # concurrent submissions neither collide on the unique user nor need a prior read
+            user_profile, created = upsert(
+                UserProfile,
+                dict(serializer.validated_data, user=user, created_at=timezone.now()),
+                conflict_fields=['user'],
+                update_fields=list(serializer.validated_data),
+                created_field='created_at',
+            )
+            notify(user, 'profile.updated')
+            if created:
                 return fm_response(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    message="Invalid profile data",
-                    errors=serializer.errors
+                    status_code=status.HTTP_201_CREATED,
+                    message="User Profile Setup Completed",
+                    data=UserProfileSerializer(user_profile).data
                 )
-            # Create new profile with validated data
-            serializer.save(user=user)
             return fm_response(
-                status_code=status.HTTP_201_CREATED,
-                message="User Profile Setup Completed",
-                data=serializer.data
+                status_code=status.HTTP_200_OK,
+                message="User Profile Updated Successfully",
+                data={'profile': UserProfileSerializer(user_profile).data}
             )
 
-        if not created:
-            # If the profile already exists, update it with provided data
-            serializer = UserProfileSerializer(user_profile, data=request.data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return fm_response(
-                    status_code=status.HTTP_200_OK,
-                    message="User Profile Updated Successfully",
-                    data={'profile': serializer.data}
-                )
+        # Incomplete data can only update an existing profile
+        partial = UserProfileSerializer(data=request.data, partial=True)
+        if not partial.is_valid():
+            return fm_response(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                message="Invalid profile data",
+                errors=partial.errors,
+            )
+        if not UserProfile.objects.filter(user=user).update(**partial.validated_data):
+            # No profile yet: report what a new one is missing
             return fm_response(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 message="Invalid profile data",
-                errors=serializer.errors,
+                errors=serializer.errors
             )
+        notify(user, 'profile.updated')
+        return fm_response(
+            status_code=status.HTTP_200_OK,
+            message="User Profile Updated Successfully",
+            data={'profile': UserProfileSerializer(UserProfile.objects.get(user=user)).data}
+        )
 
     except IntegrityError as e:
         return fm_response(
@@ -67,3 +83,19 @@ def setup_user_profile(request):
             message="An error occurred while processing your request",
             errors=str(e)
         )
+
+
+@query_budget(5)
+@api_view(['DELETE'])
+def delete_account(request):
+    # The purge runs in the background in small batches; deactivating first rejects the user's
+    # tokens right away, so nothing new is written while it runs. That also leaves the caller no
+    # way to poll the job, so it runs as a system job and its id is not returned
+    with transaction.atomic():
+        CustomUser.objects.filter(pk=request.user.pk).update(is_active=False)
+        enqueue('purge_user', {'user_id': request.user.pk}, priority=5)
+
+    return fm_response(
+        status_code=status.HTTP_202_ACCEPTED,
+        message="Account scheduled for deletion"
+    )
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fitme95_api.settings')
+# Tells the settings they are served over ASGI, before get_asgi_application() loads them
+os.environ.setdefault('DJANGO_ASGI', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,68 @@
+"""
+Worker sizing for gunicorn.conf.py. Kept free of Django imports so the gunicorn master can read it
+before the app is loaded.
+"""
+import os
+
+WORKER_CLASSES = {
+    # One request per process at a time
+    'sync': ('sync', 'fitme95_api.wsgi:application'),
+    # Threads per process; requests mostly wait on the database, which releases the GIL
+    'gthread': ('gthread', 'fitme95_api.wsgi:application'),
+    # An event loop per process for the ASGI app, needed for the /events streams
+    'uvicorn': ('uvicorn.workers.UvicornWorker', 'fitme95_api.asgi:application'),
+}
+
+
+def available_memory_mb():
+    """
+    The container's memory limit from cgroup v2 or v1, else the machine's physical memory, in MiB.
+    """
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as limit:
+                value = limit.read().strip()
+        except OSError:
+            continue
+        # cgroup v1 reports "no limit" as a huge number
+        if value.isdigit() and int(value) < 1 << 50:
+            return int(value) // (1024 * 1024)
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+
+
+def available_cpus():
+    """
+    CPUs this process may use: the ones it is pinned to, further capped by a cgroup v2 or v1 CPU
+    quota rounded up, at least one. ``os.cpu_count()`` reports the host's CPUs and ignores both.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    for quota_path, period_path in (
+        ('/sys/fs/cgroup/cpu.max', None),
+        ('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', '/sys/fs/cgroup/cpu/cpu.cfs_period_us'),
+    ):
+        try:
+            with open(quota_path) as limit:
+                quota, *period = limit.read().split()
+            if period_path:
+                with open(period_path) as limit:
+                    period = limit.read().split()
+        except OSError:
+            continue
+        # "max" (v2) or -1 (v1) means no quota
+        if quota.isdigit() and period and int(period[0]) > 0:
+            cpus = min(cpus, -(-int(quota) // int(period[0])))
+        break
+    return max(1, cpus)
+
+
+def worker_plan(worker_class, cpus, memory_mb, worker_memory_mb, threads=None, workers=None):
+    """
+    Return ``(workers, threads)``: ``2 * cpus + 1`` processes, as many as ``memory_mb`` holds at
+    ``worker_memory_mb`` each, at least one; gthread workers get ``threads`` each (default 4).
+    An explicit ``workers`` count wins over both limits.
+    """
+    if workers is None:
+        workers = max(1, min(2 * cpus + 1, memory_mb // worker_memory_mb))
+    if worker_class != 'gthread':
+        return workers, 1
+    return workers, threads or 4
@@ -50,11 +50,15 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'fitme95.authentication.StickyJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'EXCEPTION_HANDLER': 'fitme95.utils.fm_exception_handler',
+    # Proxies in front of the app appending to X-Forwarded-For (Render has one); the client IP used by
+    # the throttles is read that many entries from the right. 0 ignores the header, which clients can forge
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1 if 'RENDER' in os.environ else 0)),
 }
 
 from datetime import timedelta
@@ -74,14 +78,81 @@ AUTHENTICATION_BACKENDS = [
 AUTH_USER_MODEL = "fitme95.CustomUser"
 
 MIDDLEWARE = [
+    'fitme95.middleware.probes.ProbeMiddleware',
+    'fitme95.middleware.metrics.MetricsMiddleware',
+    'fitme95.middleware.admission.AdmissionControlMiddleware',
+    'fitme95.middleware.queries.QueryInspectorMiddleware',
+    'fitme95.middleware.profiling.ProfilingMiddleware',
+    'fitme95.middleware.replicas.ReplicaPinningMiddleware',
+    'fitme95.middleware.coalescing.SingleFlightMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'fitme95.middleware.scoped.BrowserMiddleware',
+]
+
+# Only the admin is a cookie-based browser app; BrowserMiddleware runs these for its paths and
+# JWT-authenticated API calls skip them
+BROWSER_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+BROWSER_MIDDLEWARE_PATHS = ['/admin/']
+# The admin checks look for its middleware in MIDDLEWARE only; BROWSER_MIDDLEWARE provides them
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+# Admission control: a worker process answers 503 with Retry-After instead of starting a request
+# once its route class has this many requests in flight (0 = unlimited). Login and token refresh
+# (ADMISSION_AUTH_PATHS) verify tokens remotely and get a small share of the threads
+ADMISSION_LIMITS = {
+    'auth': int(os.getenv('ADMISSION_AUTH_LIMIT', 2)),
+    'write': int(os.getenv('ADMISSION_WRITE_LIMIT', 0)),
+    'read': int(os.getenv('ADMISSION_READ_LIMIT', 0)),
+}
+ADMISSION_AUTH_PATHS = ['/login', '/refresh-token']
+# Requests that waited longer than this between the proxy (X-Request-Start header) and the app are shed
+ADMISSION_MAX_QUEUE_SECONDS = float(os.getenv('ADMISSION_MAX_QUEUE_SECONDS', 5))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv('ADMISSION_RETRY_AFTER_SECONDS', 1))
+ADMISSION_EXEMPT_PATHS = ['/metrics']
+
+# Token buckets in front of login and token refresh: (tokens refilled per minute, burst), per client
+# IP and per account. LocalBucketStore limits each process on its own; fitme95.throttling.CacheBucketStore
+# shares the buckets through AUTH_THROTTLE_CACHE, which must then be shared by all processes
+AUTH_THROTTLE_RATES = {
+    'ip': (int(os.getenv('AUTH_THROTTLE_IP_PER_MINUTE', 60)), int(os.getenv('AUTH_THROTTLE_IP_BURST', 20))),
+    'subject': (int(os.getenv('AUTH_THROTTLE_SUBJECT_PER_MINUTE', 12)), int(os.getenv('AUTH_THROTTLE_SUBJECT_BURST', 6))),
+}
+AUTH_THROTTLE_STORE = os.getenv('AUTH_THROTTLE_STORE', 'fitme95.throttling.LocalBucketStore')
+AUTH_THROTTLE_CACHE = 'throttle'
+
+# How long a GET waits for an identical in-flight one (see SingleFlightMiddleware) before running itself
+SINGLE_FLIGHT_TIMEOUT_SECONDS = float(os.getenv('SINGLE_FLIGHT_TIMEOUT_SECONDS', 10))
+
+# Health probes, answered by ProbeMiddleware ahead of the rest of the stack
+LIVENESS_PATHS = ['/livez', '/health']
+READINESS_PATH = '/readyz'
+READINESS_CACHE_SECONDS = float(os.getenv('READINESS_CACHE_SECONDS', 5))
+# Fraction of the database server's connection slots in use above which the instance reports not ready
+READINESS_MAX_CONNECTION_USAGE = float(os.getenv('READINESS_MAX_CONNECTION_USAGE', 0.9))
+
+# Instrumentation
+# Directory shared by all worker processes so /metrics reports totals across them.
+# Point it at an empty directory that is wiped on every deploy; unset keeps metrics per process.
+METRICS_DIR = os.getenv('METRICS_DIR')
+# Bearer token Prometheus must send to scrape /metrics; unset turns the endpoint off (404)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+# A statement shape repeated this many times in one request is logged as a likely N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 5))
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100))
+# Profiling: requests with a signed X-Fitme95-Profile header are always eligible,
+# PROFILING_ENABLED additionally samples a fraction of all requests
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0.001))
+PROFILING_MAX_PER_MINUTE = int(os.getenv('PROFILING_MAX_PER_MINUTE', 2))
+PROFILING_TOKEN_MAX_AGE = int(os.getenv('PROFILING_TOKEN_MAX_AGE', 24 * 60 * 60))
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
 
 ROOT_URLCONF = 'fitme95_api.urls'
 
@@ -106,11 +177,27 @@ WSGI_APPLICATION = 'fitme95_api.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Set by fitme95_api/asgi.py when the app is served over ASGI (uvicorn workers)
+ASGI = os.getenv('DJANGO_ASGI', 'False') == 'True'
+# Seconds a worker thread keeps its database connection between requests (0 closes it after every
+# request); connections are checked before reuse, so a dropped one is replaced transparently.
+# Defaults to 0 under ASGI: each request runs its sync code on a thread of its own, so a kept
+# connection is never reused and stays open until the thread is gone; use DB_POOL_MAX_SIZE there
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 0 if ASGI else 60))
+# A non-zero max size serves PostgreSQL connections from a psycopg connection pool per worker
+# process instead; requires psycopg[pool] >= 3 in place of psycopg2
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 0))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+
 if os.getenv("DJANGO_DEBUG", "True") == "True":  # Default to True if not set
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # A file rather than the in-memory default: concurrent writers in tests then wait for
+            # the lock instead of failing with "database table is locked"
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         },
         # test database
         'test': {
@@ -119,10 +206,84 @@ if os.getenv("DJANGO_DEBUG", "True") == "True":  # Default to True if not set
     }
 else:
     DATABASES = {
-        'default': dj_database_url.parse(os.getenv('DATABASE_URL'))
+        'default': dj_database_url.parse(
+            os.getenv('DATABASE_URL'), conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True
+        )
 
     }
 
+# Read replicas: comma separated URLs, registered as replica_0, replica_1, ...
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        replica_url.strip(), conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True
+    )
+    # Tests run against the primary only
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+if DB_POOL_MAX_SIZE:
+    for database in DATABASES.values():
+        if database.get('ENGINE') == 'django.db.backends.postgresql':
+            # Django refuses persistent connections on top of a pool: the pool keeps them open
+            database['CONN_MAX_AGE'] = 0
+            database.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': DB_POOL_TIMEOUT,
+            }
+
+# Process-local caches; replica stickiness and shared throttle buckets need ones shared by all processes
+# (e.g. Redis). Throttle buckets get their own alias, which CacheBucketStore.clear() empties as a whole
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle'},
+}
+
+# Background jobs (`manage.py run_worker`)
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1))
+JOB_RETRY_BASE_SECONDS = int(os.getenv('JOB_RETRY_BASE_SECONDS', 10))
+# A running job not finished after this long is assumed orphaned by a dead worker and requeued
+JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv('JOB_LOCK_TIMEOUT_SECONDS', 600))
+
+# Measurements older than this are moved to the archive table by `manage.py archive_measurements`.
+# Reads starting after the horizon skip the archive, so only lower this value, never raise it,
+# once rows have been archived
+MEASUREMENT_ARCHIVE_AFTER_DAYS = int(os.getenv('MEASUREMENT_ARCHIVE_AFTER_DAYS', 365))
+# Also keep every user's measurements packed into one row per year for full-history reads.
+# Run `manage.py build_measurement_chunks` once after turning this on
+MEASUREMENT_CHUNKS = os.getenv('MEASUREMENT_CHUNKS', 'False') == 'True'
+
+# Responses to writes sent with an Idempotency-Key header are replayed to retries for this long;
+# `manage.py purge_idempotency_keys` deletes older ones
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+# A key whose request has not finished after this long is taken over by the next retry, as its worker
+# presumably died mid-request. Keep it above the server's request timeout (SERVER_TIMEOUT_SECONDS)
+IDEMPOTENCY_KEY_LEASE_SECONDS = int(os.getenv('IDEMPOTENCY_KEY_LEASE_SECONDS', 60))
+
+# Change notifications pushed to `GET /events`. LocalBroker only reaches streams held by the same
+# process; fitme95.events.PostgresBroker fans out to every node through LISTEN/NOTIFY
+EVENT_BROKER = os.getenv('EVENT_BROKER', 'fitme95.events.LocalBroker')
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+# Events buffered per stream before a slow client is told to resync instead
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 100))
+
+# API docs. `manage.py build_openapi_schema` writes the schema once at build time and
+# `GET /openapi.json` serves that file; /swagger/ and /redoc/ only render a page that loads it.
+# Live generation on every docs hit is for local development only
+OPENAPI_SCHEMA_PATH = os.getenv('OPENAPI_SCHEMA_PATH', BASE_DIR / 'openapi.json')
+OPENAPI_CACHE_SECONDS = int(os.getenv('OPENAPI_CACHE_SECONDS', 86400))
+OPENAPI_LIVE_SCHEMA = os.getenv('OPENAPI_LIVE_SCHEMA', str(DEBUG)) == 'True'
+SWAGGER_SETTINGS = {'SPEC_URL': None if OPENAPI_LIVE_SCHEMA else 'openapi-schema'}
+REDOC_SETTINGS = {'SPEC_URL': None if OPENAPI_LIVE_SCHEMA else 'openapi-schema'}
+
+DATABASE_ROUTERS = ['fitme95.db.routers.ReplicaRouter']
+# How long a user's reads stay on the primary after they wrote. The cache must be shared by all
+# worker processes (e.g. Redis or the database cache) for this to hold across workers.
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+REPLICA_STICKY_CACHE = 'default'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -14,25 +14,15 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="FitMe95 API",
-        default_version='v1',
-        description="API documentation for FitMe95",
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from fitme95.openapi import schema_ui
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include("fitme95.urls")),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger/', schema_ui('swagger', live=settings.OPENAPI_LIVE_SCHEMA), name='schema-swagger-ui'),
+    path('redoc/', schema_ui('redoc', live=settings.OPENAPI_LIVE_SCHEMA), name='schema-redoc'),
 ]
@@ -0,0 +1,51 @@
+"""
+gunicorn settings, read from ./gunicorn.conf.py when gunicorn starts in the project root.
+
+    SERVER_WORKER_CLASS=gthread gunicorn     # WSGI, threaded workers (default)
+    SERVER_WORKER_CLASS=sync gunicorn        # WSGI, one request per worker
+    SERVER_WORKER_CLASS=uvicorn gunicorn     # ASGI, needed for the /events streams
+"""
+import os
+
+from fitme95_api.server import WORKER_CLASSES, available_cpus, available_memory_mb, worker_plan
+
+_worker_class = os.getenv('SERVER_WORKER_CLASS', 'gthread')
+worker_class, wsgi_app = WORKER_CLASSES[_worker_class]
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Processes from the CPUs the container may use, capped by what the memory budget holds; WEB_CONCURRENCY overrides both.
+# The budget defaults to 80% of the container's limit, leaving room for the master and spikes
+_memory_budget_mb = int(os.getenv('WEB_MEMORY_MB', available_memory_mb() * 0.8))
+_worker_memory_mb = int(os.getenv('WEB_WORKER_MEMORY_MB', 150))
+workers, threads = worker_plan(
+    _worker_class,
+    cpus=available_cpus(),
+    memory_mb=_memory_budget_mb,
+    worker_memory_mb=_worker_memory_mb,
+    threads=int(os.getenv('WEB_THREADS', 0)) or None,
+    workers=int(os.getenv('WEB_CONCURRENCY', 0)) or None,
+)
+
+# Keep client and load balancer connections open between requests; above the balancer's own idle
+# timeout would be wasted, below it the balancer may reuse a connection the worker just closed
+keepalive = int(os.getenv('SERVER_KEEPALIVE_SECONDS', 75))
+timeout = int(os.getenv('SERVER_TIMEOUT_SECONDS', 30))
+graceful_timeout = int(os.getenv('SERVER_GRACEFUL_TIMEOUT_SECONDS', 30))
+
+# Recycle each worker after this many requests to contain slow leaks; the jitter keeps the
+# workers from restarting all at once
+max_requests = int(os.getenv('SERVER_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('SERVER_MAX_REQUESTS_JITTER', 200))
+
+accesslog = '-'
+
+# Import the app once in the master and fork the workers from it: workers boot instantly and share
+# the imported code copy-on-write instead of each holding a copy
+preload_app = os.getenv('GUNICORN_PRELOAD', 'False') == 'True'
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from fitme95.startup import prepare_preloaded_master
+        prepare_preloaded_master()